@@ -0,0 +1,176 @@
+from typing import *
+
+from common import bootstrap, summarize, print_results, write_results
+from fake_smtp import FakeSmtpServer
+from uploads import start_server, post, set_config
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+ACCOUNT_NAME = "load"
+
+SCENARIOS = {
+    "no_admission": {"admissionMaxInFlight": "0", "admissionMaxQueued": "0", "admissionMaxQueuedPerAccount": "0"},
+    "admission": {},
+}
+
+def rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+
+def message_json(client: int, i: int) -> Dict[str, Any]:
+    return {
+        "account_name": ACCOUNT_NAME, "subject": f"Load #{client}-{i}", "to_recipients": ["to@example.com"],
+        "html_body": "<p>" + "Status update. " * 200 + "</p>"
+    }
+
+async def drive(args, base_url: str, pid: int) -> Dict[str, Any]:
+    import httpx
+
+    accepted, rejected, failed = [], [], 0
+    retry_after: List[int] = []
+    health_seconds, health_status, queued, memory = [], [], [], []
+    stop = time.perf_counter() + args.seconds
+
+    async def client(http, number):
+        nonlocal failed
+        i = 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{base_url}/jit-send-msg", json=message_json(number, i))
+            except httpx.HTTPError:
+                failed += 1
+                continue
+            elapsed = time.perf_counter() - start
+            i += 1
+
+            if response.status_code == 201:
+                accepted.append(elapsed)
+            elif response.status_code == 429:
+                rejected.append(elapsed)
+                retry_after.append(int(response.headers.get("Retry-After", 0)))
+                if args.honor_retry_after:
+                    await asyncio.sleep(min(retry_after[-1], stop - time.perf_counter()))
+            else:
+                failed += 1
+
+    async def monitor(http):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                health = (await http.get(f"{base_url}/")).json()["data"]["health"]
+                health_seconds.append(time.perf_counter() - start)
+                health_status.append(health["status"])
+                queued.append(health["admission"]["queued"])
+            except httpx.HTTPError:
+                health_seconds.append(time.perf_counter() - start)
+                health_status.append("timeout")
+            memory.append(rss(pid))
+            await asyncio.sleep(0.5)
+
+    limits = httpx.Limits(max_connections=args.clients + 1, max_keepalive_connections=args.clients + 1)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60), limits=limits) as http:
+        await asyncio.gather(monitor(http), *(client(http, number) for number in range(args.clients)))
+
+    return {
+        "accepted": accepted, "rejected": rejected, "failed": failed, "retry_after": retry_after,
+        "health_seconds": health_seconds, "health_status": health_status, "queued": queued, "memory": memory,
+    }
+
+def wait_drained(base_url: str, timeout: float) -> Optional[float]:
+    import httpx
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        health = httpx.get(f"{base_url}/", timeout=60).json()["data"]["health"]
+        if not health["admission"]["queued"] and not health["admission"]["in_flight"]:
+            return time.perf_counter() - start
+        time.sleep(0.5)
+    return None
+
+def run_scenario(args, work_dir: str, scenario: str, smtp_server: FakeSmtpServer) -> Dict[str, Any]:
+    scenario_dir = os.path.join(work_dir, scenario)
+    os.makedirs(scenario_dir, exist_ok=True)
+    process, port = start_server(scenario_dir)
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        account = {
+            "account_name": ACCOUNT_NAME, "email": "load@example.com", "password": "bench", "transport": "smtp",
+            "transport_options": {"host": smtp_server.host, "port": smtp_server.port, "security": "none"}
+        }
+        status, _ = post(port, "/set-acc", json.dumps(account).encode(), "application/json")
+        assert status == 201, status
+
+        config = {
+            "smtpPoolSize": str(args.pool_size),
+            "admissionMaxQueued": str(args.max_queued),
+            "admissionMaxQueuedPerAccount": str(args.max_queued_per_account),
+            **SCENARIOS[scenario],
+        }
+        for key, value in config.items():
+            set_config(port, key, value)
+
+        smtp_server.reset()
+        rss_before = rss(process.pid)
+        summary = asyncio.run(drive(args, base_url, process.pid))
+        sent_during = smtp_server.messages
+        drain_seconds = wait_drained(base_url, args.drain_timeout)
+
+        accepted = len(summary["accepted"])
+        statuses = summary["health_status"]
+        return {
+            "scenario": scenario,
+            "clients": args.clients,
+            "accepted_per_s": round(accepted / args.seconds, 1),
+            "rejected_per_s": round(len(summary["rejected"]) / args.seconds, 1),
+            "sent_per_s": round(sent_during / args.seconds, 1),
+            "errors": summary["failed"],
+            "max_queued": max(summary["queued"] or [0]),
+            "rss_growth_mb": round((max(summary["memory"]) - rss_before) / 2 ** 20, 1),
+            "health_p99_s": round(summarize(summary["health_seconds"])["p99_ms"] / 1000, 2),
+            "degraded_share": round(statuses.count("degraded") / len(statuses), 2) if statuses else None,
+            "rejection_p99_s": round(summarize(summary["rejected"])["p99_ms"] / 1000, 3) if summary["rejected"] else None,
+            "retry_after_max": max(summary["retry_after"] or [0]),
+            "drain_s": round(drain_seconds, 1) if drain_seconds is not None else None,
+            **summarize(summary["accepted"] or [0.0]),
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+
+    results = []
+    with FakeSmtpServer(latency=args.latency) as smtp_server:
+        for scenario in args.scenarios:
+            results.append(run_scenario(args, work_dir, scenario, smtp_server))
+            print_results(results[-1:])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the ingest endpoints past capacity with and without admission control")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=1000)
+    parser.add_argument("--max-queued-per-account", type=int, default=500)
+    parser.add_argument("--honor-retry-after", action="store_true")
+    parser.add_argument("--drain-timeout", type=float, default=600)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('admission', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from typing import *
+
+from common import bootstrap, database_url, summarize, print_results, write_results
+from pipeline import prefill_database
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+FILLER_ROW_BYTES = 4000
+
+def pad_database(path: str, size_mb: int):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS bench_filler (id INTEGER PRIMARY KEY, data BLOB)")
+
+    rows = max(0, (size_mb * 2 ** 20 - os.path.getsize(path)) // FILLER_ROW_BYTES)
+    for offset in range(0, rows, 10000):
+        with conn:
+            conn.execute(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+                "INSERT INTO bench_filler (data) SELECT randomblob(?) FROM n",
+                (min(10000, rows - offset), FILLER_ROW_BYTES)
+            )
+    conn.close()
+
+def write_during(db, message_ids: List[str], until: Callable[[], bool]) -> List[float]:
+    samples = []
+    i = 0
+    while not until():
+        start = time.perf_counter()
+        db.log_details(message_ids[i % len(message_ids)], "📨 Benchmark write during backup")
+        samples.append(time.perf_counter() - start)
+        i += 1
+    return samples
+
+def write_summary(samples: List[float], seconds: float) -> Dict[str, Any]:
+    summary = summarize(samples)
+    return {
+        "writes_per_s": round(len(samples) / seconds),
+        "worst_write_s": round(summary["max_ms"] / 1000, 3),
+        **summary,
+    }
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.config import config
+    from app.core.backup import backup_manager
+    from app.core.database_handler import DataBaseHandler
+    from app.core.models import Message
+
+    kernel = api.kernel
+    config.vars.url_app_database = database_url(work_dir, f"backup-{args.size_mb}")
+    kernel.db_handler = DataBaseHandler()
+    kernel.set_initial_config_vars()
+    backup_manager._root = os.path.join(work_dir, "backups")
+
+    db = kernel.db_handler
+    db.update_config_variable("logArchiveEnabled", "false")
+    db.update_config_variable("maxLogHistoryLength", "100000000")
+    prefill_database(db, args.messages, rng)
+    pad_database(db.database_path(), args.size_mb)
+
+    session = db.SessionLocal()
+    message_ids = [row.id for row in session.query(Message.id).limit(1000)]
+    session.close()
+
+    results = []
+
+    db.set_journal_mode(True)
+    deadline = time.perf_counter() + args.baseline_seconds
+    samples = write_during(db, message_ids, lambda: time.perf_counter() > deadline)
+    results.append({"scenario": "no_backup", "journal": "wal", **write_summary(samples, args.baseline_seconds)})
+
+    for scenario, wal, pages in (
+        ("stepped_backup", True, args.pages_per_step),
+        ("stepped_backup", False, args.pages_per_step),
+        ("single_pass_backup", False, -1),
+    ):
+        journal = db.set_journal_mode(wal)
+        start = time.perf_counter()
+        job = backup_manager.start(
+            db.database_path(), trigger="bench", pages_per_step=pages, pause=args.step_pause,
+            retention=1, max_restarts=args.max_restarts
+        )
+        samples = write_during(db, message_ids, lambda: not backup_manager.running)
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "scenario": scenario,
+            "journal": journal,
+            "status": job.status,
+            "backup_s": round(job.seconds, 1),
+            "snapshot_mb": round(job.size / 2 ** 20),
+            "steps": job.steps,
+            "restarts": job.restarts,
+            "full_pass": job.full_pass,
+            **write_summary(samples, elapsed),
+        })
+        print_results(results[-1:])
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure write latency while the database is copied into a snapshot")
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--pages-per-step", type=int, default=256)
+    parser.add_argument("--step-pause", type=float, default=0.005)
+    parser.add_argument("--max-restarts", type=int, default=10)
+    parser.add_argument("--baseline-seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('backup', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
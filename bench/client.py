@@ -0,0 +1,98 @@
+from typing import *
+
+from common import REPO_ROOT, bootstrap, print_results, write_results
+from generators import make_message_payload
+from uploads import start_server
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+def one_shot_store(base_url: str, payloads: List[Dict[str, Any]]):
+    import requests
+
+    for payload in payloads:
+        response = requests.post(f"{base_url}/store-msg", json=payload)
+        response.raise_for_status()
+
+def one_shot_poll(base_url: str, calls: int):
+    import requests
+
+    for _ in range(calls):
+        requests.get(f"{base_url}/all-accounts").raise_for_status()
+
+def timed(scenario: str, count: int, call: Callable[[], Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    return {"scenario": scenario, "calls": count, "seconds": round(elapsed, 3), "calls_per_second": round(count / elapsed, 1)}
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from mail_dispatch_client import MailDispatchClient
+    from mail_dispatch_client.aio import AsyncMailDispatchClient
+
+    def payloads(label: str) -> List[Dict[str, Any]]:
+        messages = [make_message_payload(rng, "bench", paragraphs=2) for _ in range(args.messages)]
+        for i, message in enumerate(messages):
+            message["subject"] = f"{label} #{i}"
+        return messages
+
+    async def async_batches(client: AsyncMailDispatchClient, messages: List[Dict[str, Any]]):
+        async with client:
+            await client.store_messages(messages, args.batch_size)
+
+    process, _ = start_server(work_dir)
+    status_file = os.path.join(work_dir, ".local", "share", os.environ["APPDATA_PATH"])
+    try:
+        client = MailDispatchClient(status_file=status_file)
+
+        client.store_messages(payloads("warmup"), args.batch_size)
+
+        results = [
+            timed("poll_one_shot_requests", args.polls, lambda: one_shot_poll(client.base_url, args.polls)),
+            timed("poll_pooled_client", args.polls, lambda: [client.get_accounts() for _ in range(args.polls)]),
+        ]
+
+        scenarios = [
+            ("store_one_shot_requests", lambda messages: one_shot_store(client.base_url, messages)),
+            ("store_pooled_client", lambda messages: [client.store_message(message) for message in messages]),
+            ("store_batched_client", lambda messages: client.store_messages(messages, args.batch_size)),
+            ("store_async_batched_client", lambda messages: asyncio.run(
+                async_batches(AsyncMailDispatchClient(status_file=status_file, concurrency=args.concurrency), messages)
+            )),
+        ]
+        for scenario, call in scenarios:
+            messages = payloads(scenario)
+            results.append(timed(scenario, len(messages), lambda: call(messages)))
+
+        client.close()
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare calls per second of one-shot requests and the client SDK")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('client', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from typing import *
+
+from common import APP_ROOT, bootstrap, summarize, print_results, write_results
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+def child_env(work_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["HOME"] = work_dir
+    env["LOCALAPPDATA"] = work_dir
+    env["URL_APP_DATABASE"] = f"sqlite:///{os.path.join(work_dir, 'cold.db')}"
+    return env
+
+def time_import(work_dir: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import api"], cwd=APP_ROOT, env=child_env(work_dir), check=True)
+    return time.perf_counter() - start
+
+def time_first_health(work_dir: str, timeout: float = 60.0) -> float:
+    status_file = os.path.join(work_dir, ".local", "share", os.environ["APPDATA_PATH"])
+    if os.path.exists(status_file):
+        os.remove(status_file)
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "api.py"], cwd=APP_ROOT, env=child_env(work_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with open(status_file) as f:
+                    status = json.load(f)
+                with urllib.request.urlopen(f"http://{status['host']}:{status['port']}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (OSError, ValueError, KeyError):
+                pass
+            time.sleep(0.01)
+        raise TimeoutError("Service did not become healthy in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the dispatch API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    bootstrap()
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="maildispatch-cold-") as work_dir:
+        time_import(work_dir)
+
+        for scenario, fn in (("import_api", time_import), ("first_healthy_request", time_first_health)):
+            samples = [fn(work_dir) for _ in range(args.runs)]
+            row = {"scenario": scenario}
+            row.update(summarize(samples))
+            results.append(row)
+
+    print_results(results)
+    print(f"Results written to {write_results('cold_start', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
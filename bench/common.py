@@ -0,0 +1,108 @@
+from typing import *
+
+from datetime import datetime
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_ROOT = os.path.join(REPO_ROOT, "mail_dispatch")
+RESULTS_DIR = os.path.join(REPO_ROOT, "bench", "results")
+
+def bootstrap(work_dir: Optional[str] = None) -> str:
+    work_dir = work_dir or tempfile.mkdtemp(prefix="maildispatch-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    defaults = {
+        "APP_HOST": "127.0.0.1",
+        "APPDATA_PATH": os.path.join("maildispatch-bench", "status.json"),
+        "ACCOUNT_SECRETS_FERNET_KEY": "ZmFrZS1iZW5jaG1hcmsta2V5LWZvci1sb2NhbC11c2U=",
+        "URL_APP_DATABASE": f"sqlite:///{os.path.join(work_dir, 'bench.db')}",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    os.environ["APPDATA"] = os.path.join(work_dir, "appdata")
+
+    if APP_ROOT not in sys.path:
+        sys.path.insert(0, APP_ROOT)
+
+    from app.config import config
+    config.vars.url_app_database = database_url(work_dir, "bench")
+
+    return work_dir
+
+def database_url(work_dir: str, name: str) -> str:
+    return f"sqlite:///{os.path.join(work_dir, f'{name}.db')}"
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "iterations": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "min_ms": min(ms),
+        "max_ms": max(ms),
+    }
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int = 3) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+
+    return summarize(samples)
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def write_results(suite: str, results: List[Dict[str, Any]],
+                  output: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> str:
+    revision = git_revision()
+    output = output or os.path.join(RESULTS_DIR, f"{suite}-{revision or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    document = {
+        "suite": suite,
+        "revision": revision,
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+        **(extra or {})
+    }
+
+    with open(output, "w") as f:
+        json.dump(document, f, indent=4)
+
+    return output
+
+def print_results(results: List[Dict[str, Any]]):
+    for row in results:
+        keys = [k for k in row if not k.endswith("_ms") and k != "iterations"]
+        label = " ".join(f"{k}={row[k]}" for k in keys)
+        if "p50_ms" in row:
+            print(f"{label:<55} p50={row['p50_ms']:9.3f}ms p99={row['p99_ms']:9.3f}ms n={row['iterations']}")
+        else:
+            print(label)
@@ -0,0 +1,46 @@
+from typing import *
+
+import argparse
+import json
+import sys
+
+def load_rows(path: str) -> Dict[Tuple, Dict[str, Any]]:
+    with open(path) as f:
+        document = json.load(f)
+
+    rows = {}
+    for row in document["results"]:
+        if "p50_ms" not in row:
+            continue
+        key = tuple((k, v) for k, v in row.items() if not k.endswith("_ms") and k != "iterations")
+        rows[key] = row
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    baseline = load_rows(args.baseline)
+    candidate = load_rows(args.candidate)
+    regressions = 0
+
+    for key, row in candidate.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key][args.metric], row[args.metric]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = "REGRESSION" if change > args.threshold else ""
+        regressions += bool(flag)
+
+        label = " ".join(f"{k}={v}" for k, v in key)
+        print(f"{label:<55} {before:9.3f} -> {after:9.3f} ms ({change:+6.1f}%) {flag}")
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, print_results, write_results
+from generators import make_campaign_body, make_attachment, random_address
+
+from datetime import datetime
+
+import argparse
+import random
+import uuid
+
+VARIANTS = (
+    ("none", False),
+    ("zlib", False),
+    ("zlib", True),
+    ("zstd", False),
+    ("zstd", True),
+)
+
+def make_corpus(rng: random.Random, size: int, campaigns: int, table_rows: int) -> List[str]:
+    return [make_campaign_body(rng, i % campaigns, table_rows) for i in range(size)]
+
+def configure_codec(db_handler, codec: str, use_dictionary: bool, training: List[str]):
+    from app.core.compression import body_codec
+
+    body_codec.configure(codec=codec)
+    body_codec.dictionaries.clear()
+    body_codec.active_dictionaries.clear()
+    body_codec.zstd_dictionaries.clear()
+
+    if use_dictionary:
+        codec_id, data = body_codec.train([body.encode("utf-8") for body in training])
+        dictionary_id = db_handler.store_compression_dictionary(codec_id, data, len(training))
+        body_codec.register_dictionary(dictionary_id, codec_id, data)
+
+    return body_codec
+
+def stored_bytes(db_handler) -> int:
+    from sqlalchemy import text
+
+    engine = db_handler.SessionLocal.kw["bind"]
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT SUM(LENGTH(html_body)) FROM messages")).scalar() or 0
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    from app.config import config
+    from app.core.database_handler import DataBaseHandler
+    from app.core.models import Message
+
+    corpus = make_corpus(rng, args.messages, args.campaigns, args.table_rows)
+    training = corpus[:args.training]
+    raw_bytes = sum(len(body.encode("utf-8")) for body in corpus)
+    attachments = [make_attachment(rng, 2048) for _ in range(2)]
+    results = []
+
+    for codec, use_dictionary in VARIANTS:
+        if codec == "zstd":
+            from app.core.compression import load_zstd
+            if load_zstd() is None:
+                print("zstandard is not installed, skipping zstd variants")
+                continue
+
+        variant = f"{codec}+dict" if use_dictionary else codec
+        config.vars.url_app_database = database_url(work_dir, f"compression-{variant}")
+        db_handler = DataBaseHandler()
+        body_codec = configure_codec(db_handler, codec, use_dictionary, training)
+
+        encoded = [body_codec.compress(body.encode("utf-8")) for body in corpus]
+        stored = sum(len(blob) if blob else len(body.encode("utf-8")) for blob, body in zip(encoded, corpus))
+
+        results.append({
+            "scenario": "size", "variant": variant,
+            "raw_bytes": raw_bytes, "stored_bytes": stored,
+            "ratio": round(raw_bytes / stored, 2)
+        })
+
+        row = {"scenario": "encode", "variant": variant}
+        row.update(measure(lambda i: body_codec.compress(corpus[i % len(corpus)].encode("utf-8")), args.iterations))
+        results.append(row)
+
+        if codec != "none":
+            row = {"scenario": "decode", "variant": variant}
+            row.update(measure(lambda i: body_codec.decompress(encoded[i % len(encoded)]), args.iterations))
+            results.append(row)
+
+        message_ids = []
+
+        def write(i):
+            db = db_handler.SessionLocal()
+            try:
+                message = Message(
+                    id=str(uuid.uuid4()), hash_value=uuid.uuid4().hex + uuid.uuid4().hex,
+                    account_name="bench", subject=f"Campaign #{i}",
+                    to_recipients=[random_address(rng)], attachments=attachments,
+                    html_body=corpus[i % len(corpus)], use_signature=False, created_at=datetime.now()
+                )
+                db.add(message)
+                db.commit()
+                message_ids.append(message.id)
+            finally:
+                db.close()
+
+        def read(i):
+            db = db_handler.SessionLocal()
+            try:
+                message = db.query(Message).filter(Message.id == message_ids[i % len(message_ids)]).first()
+                assert message.html_body
+            finally:
+                db.close()
+
+        row = {"scenario": "db_write", "variant": variant}
+        row.update(measure(write, args.iterations))
+        results.append(row)
+
+        row = {"scenario": "db_read", "variant": variant}
+        row.update(measure(read, args.iterations))
+        results.append(row)
+
+        results.append({"scenario": "db_size", "variant": variant, "html_body_bytes": stored_bytes(db_handler)})
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure html_body compression size and overhead")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--campaigns", type=int, default=5)
+    parser.add_argument("--table-rows", type=int, default=400)
+    parser.add_argument("--training", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('compression', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
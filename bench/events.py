@@ -0,0 +1,234 @@
+from typing import *
+
+from common import bootstrap, summarize, print_results, write_results
+from uploads import start_server, post
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import tracemalloc
+
+ACCOUNT_NAME = "events"
+
+def process_stats(pid: int) -> Tuple[int, float]:
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss, cpu
+
+def db_sessions(http, base_url: str) -> float:
+    for line in http.get(f"{base_url}/metrics").text.splitlines():
+        if line.startswith("maildispatch_db_sessions_total"):
+            return float(line.split()[-1])
+    return 0.0
+
+def in_process(args, rng: random.Random) -> List[Dict[str, Any]]:
+    from app.core.events import EventBus
+
+    async def scenario(kind: str) -> Dict[str, Any]:
+        bus = EventBus()
+        latencies = []
+
+        async def consume(subscription):
+            while True:
+                events = await subscription.next_events(3600)
+                now = time.perf_counter()
+                latencies.extend(now - event["sent_at"] for event in events)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        if kind == "per_message":
+            subscriptions = [bus.subscribe(message_id=f"message-{i}") for i in range(args.subscribers)]
+        else:
+            subscriptions = [bus.subscribe() for _ in range(args.broadcast_subscribers)]
+        tasks = [asyncio.create_task(consume(subscription)) for subscription in subscriptions]
+        await asyncio.sleep(0.1)
+        per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / len(subscriptions)
+        tracemalloc.stop()
+
+        publish_seconds = []
+
+        def publisher():
+            for _ in range(args.events):
+                message_id = f"message-{rng.randrange(args.subscribers)}"
+                start = time.perf_counter()
+                bus.publish("status", message_id, status="sent", sent_at=start)
+                publish_seconds.append(time.perf_counter() - start)
+                time.sleep(args.publish_gap)
+
+        await asyncio.to_thread(publisher)
+        await asyncio.sleep(0.2)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        latency = summarize(latencies)
+        return {
+            "scenario": f"bus_{kind}",
+            "subscribers": len(subscriptions),
+            "bytes_per_subscriber": round(per_subscriber),
+            "events": args.events,
+            "deliveries": len(latencies),
+            "publish_us": round(summarize(publish_seconds)["p50_ms"] * 1000, 1),
+            **latency,
+        }
+
+    return [asyncio.run(scenario("per_message")), asyncio.run(scenario("broadcast"))]
+
+def message_json(subject: str) -> Dict[str, Any]:
+    return {"account_name": ACCOUNT_NAME, "subject": subject, "to_recipients": ["to@example.com"], "html_body": "<p>Status</p>"}
+
+def over_http(args, work_dir: str) -> List[Dict[str, Any]]:
+    import httpx
+
+    process, port = start_server(work_dir)
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+
+    try:
+        account = {"account_name": ACCOUNT_NAME, "email": "events@example.com", "password": "bench", "transport": "sink"}
+        status, _ = post(port, "/set-acc", json.dumps(account).encode(), "application/json")
+        assert status == 201, status
+
+        sync_http = httpx.Client(timeout=30)
+        message_ids = [
+            sync_http.post(f"{base_url}/jit-send-msg", json=message_json(f"Seed #{i}")).json()["data"]["message_id"]
+            for i in range(args.clients)
+        ]
+
+        async def polling() -> Dict[str, Any]:
+            requests = 0
+            stop = time.perf_counter() + args.seconds
+
+            async def poller(http, message_id):
+                nonlocal requests
+                while time.perf_counter() < stop:
+                    await http.request("GET", f"{base_url}/message", json={"message_id": message_id})
+                    requests += 1
+                    await asyncio.sleep(args.poll_interval)
+
+            limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+            async with httpx.AsyncClient(timeout=60, limits=limits) as http:
+                await asyncio.gather(*(poller(http, message_id) for message_id in message_ids))
+            return {"requests": requests}
+
+        async def streaming() -> Dict[str, Any]:
+            opened = 0
+            ready = asyncio.Event()
+            delivered: Dict[str, float] = {}
+
+            async def subscriber(http, params, watch):
+                nonlocal opened
+                async with http.stream("GET", f"{base_url}/events", params=params) as response:
+                    opened += 1
+                    if opened == args.clients + 1:
+                        ready.set()
+                    async for line in response.aiter_lines():
+                        if watch and line.startswith("data:"):
+                            event = json.loads(line[5:])
+                            if event.get("status") == "sent":
+                                delivered[event["message_id"]] = time.perf_counter()
+
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+            async with httpx.AsyncClient(timeout=httpx.Timeout(30, read=None), limits=limits) as http:
+                rss_before, _ = process_stats(process.pid)
+                tasks = [asyncio.create_task(subscriber(http, {"message_id": message_id}, False)) for message_id in message_ids]
+                tasks.append(asyncio.create_task(subscriber(http, {"account": ACCOUNT_NAME}, True)))
+                await asyncio.wait_for(ready.wait(), 120)
+                await asyncio.sleep(1)
+                rss_after, _ = process_stats(process.pid)
+
+                sessions_before = await asyncio.to_thread(db_sessions, sync_http, base_url)
+                _, cpu_before = process_stats(process.pid)
+                await asyncio.sleep(args.seconds)
+                _, cpu_after = process_stats(process.pid)
+                sessions_after = await asyncio.to_thread(db_sessions, sync_http, base_url)
+
+                sent_at = {}
+                for i in range(args.sends):
+                    start = time.perf_counter()
+                    response = await http.post(f"{base_url}/jit-send-msg", json=message_json(f"Tracked #{i}"))
+                    sent_at[response.json()["data"]["message_id"]] = start
+                    await asyncio.sleep(0.05)
+                await asyncio.sleep(2)
+
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            latencies = [delivered[message_id] - start for message_id, start in sent_at.items() if message_id in delivered]
+            return {
+                "connections": opened,
+                "rss_kb_per_connection": round((rss_after - rss_before) / opened / 1024, 1),
+                "idle_cpu_s": round(cpu_after - cpu_before, 2),
+                "idle_db_sessions": int(sessions_after - sessions_before),
+                "sends": args.sends,
+                "sent_events": len(latencies),
+                **summarize(latencies or [0.0]),
+            }
+
+        sessions_before = db_sessions(sync_http, base_url)
+        _, cpu_before = process_stats(process.pid)
+        summary = asyncio.run(polling())
+        _, cpu_after = process_stats(process.pid)
+        sessions_after = db_sessions(sync_http, base_url)
+        results.append({
+            "scenario": "http_polling",
+            "clients": args.clients,
+            "requests_per_s": round(summary["requests"] / args.seconds),
+            "db_sessions_per_s": round((sessions_after - sessions_before) / args.seconds),
+            "cpu_s": round(cpu_after - cpu_before, 2),
+            "seconds": args.seconds,
+        })
+
+        summary = asyncio.run(streaming())
+        results.append({
+            "scenario": "http_streaming",
+            "clients": args.clients,
+            "db_sessions_per_s": round(summary["idle_db_sessions"] / args.seconds),
+            "cpu_s": summary["idle_cpu_s"],
+            "seconds": args.seconds,
+            **{key: value for key, value in summary.items() if key not in ("idle_cpu_s", "idle_db_sessions")},
+        })
+
+        sync_http.close()
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    results = in_process(args, rng)
+    print_results(results)
+    results.extend(over_http(args, work_dir))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polling with the status event stream")
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--broadcast-subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--publish-gap", type=float, default=0.0005)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--sends", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('events', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
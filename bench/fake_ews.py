@@ -0,0 +1,248 @@
+from typing import *
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collections import Counter
+
+import datetime
+import ipaddress
+import itertools
+import os
+import re
+import ssl
+import tempfile
+import threading
+import time
+
+TYPES_NS = "http://schemas.microsoft.com/exchange/services/2006/types"
+MESSAGES_NS = "http://schemas.microsoft.com/exchange/services/2006/messages"
+
+ENVELOPE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<s:Header><h:ServerVersionInfo MajorVersion="15" MinorVersion="1" MajorBuildNumber="2507" '
+    f'MinorBuildNumber="0" Version="V2017_07_11" xmlns:h="{TYPES_NS}"/></s:Header>'
+    '<s:Body>{body}</s:Body></s:Envelope>'
+)
+
+AUTODISCOVER_RESPONSE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<Autodiscover xmlns="http://schemas.microsoft.com/exchange/autodiscover/responseschema/2006">'
+    '<Response xmlns="http://schemas.microsoft.com/exchange/autodiscover/outlook/responseschema/2006a">'
+    '<User><AutoDiscoverSMTPAddress>{email}</AutoDiscoverSMTPAddress></User>'
+    '<Account><AccountType>email</AccountType><Action>settings</Action>'
+    '<Protocol><Type>EXPR</Type><EwsUrl>{ews_url}</EwsUrl></Protocol>'
+    '</Account></Response></Autodiscover>'
+)
+
+class RecordedRequest(NamedTuple):
+    path: str
+    operation: Optional[str]
+    size: int
+    timestamp: float
+
+def self_signed_certificate(host: str) -> Tuple[str, str]:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, host)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(host))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+
+    directory = tempfile.mkdtemp(prefix="maildispatch-bench-tls-")
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return cert_path, key_path
+
+class FakeExchangeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, tls: bool = False,
+                 idle_timeout: Optional[float] = None, connect_latency: float = 0.0):
+        self.latency = latency
+        self.scheme = "https" if tls else "http"
+        self.connections = 0
+        self.requests: List[RecordedRequest] = []
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Closes keep-alive sockets left idle, like a load balancer in front of Exchange.
+            timeout = idle_timeout
+
+            def setup(self):
+                with server.lock:
+                    server.connections += 1
+                # Stands in for the TCP and TLS round trips of a real handshake.
+                if connect_latency:
+                    time.sleep(connect_latency)
+                super().setup()
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8", "replace")
+                status, payload = server.handle(self.path, body)
+
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread: Optional[threading.Thread] = None
+
+        self.ca_bundle: Optional[str] = None
+        if tls:
+            self.ca_bundle, key_path = self_signed_certificate(host)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.ca_bundle, key_path)
+            # The handshake runs on the handler thread instead of blocking accept().
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True, do_handshake_on_connect=False)
+
+    @property
+    def ews_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/EWS/Exchange.asmx"
+
+    @property
+    def autodiscover_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/Autodiscover/Autodiscover.xml"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-ews", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        with self.lock:
+            self.requests.clear()
+            self.connections = 0
+
+    def summary(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(Counter(req.operation or req.path for req in self.requests))
+
+    def handle(self, path: str, body: str) -> Tuple[int, str]:
+        if path.lower().startswith("/autodiscover"):
+            operation = "Autodiscover"
+            email = re.search(r"<EMailAddress>([^<]+)</EMailAddress>", body)
+            payload = AUTODISCOVER_RESPONSE.format(
+                email=email.group(1) if email else "", ews_url=self.ews_url
+            )
+        else:
+            match = re.search(r"<s:Body><m:(\w+)", body)
+            operation = match.group(1) if match else None
+            payload = self.ews_response(operation, body)
+
+        with self.lock:
+            self.requests.append(RecordedRequest(path, operation, len(body), time.time()))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if payload is None:
+            return 500, ""
+        return 200, payload
+
+    def ews_response(self, operation: Optional[str], body: str) -> Optional[str]:
+        if operation == "GetFolder":
+            folders = re.findall(r'DistinguishedFolderId Id="(\w+)"', body) or ["folder"]
+            inner = "".join(
+                self.success(operation, f"<m:Folders>{self.folder(name)}</m:Folders>") for name in folders
+            )
+        elif operation == "CreateItem":
+            disposition = re.search(r'MessageDisposition="(\w+)"', body)
+            sends = disposition is not None and disposition.group(1).startswith("Send")
+            count = body.count("<t:Message>") or 1
+            inner = "".join(
+                self.success(operation, "<m:Items/>" if sends else f"<m:Items>{self.item()}</m:Items>")
+                for _ in range(count)
+            )
+        elif operation == "CreateAttachment":
+            count = body.count("<t:FileAttachment>") or 1
+            inner = "".join(
+                self.success(operation, f'<m:Attachments><t:FileAttachment><t:AttachmentId Id="att-{next(self.ids)}" '
+                                        'RootItemId="item" RootItemChangeKey="ck"/></t:FileAttachment></m:Attachments>')
+                for _ in range(count)
+            )
+        elif operation in ("SendItem", "DeleteItem"):
+            inner = self.success(operation)
+        else:
+            return None
+
+        return ENVELOPE.format(
+            body=f'<m:{operation}Response xmlns:m="{MESSAGES_NS}" xmlns:t="{TYPES_NS}">'
+                 f'<m:ResponseMessages>{inner}</m:ResponseMessages></m:{operation}Response>'
+        )
+
+    def success(self, operation: str, inner: str = "") -> str:
+        return (
+            f'<m:{operation}ResponseMessage ResponseClass="Success">'
+            f'<m:ResponseCode>NoError</m:ResponseCode>{inner}</m:{operation}ResponseMessage>'
+        )
+
+    def folder(self, name: str) -> str:
+        return (
+            f'<t:Folder><t:FolderId Id="{name}-id" ChangeKey="ck"/><t:DisplayName>{name}</t:DisplayName>'
+            '<t:TotalCount>0</t:TotalCount><t:ChildFolderCount>0</t:ChildFolderCount>'
+            '<t:UnreadCount>0</t:UnreadCount></t:Folder>'
+        )
+
+    def item(self) -> str:
+        return f'<t:Message><t:ItemId Id="item-{next(self.ids)}" ChangeKey="ck"/></t:Message>'
+
+def fake_account(server: FakeExchangeServer, email: str):
+    from exchangelib import Account, Configuration, Credentials, Version, Build, EWSTimeZone
+    from exchangelib.transport import NOAUTH
+
+    configuration = Configuration(
+        service_endpoint=server.ews_url,
+        credentials=Credentials(email, "benchmark"),
+        auth_type=NOAUTH,
+        version=Version(build=Build(15, 1, 2507, 0)),
+        max_connections=8
+    )
+    return Account(
+        primary_smtp_address=email,
+        config=configuration,
+        autodiscover=False,
+        access_type="delegate",
+        default_timezone=EWSTimeZone("UTC")
+    )
@@ -0,0 +1,83 @@
+from typing import *
+
+from socketserver import ThreadingTCPServer, StreamRequestHandler
+
+import threading
+import time
+
+class SmtpHandler(StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server: "FakeSmtpServer" = self.server.owner
+        server.count_connection()
+        time.sleep(server.connect_latency)
+        self.reply("220 fake-smtp ESMTP ready")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-fake-smtp\r\n250-PIPELINING\r\n250-8BITMIME\r\n250-SIZE 52428800\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 2.0.0 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data in iter(self.rfile.readline, b""):
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    size += len(data)
+                time.sleep(server.latency)
+                server.count_message(size)
+                self.reply("250 2.0.0 Queued")
+            elif verb == "QUIT":
+                self.reply("221 2.0.0 Bye")
+                return
+            else:
+                self.reply("502 5.5.2 Command not implemented")
+
+class FakeSmtpServer:
+    def __init__(self, host: str = "127.0.0.1", latency: float = 0.0, connect_latency: float = 0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.bytes = 0
+
+        ThreadingTCPServer.allow_reuse_address = True
+        self.server = ThreadingTCPServer((host, 0), SmtpHandler)
+        self.server.daemon_threads = True
+        self.server.owner = self
+        self.host, self.port = self.server.server_address
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def count_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def count_message(self, size: int):
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.messages = self.bytes = 0
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,81 @@
+from typing import *
+
+from common import bootstrap, print_results, write_results
+from fake_ews import FakeExchangeServer
+from generators import make_message_payload
+from pipeline import prepare_kernel, ACCOUNT_NAME
+
+import argparse
+import random
+import time
+
+def decode_count() -> int:
+    from app.core.metrics import ATTACHMENT_DECODE_SECONDS
+    return sum(ATTACHMENT_DECODE_SECONDS.counts)
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.json.schemas import MessageData
+
+    results = []
+
+    with FakeExchangeServer(latency=args.ews_latency) as server:
+        kernel = prepare_kernel(api, work_dir, 0, server, rng)
+        kernel.db_handler.update_config_variable("maxRecipientsPerMessage", str(args.chunk_size))
+
+        for concurrency in args.concurrency:
+            kernel.db_handler.update_config_variable("accountSendConcurrency", str(concurrency))
+            kernel.account_slots.clear()
+
+            for fan_out in (None, "per_recipient") if args.per_recipient else (None,):
+                payload = make_message_payload(
+                    rng, ACCOUNT_NAME, recipients=args.recipients, attachments=args.attachments
+                )
+                payload["fan_out"] = fan_out
+                if fan_out:
+                    payload["to_recipients"] = payload["to_recipients"][:args.per_recipient]
+                message = kernel.db_handler.store_new_message(MessageData.model_validate(payload))
+
+                server.reset()
+                decodes = decode_count()
+                start = time.perf_counter()
+                kernel.send_message(message.id)
+                elapsed = time.perf_counter() - start
+
+                chunks = kernel.db_handler.get_message_chunks(message.id)
+                assert chunks and all(chunk.status.value == "sent" for chunk in chunks), "fan-out did not complete"
+
+                results.append({
+                    "scenario": f"fan_out_{fan_out or 'chunked'}",
+                    "concurrency": concurrency,
+                    "recipients": sum(len(c.to_recipients) + len(c.cc_recipients or []) for c in chunks),
+                    "chunks": len(chunks),
+                    "seconds": round(elapsed, 3),
+                    "attachment_decodes": decode_count() - decodes,
+                    "requests": server.summary(),
+                })
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recipient fan-out against a fake Exchange server")
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--attachments", type=int, default=2)
+    parser.add_argument("--per-recipient", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--ews-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('fanout', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from typing import *
+
+import base64
+import os
+import random
+import string
+import struct
+import zlib
+
+WORDS = (
+    "invoice order payment account balance report update meeting schedule "
+    "customer service request delivery status approval review summary notice"
+).split()
+
+def random_words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def random_address(rng: random.Random, domain: str = "example.com") -> str:
+    user = "".join(rng.choice(string.ascii_lowercase) for _ in range(8))
+    return f"{user}@{domain}"
+
+def png_bytes(width: int = 64, height: int = 64, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    rows = b"".join(
+        b"\x00" + bytes(rng.randrange(256) for _ in range(width * 3)) for _ in range(height)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+def logo_png_bytes(width: int = 1200, height: int = 600, seed: int = 0, level: int = 0, metadata_bytes: int = 16 * 1024) -> bytes:
+    rng = random.Random(seed)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    # Flat bands and a disc, like an exported logo: huge when stored uncompressed, tiny when deflated well.
+    colors = [bytes(rng.randrange(256) for _ in range(3)) for _ in range(6)]
+    cx, cy, radius = width // 3, height // 2, height // 3
+    rows = []
+    for y in range(height):
+        row = bytearray(colors[y * len(colors) // height] * width)
+        dy = y - cy
+        if abs(dy) < radius:
+            half = int((radius * radius - dy * dy) ** 0.5)
+            row[(cx - half) * 3:(cx + half) * 3] = colors[-1] * (2 * half)
+        rows.append(b"\x00" + bytes(row))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    xmp = b"XML:com.adobe.xmp\x00\x00\x00\x00\x00" + b"<x:xmpmeta/>".ljust(metadata_bytes, b" ")
+
+    return (
+        b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"iTXt", xmp)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), level)) + chunk(b"IEND", b"")
+    )
+
+def make_attachment(rng: random.Random, size: int, inline: bool = False) -> Dict[str, Any]:
+    if inline:
+        filename = f"image_{rng.randrange(10 ** 6)}.png"
+        content = png_bytes(seed=rng.randrange(10 ** 6))
+    else:
+        filename = f"file_{rng.randrange(10 ** 6)}.pdf"
+        content = rng.randbytes(size)
+
+    attachment = {
+        "filename": filename,
+        "content_bytes": base64.b64encode(content).decode("utf-8")
+    }
+    if inline:
+        attachment["cid"] = filename
+    return attachment
+
+def make_html_body(rng: random.Random, paragraphs: int = 5, table_rows: int = 0) -> str:
+    parts = [f"<html><body><h1>{random_words(rng, 4).title()}</h1>"]
+    parts.extend(f"<p style=\"font-family:Arial;color:#333\">{random_words(rng, 40)}</p>" for _ in range(paragraphs))
+
+    if table_rows:
+        parts.append("<table style=\"border-collapse:collapse\">")
+        parts.extend(
+            f"<tr><td>{rng.randrange(10 ** 6)}</td><td>{random_words(rng, 3)}</td><td>{rng.random():.2f}</td></tr>"
+            for _ in range(table_rows)
+        )
+        parts.append("</table>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def make_campaign_body(rng: random.Random, campaign: int = 0, table_rows: int = 200) -> str:
+    style = "".join(
+        f".c{campaign}-{i}{{font-family:Arial,Helvetica,sans-serif;color:#{(campaign * 97 + i * 31) % 0xffffff:06x};padding:{i % 8}px}}"
+        for i in range(40)
+    )
+    header = (
+        f"<html><head><style>{style}</style></head><body>"
+        f"<table class=\"c{campaign}-0\" width=\"100%\"><tr><td class=\"c{campaign}-1\">"
+        f"<img src=\"cid:logo-{campaign}.png\" alt=\"Logo\"/></td></tr></table>"
+        f"<p class=\"c{campaign}-2\">Estimado/a {random_words(rng, 2).title()},</p>"
+    )
+    rows = "".join(
+        f"<tr><td class=\"c{campaign}-3\">{rng.randrange(10 ** 6)}</td>"
+        f"<td class=\"c{campaign}-4\">{random_words(rng, 3)}</td>"
+        f"<td class=\"c{campaign}-5\" style=\"text-align:right\">{rng.random() * 1000:.2f}</td></tr>"
+        for _ in range(table_rows)
+    )
+    footer = (
+        f"<p class=\"c{campaign}-6\">{random_words(rng, 60)}</p>"
+        f"<p class=\"c{campaign}-7\" style=\"font-size:10px\">Este correo fue enviado automáticamente, "
+        f"por favor no responda. Campaña #{campaign}.</p></body></html>"
+    )
+    return f"{header}<table class=\"c{campaign}-8\">{rows}</table>{footer}"
+
+def make_message_payload(rng: random.Random, account_name: str,
+                         recipients: int = 1, attachments: int = 0,
+                         attachment_size: int = 16 * 1024, paragraphs: int = 5) -> Dict[str, Any]:
+    return {
+        "account_name": account_name,
+        "subject": f"{random_words(rng, 3).title()} #{rng.randrange(10 ** 9)}",
+        "to_recipients": [random_address(rng) for _ in range(recipients)],
+        "cc_recipients": [random_address(rng, "example.org")] if recipients > 1 else None,
+        "attachments": [make_attachment(rng, attachment_size) for _ in range(attachments)],
+        "html_body": make_html_body(rng, paragraphs),
+        "use_signature": False
+    }
+
+def make_mdx_template(rows: int = 50) -> Tuple[str, Dict[str, Any]]:
+    template = (
+        "<h1>Hello {name}</h1>\n<p>Your order {order_id} is {status}.</p>\n"
+        "<table>\n::repeat items\n<tr><td>{sku}</td><td>{qty}</td><td>{price}</td></tr>\n::endrepeat\n</table>"
+    )
+    context = {
+        "name": "Customer",
+        "order_id": 12345,
+        "status": "shipped",
+        "items": [{"sku": f"SKU-{i}", "qty": i % 7 + 1, "price": f"{i * 1.5:.2f}"} for i in range(rows)]
+    }
+    return template, context
+
+def make_signature(appdata_dir: str, signature_key: str, images: int = 2, image_size: int = 64,
+                   logo: Optional[Tuple[int, int]] = None) -> str:
+    sig_dir = os.path.join(appdata_dir, "Microsoft", "Signatures")
+    res_folder = f"{signature_key}_files"
+    os.makedirs(os.path.join(sig_dir, res_folder), exist_ok=True)
+
+    img_tags = []
+    for i in range(images):
+        filename = f"image{i:03d}.png"
+        with open(os.path.join(sig_dir, res_folder, filename), "wb") as f:
+            f.write(png_bytes(image_size, image_size, seed=i))
+        img_tags.append(f'<img width=120 height=40 src="{res_folder}/{filename}">')
+
+    if logo is not None:
+        with open(os.path.join(sig_dir, res_folder, "logo.png"), "wb") as f:
+            f.write(logo_png_bytes(*logo))
+        img_tags.append(f'<img width=300 height=150 src="{res_folder}/logo.png">')
+
+    with open(os.path.join(sig_dir, f"{signature_key}.htm"), "w", encoding="utf-8") as f:
+        f.write(f"<html><body><p>Best regards,<br>{signature_key}</p>{''.join(img_tags)}</body></html>")
+
+    return signature_key
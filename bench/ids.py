@@ -0,0 +1,104 @@
+from typing import *
+
+from common import bootstrap, print_results, write_results
+
+from datetime import datetime
+
+import argparse
+import os
+import sqlite3
+import time
+import uuid
+
+BATCH = 10000
+
+def schemes():
+    from app.core.ids import uuid7
+
+    return {
+        "uuid4_text": ("VARCHAR(36)", lambda: str(uuid.uuid4())),
+        "uuid7_text": ("VARCHAR(36)", lambda: str(uuid7())),
+        "uuid7_blob": ("BLOB", lambda: uuid7().bytes),
+    }
+
+def create_tables(conn: sqlite3.Connection, id_type: str):
+    conn.executescript(f"""
+        CREATE TABLE messages (
+            id {id_type} NOT NULL PRIMARY KEY,
+            account_name VARCHAR(150) NOT NULL,
+            created_at DATETIME
+        );
+        CREATE TABLE message_logs (
+            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+            message_id {id_type} REFERENCES messages (id),
+            details TEXT NOT NULL,
+            timestamp DATETIME
+        );
+        CREATE INDEX ix_message_logs_message_id ON message_logs (message_id);
+    """)
+
+def index_bytes(conn: sqlite3.Connection) -> Dict[str, int]:
+    rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    return dict(rows)
+
+def measure_scheme(work_dir: str, scheme: str, id_type: str, new_id: Callable[[], Any], rows: int) -> Dict[str, Any]:
+    path = os.path.join(work_dir, f"ids-{scheme}-{rows}.db")
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    create_tables(conn, id_type)
+    now = datetime.now().isoformat(" ")
+
+    start = time.perf_counter()
+    tail_start = None
+    for offset in range(0, rows, BATCH):
+        if tail_start is None and offset >= rows * 0.9:
+            tail_start, tail_offset = time.perf_counter(), offset
+
+        ids = [new_id() for _ in range(min(BATCH, rows - offset))]
+        with conn:
+            conn.executemany("INSERT INTO messages (id, account_name, created_at) VALUES (?, 'bench', ?)", [(i, now) for i in ids])
+            conn.executemany(
+                "INSERT INTO message_logs (message_id, details, timestamp) VALUES (?, '✅ Message stored for future dispatch', ?)",
+                [(i, now) for i in ids]
+            )
+    end = time.perf_counter()
+
+    sizes = index_bytes(conn)
+    conn.close()
+
+    result = {
+        "scenario": scheme,
+        "rows": rows,
+        "inserts_per_s": round(rows / (end - start)),
+        "last_10pct_inserts_per_s": round((rows - tail_offset) / (end - tail_start)),
+        "pk_index_mb": round(sizes.get("sqlite_autoindex_messages_1", 0) / 2 ** 20, 1),
+        "log_index_mb": round(sizes.get("ix_message_logs_message_id", 0) / 2 ** 20, 1),
+        "file_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+    }
+    os.remove(path)
+    return result
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+
+    results = []
+    for rows in args.rows:
+        for scheme, (id_type, new_id) in schemes().items():
+            results.append(measure_scheme(work_dir, scheme, id_type, new_id, rows))
+            print_results(results[-1:])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare insert throughput and index size of random and time-ordered message ids")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000, 10000000])
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"Results written to {write_results('ids', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
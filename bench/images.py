@@ -0,0 +1,80 @@
+from typing import *
+
+from common import bootstrap, print_results, write_results
+from fake_ews import FakeExchangeServer
+from generators import make_message_payload, make_signature
+from pipeline import prepare_kernel, ACCOUNT_NAME
+
+import argparse
+import os
+import random
+import time
+
+def counters() -> Tuple[float, float]:
+    from app.core.metrics import IMAGE_BYTES_SAVED_TOTAL, CACHE_REQUESTS_TOTAL
+    return IMAGE_BYTES_SAVED_TOTAL.values.get((), 0), CACHE_REQUESTS_TOTAL.values.get(("images", "miss"), 0)
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.json.schemas import MessageData
+    from app.mail.images import image_optimizer
+
+    signature_key = make_signature(os.environ["APPDATA"], "benchlogo", images=1, logo=(args.logo_width, args.logo_height))
+    results = []
+
+    with FakeExchangeServer(latency=args.ews_latency) as server:
+        kernel = prepare_kernel(api, work_dir, 0, server, rng)
+        kernel.db_handler.store_new_account_signature(ACCOUNT_NAME, signature_key)
+        kernel.db_handler.enable_account_signature(ACCOUNT_NAME, signature_key)
+
+        for enabled in (False, True):
+            image_optimizer.configure(enabled=enabled, max_dimension=args.max_dimension, jpeg_quality=args.jpeg_quality)
+
+            payload = make_message_payload(rng, ACCOUNT_NAME, recipients=args.recipients)
+            payload.update(use_signature=True, fan_out="per_recipient")
+            message = kernel.db_handler.store_new_message(MessageData.model_validate(payload))
+
+            server.reset()
+            saved_before, optimized_before = counters()
+            start = time.perf_counter()
+            kernel.send_message(message.id)
+            elapsed = time.perf_counter() - start
+            saved_after, optimized_after = counters()
+
+            with server.lock:
+                uploaded = sum(request.size for request in server.requests)
+
+            results.append({
+                "scenario": "optimized" if enabled else "original",
+                "sends": args.recipients,
+                "seconds": round(elapsed, 2),
+                "uploaded_mb": round(uploaded / 2 ** 20, 1),
+                "saved_per_send_kb": round((saved_after - saved_before) / args.recipients / 1024, 1),
+                "saved_total_mb": round((saved_after - saved_before) / 2 ** 20, 1),
+                "images_processed": int(optimized_after - optimized_before),
+            })
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes sent for a signature campaign with and without inline image optimization")
+    parser.add_argument("--recipients", type=int, default=100)
+    parser.add_argument("--logo-width", type=int, default=1200)
+    parser.add_argument("--logo-height", type=int, default=600)
+    parser.add_argument("--max-dimension", type=int, default=1600)
+    parser.add_argument("--jpeg-quality", type=int, default=85)
+    parser.add_argument("--ews-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('images', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
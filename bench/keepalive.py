@@ -0,0 +1,95 @@
+from typing import *
+
+from common import bootstrap, summarize, print_results, write_results
+from fake_ews import FakeExchangeServer
+from generators import make_message_payload
+from pipeline import prepare_kernel, ACCOUNT_NAME
+
+import argparse
+import os
+import random
+import time
+
+def ews_counters() -> Tuple[int, int]:
+    from app.core.metrics import EWS_REQUESTS_TOTAL, EWS_CONNECTIONS_TOTAL
+    return int(EWS_REQUESTS_TOTAL.values.get((), 0)), int(EWS_CONNECTIONS_TOTAL.values.get((), 0))
+
+def measure_mode(api, work_dir: str, args, rng: random.Random, ping_interval: float) -> Dict[str, Any]:
+    from app.json.schemas import MessageData
+    from app.mail.protocol import configure_protocol
+
+    with FakeExchangeServer(
+        latency=args.ews_latency, tls=True, idle_timeout=args.server_idle_timeout, connect_latency=args.connect_latency
+    ) as server:
+        os.environ["REQUESTS_CA_BUNDLE"] = server.ca_bundle
+
+        kernel = prepare_kernel(api, work_dir, 0, server, rng)
+        kernel.db_handler.update_config_variable("ewsPoolSize", str(args.pool_size))
+        kernel.db_handler.update_config_variable("ewsKeepAliveInterval", str(ping_interval))
+        configure_protocol(kernel.db_handler.get_config_variable("ewsTimeout").get_var())
+        kernel.tune_account(kernel.opened_accounts[ACCOUNT_NAME])
+
+        def send():
+            payload = make_message_payload(rng, ACCOUNT_NAME, recipients=1, attachments=0)
+            message = kernel.db_handler.store_new_message(MessageData.model_validate(payload))
+            start = time.perf_counter()
+            kernel.send_message(message.id)
+            return time.perf_counter() - start
+
+        send()
+        kernel.start_keepalive_worker()
+        try:
+            requests_before, connections_before = ews_counters()
+            server.reset()
+
+            samples = []
+            for _ in range(args.iterations):
+                time.sleep(args.idle)
+                samples.append(send())
+
+            requests_after, connections_after = ews_counters()
+        finally:
+            kernel.stop_keepalive_worker()
+            kernel.opened_accounts[ACCOUNT_NAME].protocol.close()
+
+    stats = summarize(samples)
+    return {
+        "scenario": "send_after_idle_pinged" if ping_interval else "send_after_idle",
+        "idle_s": args.idle,
+        "ping_interval_s": ping_interval,
+        "iterations": stats["iterations"],
+        "p50_ms": round(stats["p50_ms"], 1),
+        "p99_ms": round(stats["p99_ms"], 1),
+        "requests": requests_after - requests_before,
+        "connections": connections_after - connections_before,
+        "server_connections": server.connections,
+    }
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+
+    return [measure_mode(api, work_dir, args, rng, interval) for interval in (0, args.ping_interval)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure send latency after idle periods with and without keep-alive pings")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--idle", type=float, default=1.5)
+    parser.add_argument("--server-idle-timeout", type=float, default=1.0)
+    parser.add_argument("--ping-interval", type=float, default=0.4)
+    parser.add_argument("--connect-latency", type=float, default=0.03)
+    parser.add_argument("--ews-latency", type=float, default=0.01)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('keepalive', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
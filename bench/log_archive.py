@@ -0,0 +1,95 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, print_results, write_results
+from pipeline import prefill_database
+
+import argparse
+import os
+import random
+import time
+
+def table_bytes(db_handler, table: str) -> int:
+    engine = db_handler.SessionLocal.kw["bind"]
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = ?)", (table,)
+        ).scalar()
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.config import config
+    from app.core.archive import log_archive
+    from app.core.database_handler import DataBaseHandler
+    from app.core.models import MessageLog
+
+    kernel = api.kernel
+    config.vars.url_app_database = database_url(work_dir, f"log-archive-{args.logs}")
+    kernel.db_handler = DataBaseHandler()
+    kernel.set_initial_config_vars()
+    log_archive._root = os.path.join(work_dir, "log_archive")
+
+    db = kernel.db_handler
+    db.update_config_variable("maxLogHistoryLength", str(args.keep))
+    db.update_config_variable("logArchiveSegmentSize", str(args.segment_size))
+    prefill_database(db, args.logs, rng)
+
+    session = db.SessionLocal()
+    oldest, newest = [row.message_id for row in (
+        session.query(MessageLog).order_by(MessageLog.id).first(),
+        session.query(MessageLog).order_by(MessageLog.id.desc()).first(),
+    )]
+    session.close()
+
+    results = []
+    hot_bytes = table_bytes(db, "message_logs")
+
+    start = time.perf_counter()
+    summary = kernel.archive_logs()
+    elapsed = time.perf_counter() - start
+
+    session = db.SessionLocal()
+    hot_rows = session.query(MessageLog).count()
+    session.close()
+
+    results.append({
+        "scenario": "archive",
+        "logs": args.logs,
+        "archived": summary["logs"],
+        "segments": summary["segments"],
+        "logs_per_s": round(summary["logs"] / elapsed),
+        "hot_rows_after": hot_rows,
+        "table_mb_before": round(hot_bytes / 2 ** 20, 1),
+        "segments_mb": round(summary["bytes"] / 2 ** 20, 2),
+    })
+
+    for scenario, fn in (
+        ("message_logs_hot", lambda i: db.get_logs_for_message(newest)),
+        ("message_logs_archived", lambda i: db.get_logs_for_message(oldest)),
+        ("list_logs_first_page", lambda i: db.get_list_logs(w=50, y=0)),
+        ("list_logs_deep_page", lambda i: db.get_list_logs(w=50, y=args.logs - 100)),
+    ):
+        results.append({"scenario": scenario, **measure(fn, args.iterations)})
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure log archiving and reads across the hot table and archive segments")
+    parser.add_argument("--logs", type=int, default=1000000)
+    parser.add_argument("--keep", type=int, default=10000)
+    parser.add_argument("--segment-size", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('log_archive', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
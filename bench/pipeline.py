@@ -0,0 +1,135 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, print_results, write_results
+from fake_ews import FakeExchangeServer, fake_account
+from generators import (
+    make_message_payload, make_mdx_template, make_signature, make_html_body, random_address
+)
+
+from datetime import datetime
+
+import argparse
+import random
+import uuid
+
+ACCOUNT_NAME = "bench"
+ACCOUNT_EMAIL = "bench@example.com"
+
+def prefill_database(db_handler, rows: int, rng: random.Random):
+    from app.core.models import Message, MessageLog
+
+    engine = db_handler.SessionLocal.kw["bind"]
+    body = make_html_body(rng)
+    now = datetime.now()
+    batch = 5000
+
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            messages, logs = [], []
+            for i in range(start, min(rows, start + batch)):
+                message_id = str(uuid.uuid4())
+                messages.append({
+                    "id": message_id,
+                    "hash_value": uuid.uuid4().hex + uuid.uuid4().hex,
+                    "account_name": ACCOUNT_NAME,
+                    "subject": f"Prefill #{i}",
+                    "to_recipients": [random_address(rng)],
+                    "cc_recipients": None,
+                    "attachments": [],
+                    "html_body": body,
+                    "use_signature": False,
+                    "created_at": now,
+                })
+                logs.append({"message_id": message_id, "details": "✅ Message stored for future dispatch", "timestamp": now})
+            conn.execute(Message.__table__.insert(), messages)
+            conn.execute(MessageLog.__table__.insert(), logs)
+
+def prepare_kernel(api, work_dir: str, db_size: int, server: FakeExchangeServer, rng: random.Random):
+    from app.config import config
+    from app.core.database_handler import DataBaseHandler
+
+    kernel = api.kernel
+    config.vars.url_app_database = database_url(work_dir, f"bench-{db_size}")
+
+    kernel.db_handler = DataBaseHandler()
+    kernel.set_initial_config_vars()
+    kernel.db_handler.update_config_variable("maxLogHistoryLength", str(max(10000, db_size * 4)))
+    prefill_database(kernel.db_handler, db_size, rng)
+
+    account = fake_account(server, ACCOUNT_EMAIL)
+    kernel.opened_accounts = {ACCOUNT_NAME: account}
+    kernel.db_handler.store_new_account(ACCOUNT_NAME, ACCOUNT_EMAIL, "benchmark")
+
+    return kernel
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from fastapi.testclient import TestClient
+    from app.markdown.format import render_mdx
+    from app.mail.signature import load_signature
+
+    results = []
+    signature_key = make_signature(f"{work_dir}/appdata", "benchsig", images=args.signature_images)
+    template, context = make_mdx_template(rows=50)
+
+    with FakeExchangeServer(latency=args.ews_latency) as server:
+        client = TestClient(api.app)
+
+        for db_size in args.db_sizes:
+            kernel = prepare_kernel(api, work_dir, db_size, server, rng)
+            server.reset()
+
+            def store(i):
+                payload = make_message_payload(rng, ACCOUNT_NAME, attachments=args.attachments)
+                response = client.post("/store-msg", json=payload)
+                assert response.status_code == 201, response.text[:500]
+
+            def jit_send(i):
+                payload = make_message_payload(rng, ACCOUNT_NAME, attachments=args.attachments)
+                response = client.post("/jit-send-msg", json=payload)
+                assert response.status_code == 201, response.text[:500]
+
+            def log(i):
+                kernel.db_handler.log_details(details=f"benchmark log {i}")
+
+            scenarios = {
+                "store_msg": store,
+                "jit_send_msg": jit_send,
+                "render_mdx": lambda i: render_mdx(template, context),
+                "load_signature": lambda i: load_signature(signature_key),
+                "log_details": log,
+            }
+
+            for name, fn in scenarios.items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                row = {"scenario": name, "db_size": db_size}
+                row.update(measure(fn, args.iterations))
+                results.append(row)
+
+            results.append({"scenario": "fake_ews_requests", "db_size": db_size, "requests": server.summary()})
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mail dispatch pipeline against a fake Exchange server")
+    parser.add_argument("--db-sizes", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--attachments", type=int, default=1)
+    parser.add_argument("--signature-images", type=int, default=2)
+    parser.add_argument("--ews-latency", type=float, default=0.0)
+    parser.add_argument("--scenarios", nargs="*")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('pipeline', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+from typing import *
+
+from common import bootstrap, summarize, print_results, write_results
+from fake_ews import FakeExchangeServer
+from fake_smtp import FakeSmtpServer
+from generators import make_message_payload
+from pipeline import prepare_kernel
+
+import argparse
+import random
+import threading
+import time
+
+ACCOUNT = "bench-campaign"
+
+def store_messages(kernel, count: int, rng: random.Random) -> List[str]:
+    from app.json.schemas import MessageData
+
+    return [
+        kernel.db_handler.store_new_message(MessageData.model_validate(
+            make_message_payload(rng, ACCOUNT, recipients=1, attachments=0, paragraphs=1)
+        )).id
+        for _ in range(count)
+    ]
+
+def measure_mode(kernel, mode: str, args, rng: random.Random) -> List[Dict[str, Any]]:
+    bulk_ids = store_messages(kernel, args.bulk, rng)
+    transactional_ids = store_messages(kernel, args.transactional, rng)
+    kinds = {**{message_id: "bulk" for message_id in bulk_ids}, **{message_id: "transactional" for message_id in transactional_ids}}
+
+    waits: Dict[str, List[float]] = {"bulk": [], "transactional": []}
+    finished = threading.Semaphore(0)
+    run_dispatch_item = type(kernel).run_dispatch_item
+
+    def record(item):
+        waits[kinds[item.message_id]].append(time.perf_counter() - item.enqueued_at)
+        run_dispatch_item(kernel, item)
+        finished.release()
+
+    kernel.run_dispatch_item = record
+    kernel.start_dispatch_workers()
+
+    def transactional():
+        time.sleep(args.transactional_delay)
+        for message_id in transactional_ids:
+            kernel.schedule_send(message_id, "high" if mode == "lanes" else "normal")
+            time.sleep(args.transactional_interval)
+
+    start = time.perf_counter()
+    sender = threading.Thread(target=transactional)
+    sender.start()
+    for message_id in bulk_ids:
+        kernel.schedule_send(message_id, "bulk" if mode == "lanes" else "normal")
+    sender.join()
+
+    for _ in kinds:
+        finished.acquire()
+    elapsed = time.perf_counter() - start
+
+    kernel.stop_dispatch_workers()
+    del kernel.run_dispatch_item
+
+    results = []
+    for kind, samples in waits.items():
+        stats = summarize(samples)
+        results.append({
+            "scenario": f"{mode}_{kind}",
+            "msgs_per_s": round(len(kinds) / elapsed, 1),
+            "iterations": stats["iterations"],
+            "p50_ms": round(stats["p50_ms"], 1),
+            "p99_ms": round(stats["p99_ms"], 1),
+            "max_ms": round(stats["max_ms"], 1),
+        })
+    return results
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+
+    results = []
+    with FakeExchangeServer() as ews_server, FakeSmtpServer(latency=args.latency) as smtp_server:
+        kernel = prepare_kernel(api, work_dir, 0, ews_server, rng)
+        kernel.db_handler.update_config_variable("dispatchWorkers", str(args.workers))
+        kernel.db_handler.update_config_variable("accountSendConcurrency", str(args.account_concurrency))
+        kernel.db_handler.update_config_variable("smtpPoolSize", str(args.account_concurrency))
+        kernel.db_handler.store_new_account(
+            ACCOUNT, f"{ACCOUNT}@example.com", "benchmark", "smtp",
+            {"host": smtp_server.host, "port": smtp_server.port, "security": "none"}
+        )
+
+        for mode in ("fifo", "lanes"):
+            results.extend(measure_mode(kernel, mode, args, rng))
+
+        kernel.close_transports()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure queue wait per priority lane while a bulk campaign is dispatched")
+    parser.add_argument("--bulk", type=int, default=1000)
+    parser.add_argument("--transactional", type=int, default=50)
+    parser.add_argument("--transactional-interval", type=float, default=0.2)
+    parser.add_argument("--transactional-delay", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--account-concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('priority', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
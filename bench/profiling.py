@@ -0,0 +1,73 @@
+from typing import *
+
+from common import bootstrap, print_results, write_results
+from fake_ews import FakeExchangeServer
+from generators import make_message_payload
+from pipeline import prepare_kernel, ACCOUNT_NAME
+
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import random
+import time
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.json.schemas import MessageData
+    from app.core.profiling import sampling_profiler
+
+    results = []
+
+    with FakeExchangeServer(latency=args.ews_latency) as server:
+        kernel = prepare_kernel(api, work_dir, 0, server, rng)
+        kernel.db_handler.update_config_variable("profilerMinInterval", "0.001")
+
+        def send(i: int):
+            payload = make_message_payload(random.Random(i), ACCOUNT_NAME, recipients=2, attachments=1)
+            payload["subject"] = f"profiled #{i}"
+            message = kernel.db_handler.store_new_message(MessageData.model_validate(payload))
+            kernel.send_message(message.id)
+
+        counter = iter(range(10 ** 9))
+        for interval in [None] + args.intervals:
+            if interval is not None:
+                kernel.start_profiler(interval, args.seconds * 2)
+
+            sends = 0
+            deadline = time.perf_counter() + args.seconds
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                while time.perf_counter() < deadline:
+                    list(pool.map(send, [next(counter) for _ in range(args.threads)]))
+                    sends += args.threads
+
+            row = {"scenario": "profiled" if interval else "baseline", "interval_s": interval, "threads": args.threads,
+                   "sends_per_second": round(sends / args.seconds, 1)}
+            if interval is not None:
+                status = sampling_profiler.status()
+                collapsed = sampling_profiler.stop()
+                row.update(samples=status["samples"], stacks=status["stacks"],
+                           sampler_overhead=status["overhead"], collapsed_kb=round(len(collapsed) / 1024, 1))
+            results.append(row)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure send throughput with the sampling profiler off and on")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.01, 0.005, 0.001])
+    parser.add_argument("--ews-latency", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('profiling', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
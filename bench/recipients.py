@@ -0,0 +1,93 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, print_results, write_results
+from generators import random_words
+
+from datetime import datetime, timedelta
+
+import argparse
+import random
+import time
+import uuid
+
+def prefill_messages(engine, rows: int, addresses: List[str], rng: random.Random):
+    from app.core.models import Message
+
+    now = datetime.now()
+    batch = 10000
+
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(Message.__table__.insert(), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "hash_value": uuid.uuid4().hex + uuid.uuid4().hex,
+                    "account_name": "bench",
+                    "subject": f"{random_words(rng, 3).title()} #{i}",
+                    "to_recipients": rng.sample(addresses, rng.randint(1, 3)),
+                    "cc_recipients": rng.sample(addresses, rng.randint(0, 2)) or None,
+                    "attachments": [],
+                    "html_body": "<p>Prefill</p>",
+                    "use_signature": False,
+                    "created_at": now - timedelta(seconds=rows - i),
+                }
+                for i in range(start, min(rows, start + batch))
+            ])
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    from app.config import config
+    from app.core.database_handler import DataBaseHandler
+    from app.core.migrations import backfill_recipients
+
+    config.vars.url_app_database = database_url(work_dir, f"recipients-{args.messages}")
+    db_handler = DataBaseHandler()
+    engine = db_handler.SessionLocal.kw["bind"]
+
+    domains = [f"company{i}.example" for i in range(args.domains)]
+    addresses = [f"user{i}@{domains[i % len(domains)]}" for i in range(args.addresses)]
+
+    start = time.perf_counter()
+    prefill_messages(engine, args.messages, addresses, rng)
+    results = [{"scenario": "prefill", "messages": args.messages, "seconds": round(time.perf_counter() - start, 2)}]
+
+    start = time.perf_counter()
+    backfill_recipients(engine)
+    results.append({"scenario": "backfill", "messages": args.messages, "seconds": round(time.perf_counter() - start, 2)})
+
+    searches = {
+        "recipient": lambda i: db_handler.search_messages(recipient=rng.choice(addresses)),
+        "domain": lambda i: db_handler.search_messages(domain=rng.choice(domains)),
+        "subject_prefix_common": lambda i: db_handler.search_messages(subject_prefix=random_words(rng, 1)[:4]),
+        "subject_prefix_rare": lambda i: db_handler.search_messages(subject_prefix=random_words(rng, 3)),
+        "recipient_and_prefix": lambda i: db_handler.search_messages(
+            recipient=rng.choice(addresses), subject_prefix=random_words(rng, 1)[:3]
+        ),
+    }
+
+    for name, fn in searches.items():
+        row = {"scenario": f"search_{name}", "messages": args.messages}
+        row.update(measure(fn, args.iterations))
+        results.append(row)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the recipient backfill and message search")
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--addresses", type=int, default=50000)
+    parser.add_argument("--domains", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('recipients', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, print_results, write_results
+from generators import random_address
+
+import argparse
+import random
+
+ENDPOINTS = ("/all-accounts", "/all-signatures")
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.core.database_handler import DataBaseHandler
+    from app.core.responses import response_cache
+    from app.config import config
+    from fastapi.testclient import TestClient
+
+    config.vars.url_app_database = database_url(work_dir, "responses")
+    api.kernel.db_handler = DataBaseHandler()
+    api.kernel.set_initial_config_vars()
+    for i in range(args.accounts):
+        api.kernel.db_handler.store_new_account(f"account-{i}", random_address(rng), "benchmark")
+
+    client = TestClient(api.app)
+    results = []
+
+    for endpoint in ENDPOINTS:
+        for scenario, ttl, revalidate in (("uncached", 0, False), ("cached", 60, False), ("not_modified", 60, True)):
+            response_cache.ttl = ttl
+            response_cache.invalidate()
+
+            headers = {}
+            if revalidate:
+                headers["If-None-Match"] = client.get(endpoint).headers["etag"]
+
+            def call(_):
+                response = client.get(endpoint, headers=headers)
+                assert response.status_code == (304 if revalidate else 200), response.status_code
+
+            stats = measure(call, args.iterations)
+            results.append({"scenario": scenario, "endpoint": endpoint, "accounts": args.accounts, **stats})
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure polling latency of the read-only endpoints with and without the response cache")
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('responses', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from typing import *
+
+from common import bootstrap, database_url, measure, summarize, print_results, write_results
+from generators import make_campaign_body, random_address, random_words, WORDS
+
+from sqlalchemy import text
+
+import argparse
+import random
+import time
+
+SEARCH_TRIGGERS = (
+    "messages_fts_insert", "messages_fts_delete", "messages_fts_update",
+    "logs_fts_insert", "logs_fts_delete", "logs_fts_update",
+)
+
+def make_payloads(rng: random.Random, count: int, table_rows: int):
+    from app.json.schemas import MessageData
+
+    return [
+        MessageData(
+            account_name="bench",
+            subject=f"{random_words(rng, 3).title()} pedido {rng.randrange(10 ** 6)}",
+            to_recipients=[random_address(rng)],
+            html_body=make_campaign_body(rng, i % 5, table_rows)
+        )
+        for i in range(count)
+    ]
+
+def open_handler(work_dir: str, name: str, indexed: bool):
+    from app.config import config
+    from app.core.database_handler import DataBaseHandler
+
+    config.vars.url_app_database = database_url(work_dir, name)
+    db_handler = DataBaseHandler()
+
+    if not indexed:
+        with db_handler.SessionLocal.kw["bind"].begin() as conn:
+            for trigger in SEARCH_TRIGGERS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+    return db_handler
+
+def database_pages(db_handler, table: str) -> int:
+    with db_handler.SessionLocal.kw["bind"].connect() as conn:
+        return conn.execute(text(
+            "SELECT COUNT(*) FROM dbstat WHERE name LIKE :table"
+        ), {"table": f"{table}%"}).scalar()
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    payloads = make_payloads(rng, args.messages + args.iterations + 3, args.table_rows)
+    handlers = {
+        "indexed": open_handler(work_dir, "search-indexed", True),
+        "plain": open_handler(work_dir, "search-plain", False),
+    }
+
+    for db_handler in handlers.values():
+        for payload in payloads[:args.messages]:
+            db_handler.store_new_message(payload)
+
+    samples = {name: [] for name in handlers}
+    for payload in payloads[args.messages:]:
+        for name, db_handler in handlers.items():
+            start = time.perf_counter()
+            db_handler.store_new_message(payload)
+            samples[name].append(time.perf_counter() - start)
+
+    results = []
+    for name in handlers:
+        row = {"scenario": "store_new_message", "index": name}
+        row.update(summarize(samples[name]))
+        results.append(row)
+
+    overhead = results[0]["mean_ms"] / results[1]["mean_ms"] - 1
+    results.append({"scenario": "store_overhead", "percent": round(overhead * 100, 1)})
+
+    db_handler = handlers["indexed"]
+
+    pending = db_handler.count_search_queue()
+    start = time.perf_counter()
+    while db_handler.index_pending_messages():
+        pass
+    elapsed = time.perf_counter() - start
+    results.append({
+        "scenario": "index_pending", "messages": pending,
+        "seconds": round(elapsed, 2), "per_second": round(pending / elapsed)
+    })
+
+    try:
+        results.append({"scenario": "index_pages", "fts_pages": database_pages(db_handler, "messages_fts")})
+    except Exception:
+        pass
+
+    queries = {
+        "common_term": lambda i: db_handler.search_full_text(rng.choice(WORDS)),
+        "two_terms": lambda i: db_handler.search_full_text(f"{rng.choice(WORDS)} {rng.choice(WORDS)}"),
+        "order_number": lambda i: db_handler.search_full_text(f"pedido {rng.randrange(10 ** 6)}"),
+        "prefix": lambda i: db_handler.search_full_text(rng.choice(WORDS)[:3] + "*"),
+        "page_5": lambda i: db_handler.search_full_text(rng.choice(WORDS), limit=20, offset=80),
+    }
+
+    for name, fn in queries.items():
+        row = {"scenario": f"search_{name}", "messages": args.messages}
+        row.update(measure(fn, args.iterations))
+        results.append(row)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure full-text indexing overhead and search latency")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--table-rows", type=int, default=40)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('search', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
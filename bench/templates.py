@@ -0,0 +1,124 @@
+from typing import *
+
+from common import bootstrap, database_url, print_results, write_results
+from fake_ews import FakeExchangeServer, fake_account
+from generators import make_html_body, random_address
+
+from sqlalchemy import text
+
+import argparse
+import random
+import time
+
+ACCOUNT_NAME = "bench"
+
+def make_template(rng: random.Random, paragraphs: int) -> str:
+    body = make_html_body(rng, paragraphs).replace("{", "{{").replace("}", "}}")
+    return f"<p>Hola {{name}}, tu pedido {{order}} está en camino.</p>{body}<p>Importe: {{amount}} {{currency}}</p>"
+
+def make_recipients(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "address": random_address(rng),
+            "context": {"name": f"Cliente {i}", "order": rng.randrange(10 ** 8), "amount": rng.randrange(10 ** 5) / 100}
+        }
+        for i in range(count)
+    ]
+
+def database_bytes(db_handler) -> int:
+    with db_handler.SessionLocal.kw["bind"].connect() as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        pages = conn.execute(text("PRAGMA page_count")).scalar()
+        free = conn.execute(text("PRAGMA freelist_count")).scalar()
+        return (pages - free) * conn.execute(text("PRAGMA page_size")).scalar()
+
+def open_kernel(api, work_dir: str, name: str, server: FakeExchangeServer, concurrency: int):
+    from app.config import config
+    from app.core.database_handler import DataBaseHandler
+
+    kernel = api.kernel
+    config.vars.url_app_database = database_url(work_dir, name)
+    kernel.db_handler = DataBaseHandler()
+    kernel.set_initial_config_vars()
+    kernel.db_handler.update_config_variable("accountSendConcurrency", str(concurrency))
+    kernel.account_slots.clear()
+    kernel.opened_accounts = {ACCOUNT_NAME: fake_account(server, "bench@example.com")}
+    return kernel
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+    from app.json.schemas import MessageData, TemplateMessageData
+    from app.markdown.format import render_mdx
+
+    template = make_template(rng, args.paragraphs)
+    recipients = make_recipients(rng, args.recipients)
+    shared = {"currency": "EUR"}
+    results = []
+
+    with FakeExchangeServer(latency=args.ews_latency) as server:
+        kernel = open_kernel(api, work_dir, "templates-rendered", server, args.concurrency)
+        empty = database_bytes(kernel.db_handler)
+
+        start = time.perf_counter()
+        for recipient in recipients:
+            context = {**shared, **recipient["context"]}
+            kernel.db_handler.store_new_message(MessageData(
+                account_name=ACCOUNT_NAME, subject=render_mdx("Tu pedido {order}", context),
+                to_recipients=[recipient["address"]], html_body=render_mdx(template, context)
+            ))
+        results.append({
+            "scenario": "store_rendered", "recipients": args.recipients,
+            "seconds": round(time.perf_counter() - start, 2),
+            "bytes": database_bytes(kernel.db_handler) - empty
+        })
+
+        kernel = open_kernel(api, work_dir, "templates-lazy", server, args.concurrency)
+        empty = database_bytes(kernel.db_handler)
+
+        start = time.perf_counter()
+        message = kernel.store_template_message(TemplateMessageData(
+            account_name=ACCOUNT_NAME, subject="Tu pedido {order}", html_body=template,
+            recipients=recipients, context=shared
+        ))
+        results.append({
+            "scenario": "store_template", "recipients": args.recipients,
+            "seconds": round(time.perf_counter() - start, 2),
+            "bytes": database_bytes(kernel.db_handler) - empty
+        })
+        results[-1]["bytes_ratio"] = round(results[0]["bytes"] / results[-1]["bytes"], 1)
+
+        start = time.perf_counter()
+        kernel.send_message(message.id)
+        elapsed = time.perf_counter() - start
+
+        chunks = kernel.db_handler.get_message_chunks(message.id)
+        assert all(chunk.status.value == "sent" for chunk in chunks), "template dispatch did not complete"
+
+        results.append({
+            "scenario": "dispatch_template", "recipients": len(chunks), "concurrency": args.concurrency,
+            "seconds": round(elapsed, 2), "per_second": round(len(chunks) / elapsed),
+            "requests": server.summary()
+        })
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pre-rendered personalized messages with lazily rendered templates")
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--ews-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('templates', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from typing import *
+
+from common import bootstrap, print_results, write_results
+from fake_ews import FakeExchangeServer
+from fake_smtp import FakeSmtpServer
+from generators import make_message_payload
+from pipeline import prepare_kernel, ACCOUNT_NAME
+
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import os
+import random
+import time
+
+def measure_transport(kernel, account_name: str, args, rng: random.Random) -> Dict[str, Any]:
+    from app.json.schemas import MessageData
+
+    message_ids = []
+    for _ in range(args.messages):
+        payload = make_message_payload(rng, account_name, recipients=1, attachments=0)
+        message_ids.append(kernel.db_handler.store_new_message(MessageData.model_validate(payload)).id)
+
+    kernel.send_message(message_ids.pop())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(kernel.send_message, message_ids))
+    elapsed = time.perf_counter() - start
+
+    return {"messages": len(message_ids), "elapsed_s": round(elapsed, 3), "msgs_per_s": round(len(message_ids) / elapsed, 1)}
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    rng = random.Random(args.seed)
+
+    import api
+
+    results = []
+    with FakeExchangeServer(latency=args.latency) as ews_server, \
+         FakeSmtpServer(latency=args.latency, connect_latency=args.connect_latency) as smtp_server:
+        kernel = prepare_kernel(api, work_dir, 0, ews_server, rng)
+        kernel.db_handler.update_config_variable("smtpPoolSize", str(args.pool_size))
+
+        accounts = [
+            ("ews", ACCOUNT_NAME, None, None),
+            ("smtp", "bench-smtp", "smtp", {"host": smtp_server.host, "port": smtp_server.port, "security": "none"}),
+            ("sink_null", "bench-null", "sink", {}),
+            ("sink_file", "bench-file", "sink", {"path": os.path.join(work_dir, "outbox")}),
+        ]
+
+        for scenario, account_name, transport, options in accounts:
+            if transport is not None:
+                kernel.db_handler.store_new_account(account_name, f"{account_name}@example.com", "benchmark", transport, options)
+
+            smtp_server.reset()
+            result = measure_transport(kernel, account_name, args, rng)
+            results.append({
+                "scenario": scenario,
+                "workers": args.workers,
+                **result,
+                "smtp_connections": smtp_server.connections if transport == "smtp" else None,
+                "smtp_messages": smtp_server.messages if transport == "smtp" else None,
+            })
+
+        kernel.close_transports()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare send throughput across the EWS, SMTP and sink transports")
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('transports', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+from typing import *
+
+from common import APP_ROOT, bootstrap, print_results, write_results
+from cold_start import child_env
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+SERVER = """
+import sys, uvicorn, api
+api.kernel.opened_accounts = {"bench": object()}
+api.kernel.port = int(sys.argv[1])
+uvicorn.run(api.app, host="127.0.0.1", port=api.kernel.port, log_level="warning")
+"""
+
+BOUNDARY = "maildispatch-bench-boundary"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def peak_rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def start_server(work_dir: str) -> Tuple[subprocess.Popen, int]:
+    status_file = os.path.join(work_dir, ".local", "share", os.environ["APPDATA_PATH"])
+    if os.path.exists(status_file):
+        os.remove(status_file)
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER, str(port)], cwd=APP_ROOT, env=child_env(work_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                return process, port
+        except OSError:
+            time.sleep(0.05)
+
+    process.terminate()
+    raise TimeoutError("Service did not become healthy in time")
+
+def post(port: int, path: str, body: Union[bytes, Iterable[bytes]], content_type: str) -> Tuple[int, float]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    start = time.perf_counter()
+    if isinstance(body, bytes):
+        connection.request("POST", path, body=body, headers={"Content-Type": content_type})
+    else:
+        connection.request("POST", path, body=body, headers={"Content-Type": content_type}, encode_chunked=True)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status, time.perf_counter() - start
+
+def set_config(port: int, key: str, value: str):
+    status, _ = post(port, "/upd-confvar", json.dumps({"key": key, "value": value}).encode(), "application/json")
+    assert status == 200, status
+
+def message_json(subject: str) -> Dict[str, Any]:
+    return {"account_name": "bench", "subject": subject, "to_recipients": ["to@example.com"], "html_body": "<p>Report attached</p>"}
+
+def json_body(path: str, subject: str) -> bytes:
+    with open(path, "rb") as f:
+        content = base64.b64encode(f.read()).decode("ascii")
+
+    payload = message_json(subject)
+    payload["attachments"] = [{"filename": "report.bin", "content_bytes": content}]
+    return json.dumps(payload).encode("utf-8")
+
+def multipart_body(path: str, subject: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    yield (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"message\"\r\n"
+        f"Content-Type: application/json\r\n\r\n{json.dumps(message_json(subject))}\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"attachments\"; filename=\"report.bin\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8")
+
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    yield f"\r\n--{BOUNDARY}--\r\n".encode("utf-8")
+
+def measure_mode(work_dir: str, mode: str, path: str, size: int) -> Dict[str, Any]:
+    process, port = start_server(work_dir)
+    try:
+        set_config(port, "maxRequestBytes", str(size * 2))
+        set_config(port, "maxAttachmentBytes", str(size * 2))
+
+        # Warm up the code path so only the large request moves the peak.
+        small = os.path.join(work_dir, "small.bin")
+        with open(small, "wb") as f:
+            f.write(os.urandom(1024))
+        if mode == "json":
+            post(port, "/store-msg", json_body(small, "warmup"), "application/json")
+        else:
+            post(port, "/upload-msg", multipart_body(small, "warmup"), f"multipart/form-data; boundary={BOUNDARY}")
+
+        baseline = peak_rss(process.pid)
+        if mode == "json":
+            body = json_body(path, f"large {mode}")
+            status, elapsed = post(port, "/store-msg", body, "application/json")
+            del body
+        else:
+            status, elapsed = post(
+                port, "/upload-msg", multipart_body(path, f"large {mode}"), f"multipart/form-data; boundary={BOUNDARY}"
+            )
+        peak = peak_rss(process.pid)
+
+        return {
+            "scenario": f"store_{mode}", "attachment_mb": round(size / 2 ** 20), "status": status,
+            "seconds": round(elapsed, 2), "rss_growth_mb": round((peak - baseline) / 2 ** 20, 1),
+            "peak_rss_mb": round(peak / 2 ** 20, 1)
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+def measure_rejection(work_dir: str, size: int) -> Dict[str, Any]:
+    process, port = start_server(work_dir)
+    try:
+        set_config(port, "maxRequestBytes", str(size // 4))
+
+        # Only the headers are sent: the limit must be enforced before the body arrives.
+        start = time.perf_counter()
+        with socket.create_connection(("127.0.0.1", port), timeout=30) as sock:
+            sock.sendall(
+                f"POST /store-msg HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {size}\r\n\r\n".encode("latin-1")
+            )
+            status = int(sock.recv(1024).split(b" ", 2)[1])
+        elapsed = time.perf_counter() - start
+
+        return {"scenario": "reject_oversized_json", "body_mb": round(size / 2 ** 20), "status": status, "seconds": round(elapsed, 4)}
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(args) -> List[Dict[str, Any]]:
+    work_dir = bootstrap(args.work_dir)
+    size = args.attachment_mb * 2 ** 20
+
+    path = os.path.join(work_dir, "attachment.bin")
+    with open(path, "wb") as f:
+        for _ in range(args.attachment_mb):
+            f.write(os.urandom(2 ** 20))
+
+    results = [measure_mode(work_dir, mode, path, size) for mode in ("json", "multipart")]
+    results.append(measure_rejection(work_dir, size))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare server memory of inline base64 stores and streamed multipart uploads")
+    parser.add_argument("--attachment-mb", type=int, default=25)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    print(f"Results written to {write_results('uploads', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
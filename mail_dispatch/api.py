@@ -1,30 +1,105 @@
-from app.core.models import *
-from app.core.schemas import *
-from app.json.schemas import *
-
-from fastapi import FastAPI, BackgroundTasks
-from fastapi.responses import JSONResponse
+from app.startup import startup_profiler
+
+startup_profiler.start_if_requested()
+
+from typing import Optional
+from collections import Counter
+
+from app.core.schemas import (
+    RegisteredAccountSchema, MessageSchema, MessageSummarySchema, MessageChunkSchema, MessageLogSchema
+)
+from app.core.enums import MessagePriority
+from app.json.schemas import (
+    PostSendMessageJSON, MessageData, TemplateMessageData, PostStoreMessagesJSON, PostSendMessagesJSON, PutConfigVariableJSON, GetAccountJSON, GetMessageJSON,
+    GetListLogsJSON, GetMessagesStatusJSON, SearchMessagesJSON, FullTextSearchJSON,
+    PostRequeueMessagesJSON, PostPutNewAccountJSON, PostPutAccountSignatureJSON, PostFormatMdxJSON,
+    PostTrainCompressionDictJSON, PostStartProfilerJSON, PostStartTracemallocJSON, GetTracemallocJSON
+)
+
+from fastapi import FastAPI, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 
-from app.core.kernel import MailDispatchKernel
+from app.core.kernel import MailDispatchKernel, INGEST_PATHS, REQUEST_LIMIT_KEYS
+from app.core.metrics import metrics
+from app.core.limits import BodySizeLimitMiddleware, AdmissionMiddleware, overloaded_content
+from app.core.admission import admission, Overloaded
+from app.core.responses import response_cache
+from app.core.profiling import sampling_profiler, memory_tracker
+from app.core.backup import backup_manager
+from app.core.events import event_bus, sse_stream
+from app.core.uploads import PayloadTooLarge
 from app.register import ensure_1_process_only, update_api_status_file
 
-import uvicorn
+startup_profiler.mark("imports")
 
 kernel = MailDispatchKernel()
 
+startup_profiler.mark("kernel")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI): 
     host, port = kernel.get_addr()
 
     ensure_1_process_only()
     update_api_status_file(host, port, True)
+    kernel.start_retry_worker()
+    kernel.start_purge_worker()
+    kernel.start_archive_worker()
+    kernel.start_backup_worker()
+    kernel.start_index_worker()
+    kernel.start_keepalive_worker()
+    kernel.start_dispatch_workers()
+    startup_profiler.report()
     
     yield
     
+    kernel.stop_dispatch_workers()
+    kernel.stop_keepalive_worker()
+    kernel.stop_index_worker()
+    kernel.stop_backup_worker()
+    kernel.stop_archive_worker()
+    kernel.stop_purge_worker()
+    kernel.stop_retry_worker()
+    kernel.close_transports()
     update_api_status_file(host, port, False)
 
 app = FastAPI(title="MailDispatch API", version="1.0", lifespan=lifespan)
+app.add_middleware(BodySizeLimitMiddleware, limit_for=kernel.request_size_limit)
+app.add_middleware(AdmissionMiddleware, controller=admission, paths=INGEST_PATHS)
+
+
+@app.exception_handler(Overloaded)
+async def reject_overloaded(request: Request, error: Overloaded):
+    return JSONResponse(
+        content=overloaded_content(error),
+        status_code=429,
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def receive_upload(request: Request):
+    try:
+        data = await kernel.receive_upload(request.stream(), request.headers.get("content-type"))
+    except PayloadTooLarge as error:
+        return None, JSONResponse(
+            content={"message": str(error), "data": {"limit": error.limit}},
+            status_code=413
+        )
+    except ValueError as error:
+        return None, JSONResponse(
+            content={"message": str(error), "data": None},
+            status_code=422
+        )
+
+    message = await run_in_threadpool(kernel.store_upload, data)
+    if message is None:
+        return None, JSONResponse(
+            content={"message": "Message could not be stored, see logs", "data": None},
+            status_code=500
+        )
+
+    return message, None
 
 @app.get("/")
 def check_health():
@@ -34,11 +109,118 @@ def check_health():
     )
 
 
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(
+        content=metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.post("/profiler/start")
+def start_profiler(data: Optional[PostStartProfilerJSON] = None):
+    data = data or PostStartProfilerJSON()
+    settings = kernel.start_profiler(data.interval, data.duration)
+
+    if settings is None:
+        return JSONResponse(
+            content={"message": "Profiler is already running", "data": sampling_profiler.status()},
+            status_code=409
+        )
+
+    return JSONResponse(
+        content={"message": "Profiler started", "data": settings},
+        status_code=200
+    )
+
+
+@app.post("/profiler/stop")
+def stop_profiler():
+    return PlainTextResponse(content=sampling_profiler.stop())
+
+
+@app.get("/profiler/status")
+def get_profiler_status():
+    return JSONResponse(
+        content={"message": "Profiler status retrieved", "data": sampling_profiler.status()},
+        status_code=200
+    )
+
+
+@app.get("/profiler/collapsed")
+def get_profiler_stacks():
+    return PlainTextResponse(content=sampling_profiler.collapsed())
+
+
+@app.post("/tracemalloc/start")
+def start_tracemalloc(data: Optional[PostStartTracemallocJSON] = None):
+    data = data or PostStartTracemallocJSON()
+
+    if not memory_tracker.start(data.frames):
+        return JSONResponse(
+            content={"message": "tracemalloc is already running", "data": memory_tracker.status()},
+            status_code=409
+        )
+
+    return JSONResponse(
+        content={"message": "tracemalloc started", "data": memory_tracker.status()},
+        status_code=200
+    )
+
+
+@app.post("/tracemalloc/stop")
+def stop_tracemalloc():
+    memory_tracker.stop()
+
+    return JSONResponse(
+        content={"message": "tracemalloc stopped", "data": memory_tracker.status()},
+        status_code=200
+    )
+
+
+@app.post("/tracemalloc/snapshot")
+def take_tracemalloc_snapshot(data: Optional[GetTracemallocJSON] = None):
+    data = data or GetTracemallocJSON()
+
+    try:
+        memory_tracker.snapshot()
+        top = memory_tracker.top(data.limit, data.group_by)
+    except RuntimeError as error:
+        return JSONResponse(
+            content={"message": str(error), "data": None},
+            status_code=409
+        )
+
+    return JSONResponse(
+        content={"message": "Snapshot taken", "data": {"status": memory_tracker.status(), "caches": kernel.memory_inventory(), "top": top}},
+        status_code=200
+    )
+
+
+@app.get("/tracemalloc/diff")
+def get_tracemalloc_diff(data: Optional[GetTracemallocJSON] = None):
+    data = data or GetTracemallocJSON()
+
+    try:
+        diff = memory_tracker.diff(data.limit, data.group_by, data.against)
+    except RuntimeError as error:
+        return JSONResponse(
+            content={"message": str(error), "data": None},
+            status_code=409
+        )
+
+    return JSONResponse(
+        content={"message": f"Diff against the {data.against} snapshot", "data": {"caches": kernel.memory_inventory(), "diff": diff}},
+        status_code=200
+    )
+
+
 @app.post("/jit-send-msg")
-def send_message(data: MessageData, background_tasks: BackgroundTasks):
+def send_message(data: MessageData):
+    kernel.admit(data.account_name)
     message = kernel.store_message(data)
 
-    background_tasks.add_task(kernel.send_message, message.id)
+    kernel.schedule_send(message.id, data.priority, default_priority=MessagePriority.HIGH)
 
     return JSONResponse(
         content={"message": "Message stored and sent", "data": {"message_id": message.id}},
@@ -47,8 +229,8 @@ def send_message(data: MessageData, background_tasks: BackgroundTasks):
 
 
 @app.post("/send-msg")
-def send_message(data: MessageIdJSON, background_tasks: BackgroundTasks):
-    background_tasks.add_task(kernel.send_message, data.message_id)
+def send_message(data: PostSendMessageJSON):
+    kernel.schedule_send(data.message_id, data.priority, admit=True)
 
     return JSONResponse(
         content={"message": "Message sent", "data": {"message_id": data.message_id}},
@@ -58,6 +240,7 @@ def send_message(data: MessageIdJSON, background_tasks: BackgroundTasks):
 
 @app.post("/store-msg")
 def send_message(data: MessageData):
+    kernel.admit(data.account_name)
     message = kernel.store_message(data)
 
     return JSONResponse(
@@ -66,44 +249,120 @@ def send_message(data: MessageData):
     )
 
 
-@app.get("/all-accounts")
-def get_all_accounts():
-    data = kernel.db_handler.get_list_registered_accounts()
-    schemas = [RegisteredAccountSchema.model_validate(acc).model_dump() for acc in data]
+@app.post("/store-msgs")
+def store_messages(data: PostStoreMessagesJSON):
+    for account_name, count in Counter(payload.account_name for payload in data.messages).items():
+        kernel.admit(account_name, count)
+
+    message_ids = []
+    for payload in data.messages:
+        message = kernel.store_message(payload)
+        message_ids.append(message.id if message is not None else None)
 
+    stored = sum(message_id is not None for message_id in message_ids)
     return JSONResponse(
-        content={"message": "All accounts retrieved", "data": schemas},
-        status_code=200
+        content={"message": f"{stored} of {len(message_ids)} message(s) stored", "data": {"message_ids": message_ids}},
+        status_code=201 if stored == len(message_ids) else 207
     )
 
 
-@app.get("/account")
-def get_1_account(data: GetAccountJSON):
-    acc = kernel.db_handler.get_registered_account(data.account_name)
+@app.post("/send-msgs")
+def send_messages(data: PostSendMessagesJSON):
+    routes = kernel.db_handler.get_message_routes(data.message_ids)
+    message_ids = [message_id for message_id in data.message_ids if message_id in routes]
+    unknown_ids = [message_id for message_id in data.message_ids if message_id not in routes]
+
+    accounts = Counter(routes[message_id][0] for message_id in message_ids)
+    for account_name, count in accounts.items():
+        kernel.admit(account_name, count)
+
+    for message_id in message_ids:
+        kernel.schedule_send(message_id, data.priority, route=routes[message_id])
+
+    return JSONResponse(
+        content={"message": f"{len(message_ids)} message(s) sent", "data": {"message_ids": message_ids, "unknown_ids": unknown_ids}},
+        status_code=200
+    )
+
 
-    if not acc:
+@app.post("/store-template-msg")
+def store_template_message(data: TemplateMessageData):
+    kernel.admit(data.account_name)
+    try:
+        message = kernel.store_template_message(data)
+    except ValueError as error:
         return JSONResponse(
-            content={"message": "Account not found", "data": None},
-            status_code=404
+            content={"message": str(error), "data": None},
+            status_code=422
         )
 
-    schema = RegisteredAccountSchema.model_validate(acc).model_dump()
     return JSONResponse(
-        content={"message": f"Account '{data.account_name}' retrieved", "data": schema},
-        status_code=200
+        content={"message": "Template message stored successfully", "data": {"message_id": message.id, "recipients": len(data.recipients)}},
+        status_code=201
     )
 
 
-@app.get("/all-signatures")
-def get_all_accounts():
-    data = kernel.db_handler.get_list_signatures()
+@app.post("/upload-msg")
+async def upload_message(request: Request):
+    message, error_response = await receive_upload(request)
+    if error_response is not None:
+        return error_response
 
     return JSONResponse(
-        content={"message": "All signatures retrieved", "data": {"signatures": data}},
-        status_code=200
+        content={"message": "Message stored successfully", "data": {"message_id": message.id}},
+        status_code=201
+    )
+
+
+@app.post("/jit-upload-msg")
+async def upload_and_send_message(request: Request):
+    message, error_response = await receive_upload(request)
+    if error_response is not None:
+        return error_response
+
+    await run_in_threadpool(kernel.schedule_send, message.id, default_priority=MessagePriority.HIGH)
+
+    return JSONResponse(
+        content={"message": "Message stored and sent", "data": {"message_id": message.id}},
+        status_code=201
     )
 
 
+@app.get("/all-accounts")
+def get_all_accounts(if_none_match: Optional[str] = Header(None)):
+    def build():
+        data = kernel.db_handler.get_list_registered_accounts()
+        schemas = [RegisteredAccountSchema.model_validate(acc).model_dump() for acc in data]
+
+        return {"message": "All accounts retrieved", "data": schemas}, 200
+
+    return response_cache.respond(("all-accounts",), build, if_none_match)
+
+
+@app.get("/account")
+def get_1_account(data: GetAccountJSON, if_none_match: Optional[str] = Header(None)):
+    def build():
+        acc = kernel.db_handler.get_registered_account(data.account_name)
+
+        if not acc:
+            return {"message": "Account not found", "data": None}, 404
+
+        schema = RegisteredAccountSchema.model_validate(acc).model_dump()
+        return {"message": f"Account '{data.account_name}' retrieved", "data": schema}, 200
+
+    return response_cache.respond(("account", data.account_name), build, if_none_match)
+
+
+@app.get("/all-signatures")
+def get_all_signatures(if_none_match: Optional[str] = Header(None)):
+    def build():
+        data = kernel.db_handler.get_list_signatures()
+
+        return {"message": "All signatures retrieved", "data": {"signatures": data}}, 200
+
+    return response_cache.respond(("all-signatures",), build, if_none_match)
+
+
 
 @app.get("/all-messages")
 def get_all_messages():
@@ -133,6 +392,171 @@ def get_1_message(data: GetMessageJSON):
     )
 
 
+@app.get("/message/logs")
+def get_message_logs(data: GetMessageJSON):
+    logs = kernel.db_handler.get_logs_for_message(data.message_id)
+    schemas = [MessageLogSchema.model_validate(log).model_dump() for log in logs]
+
+    return JSONResponse(
+        content={"message": f"{len(schemas)} log(s) retrieved for message '{data.message_id}'", "data": schemas},
+        status_code=200
+    )
+
+
+# EventSource can not send a body, so the stream filters come in the query string.
+@app.get("/events")
+async def stream_events(message_id: Optional[str] = None, account: Optional[str] = None,
+                        last_event_id: Optional[str] = Header(None)):
+    subscription = event_bus.subscribe(
+        message_id, account,
+        int(last_event_id) if last_event_id and last_event_id.isdigit() else None,
+        kernel.db_handler.get_message_account
+    )
+
+    return StreamingResponse(
+        sse_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/events/ws")
+async def stream_events_ws(websocket: WebSocket, message_id: Optional[str] = None,
+                           account: Optional[str] = None, last_event_id: Optional[int] = None):
+    await websocket.accept()
+    subscription = event_bus.subscribe(message_id, account, last_event_id, kernel.db_handler.get_message_account)
+
+    try:
+        while True:
+            events = await subscription.next_events(event_bus.ping_interval)
+            for event in events or [{"type": "ping"}]:
+                await websocket.send_json(event)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@app.get("/message/chunks")
+def get_message_chunks(data: GetMessageJSON):
+    chunks = kernel.db_handler.get_message_chunks(data.message_id)
+    schemas = [MessageChunkSchema.model_validate(chunk).model_dump() for chunk in chunks]
+
+    return JSONResponse(
+        content={"message": f"{len(schemas)} chunk(s) retrieved for message '{data.message_id}'", "data": schemas},
+        status_code=200
+    )
+
+
+@app.get("/messages/status")
+def get_messages_status(data: Optional[GetMessagesStatusJSON] = None):
+    data = data or GetMessagesStatusJSON()
+    summary = kernel.get_status_summary(data.since_minutes, data.account_name)
+
+    return JSONResponse(
+        content={"message": "Message status summary retrieved", "data": summary},
+        status_code=200
+    )
+
+
+@app.get("/messages/search")
+def search_messages(data: SearchMessagesJSON):
+    data = kernel.db_handler.search_messages(
+        recipient=data.recipient, domain=data.domain, subject_prefix=data.subject_prefix,
+        before=data.before, limit=data.limit
+    )
+    schemas = [MessageSummarySchema.model_validate(msg).model_dump() for msg in data]
+
+    return JSONResponse(
+        content={"message": f"{len(schemas)} message(s) found", "data": schemas},
+        status_code=200
+    )
+
+
+@app.get("/search")
+def search_full_text(data: FullTextSearchJSON):
+    results = kernel.db_handler.search_full_text(data.query, data.limit, data.offset)
+
+    return JSONResponse(
+        content={"message": f"{len(results)} result(s) found", "data": {
+            "results": results, "limit": data.limit, "offset": data.offset,
+            "next_offset": data.offset + data.limit if len(results) == data.limit else None
+        }},
+        status_code=200
+    )
+
+
+@app.post("/search/rebuild")
+def rebuild_search_index():
+    kernel.db_handler.rebuild_search_index()
+
+    return JSONResponse(
+        content={"message": "Search index rebuilt", "data": None},
+        status_code=200
+    )
+
+
+@app.get("/dead-letters")
+def get_dead_letters():
+    data = kernel.db_handler.get_list_dead_letters()
+    schemas = [MessageSchema.model_validate(msg).model_dump() for msg in data]
+
+    return JSONResponse(
+        content={"message": "Dead-lettered messages retrieved", "data": schemas},
+        status_code=200
+    )
+
+
+@app.post("/requeue-dead-letters")
+def requeue_dead_letters(data: PostRequeueMessagesJSON):
+    requeued = kernel.requeue_dead_letters(data.message_ids)
+
+    return JSONResponse(
+        content={"message": f"{requeued} dead-lettered message(s) requeued", "data": {"requeued": requeued}},
+        status_code=200
+    )
+
+
+@app.post("/purge-expired")
+def purge_expired_messages():
+    summary = kernel.purge_expired_messages()
+
+    return JSONResponse(
+        content={"message": f"{summary['messages']} expired message(s) purged", "data": summary},
+        status_code=200
+    )
+
+
+@app.post("/backup")
+def start_backup():
+    try:
+        job = kernel.start_backup()
+    except RuntimeError as error:
+        return JSONResponse(
+            content={"message": str(error), "data": None},
+            status_code=409
+        )
+
+    if job is None:
+        return JSONResponse(
+            content={"message": "A backup is already running", "data": backup_manager.status()["current"]},
+            status_code=409
+        )
+
+    return JSONResponse(
+        content={"message": f"Backup {job.id} started", "data": job.to_dict()},
+        status_code=202
+    )
+
+
+@app.get("/backup/status")
+def get_backup_status():
+    return JSONResponse(
+        content={"message": "Backup status retrieved", "data": backup_manager.status()},
+        status_code=200
+    )
+
+
 @app.get("/logs")
 def get_all_logs(data: GetListLogsJSON):
     data = kernel.db_handler.get_list_logs(w=data.w, y=data.y)
@@ -147,6 +571,20 @@ def get_all_logs(data: GetListLogsJSON):
 @app.post("/upd-confvar")
 def update_config_variable(data: PutConfigVariableJSON):
     kernel.db_handler.update_config_variable(data.key, data.value)
+    if data.key.startswith("admission"):
+        kernel.configure_admission()
+    elif data.key in REQUEST_LIMIT_KEYS:
+        kernel.configure_request_limits()
+    elif data.key == "credentialCacheTTL":
+        kernel.configure_vault()
+    elif data.key == "responseCacheTTL":
+        kernel.configure_response_cache()
+    elif data.key.startswith("image"):
+        kernel.configure_image_optimizer()
+    elif data.key.startswith("bodyCompression"):
+        kernel.configure_body_codec()
+    elif data.key.startswith("eventStream"):
+        kernel.configure_event_bus()
 
     return JSONResponse(
         content={"message": f"Config variable '{data.key}' updated", "data": {"key": data.key, "value": data.value}},
@@ -156,7 +594,10 @@ def update_config_variable(data: PutConfigVariableJSON):
 
 @app.post("/set-acc")
 def set_new_account(data: PostPutNewAccountJSON):
-    kernel.db_handler.store_new_account(data.account_name, data.email, data.password)
+    kernel.db_handler.store_new_account(
+        data.account_name, data.email, data.password, data.transport, data.transport_options
+    )
+    response_cache.invalidate()
     
     return JSONResponse(
         content={"message": f"Account '{data.account_name}' created", "data": {"account_name": data.account_name}},
@@ -166,7 +607,8 @@ def set_new_account(data: PostPutNewAccountJSON):
 
 @app.put("/upd-acc")
 def update_account(data: PostPutNewAccountJSON):
-    kernel.db_handler.update_registered_account(data.account_name, data.email, data.password)
+    kernel.update_account(data.account_name, data.email, data.password, data.transport, data.transport_options)
+    response_cache.invalidate()
     
     return JSONResponse(
         content={"message": f"Account '{data.account_name}' updated", "data": {"account_name": data.account_name}},
@@ -174,9 +616,43 @@ def update_account(data: PostPutNewAccountJSON):
     )
 
 
+@app.post("/rotate-secrets")
+def rotate_account_secrets():
+    rotated = kernel.rotate_account_secrets()
+
+    if rotated is None:
+        return JSONResponse(
+            content={"message": "Credentials could not be re-encrypted, see logs", "data": None},
+            status_code=500
+        )
+
+    return JSONResponse(
+        content={"message": f"Credentials of {rotated} account(s) re-encrypted", "data": {"rotated": rotated}},
+        status_code=200
+    )
+
+
+@app.post("/train-compression-dict")
+def train_compression_dictionary(data: Optional[PostTrainCompressionDictJSON] = None):
+    data = data or PostTrainCompressionDictJSON()
+    dictionary = kernel.train_compression_dictionary(data.samples, data.dict_size)
+
+    if dictionary is None:
+        return JSONResponse(
+            content={"message": "Compression dictionary could not be trained, see logs", "data": None},
+            status_code=500
+        )
+
+    return JSONResponse(
+        content={"message": f"Compression dictionary #{dictionary['dictionary_id']} trained", "data": dictionary},
+        status_code=200
+    )
+
+
 @app.post("/set-acc-sign")
 def set_account_signature(data: PostPutAccountSignatureJSON):
     kernel.db_handler.store_new_account_signature(data.account_name, data.signature_key)
+    response_cache.invalidate()
     
     return JSONResponse(
         content={"message": f"Signature key '{data.signature_key}' set for account '{data.account_name}'", "data": {"account_name": data.account_name, "signature_key": data.signature_key}},
@@ -187,6 +663,7 @@ def set_account_signature(data: PostPutAccountSignatureJSON):
 @app.put("/enable-sign")
 def enable_signature_for_account(data: PostPutAccountSignatureJSON):
     kernel.db_handler.enable_account_signature(data.account_name, data.signature_key)
+    response_cache.invalidate()
     
     return JSONResponse(
         content={"message": f"Signature key '{data.signature_key}' enabled for account '{data.account_name}'", "data": {"account_name": data.account_name, "signature_key": data.signature_key}},
@@ -204,5 +681,7 @@ def format_extended_markdown(data: PostFormatMdxJSON):
     )
 
 if __name__ == "__main__":
+    import uvicorn
+
     host, port = kernel.get_addr()
     uvicorn.run(app, host=host, port=port)
\ No newline at end of file
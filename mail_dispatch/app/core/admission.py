@@ -0,0 +1,142 @@
+from typing import *
+
+from app.core.metrics import ADMISSION_REJECTED_TOTAL
+
+from collections import deque
+from threading import Lock
+from time import perf_counter
+
+import math
+
+RATE_WINDOW = 30.0
+DEGRADED_FOR = 10.0
+MAX_RETRY_AFTER = 60
+
+class Overloaded(Exception):
+    def __init__(self, message: str, reason: str, retry_after: int, limit: int):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.limit = limit
+
+class AdmissionController:
+    def __init__(self):
+        self.lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_queued = 0
+        self.max_queued_per_account = 0
+        self.retry_after_min = 1
+        self.queued: Callable[[], int] = lambda: 0
+        self.account_backlog: Callable[[str], int] = lambda account_name: 0
+        self.completions: Dict[Optional[str], Deque[float]] = {}
+        self.rejected: Dict[str, int] = {}
+        self.last_rejected_at: Optional[float] = None
+
+    def configure(self, max_in_flight: int, max_queued: int, max_queued_per_account: int, retry_after: int):
+        self.max_in_flight = max(0, max_in_flight)
+        self.max_queued = max(0, max_queued)
+        self.max_queued_per_account = max(0, max_queued_per_account)
+        self.retry_after_min = max(1, retry_after)
+
+    def bind(self, queued: Callable[[], int], account_backlog: Callable[[str], int]):
+        self.queued = queued
+        self.account_backlog = account_backlog
+
+    def reject(self, message: str, reason: str, limit: int, excess: float = 0, account_name: Optional[str] = None):
+        with self.lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+            self.last_rejected_at = perf_counter()
+        ADMISSION_REJECTED_TOTAL.inc(reason)
+
+        raise Overloaded(message, reason, self.retry_after(excess, account_name), limit)
+
+    # Runs before the body is read, so a shed request costs almost nothing.
+    def enter(self):
+        with self.lock:
+            admitted = not self.max_in_flight or self.in_flight < self.max_in_flight
+            if admitted:
+                self.in_flight += 1
+
+        if not admitted:
+            self.reject(f"❌ Too many requests in progress (limit {self.max_in_flight})", "in_flight", self.max_in_flight)
+
+        queued = self.queued()
+        if self.max_queued and queued >= self.max_queued:
+            self.leave()
+            self.reject(
+                f"❌ Dispatch backlog is full ({queued} queued, limit {self.max_queued})", "queue", self.max_queued,
+                excess=queued - self.max_queued * 0.9
+            )
+
+    def leave(self):
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def check(self, account_name: Optional[str] = None, count: int = 1):
+        queued = self.queued()
+        if self.max_queued and queued + count > self.max_queued:
+            self.reject(
+                f"❌ Dispatch backlog is full ({queued} queued, limit {self.max_queued})", "queue", self.max_queued,
+                excess=queued + count - self.max_queued * 0.9
+            )
+
+        if account_name is None or not self.max_queued_per_account:
+            return
+
+        backlog = self.account_backlog(account_name)
+        if backlog + count > self.max_queued_per_account:
+            self.reject(
+                f"❌ Account '{account_name}' has {backlog} send(s) pending (limit {self.max_queued_per_account})",
+                "account", self.max_queued_per_account,
+                excess=backlog + count - self.max_queued_per_account * 0.9, account_name=account_name
+            )
+
+    def record_done(self, account_name: str):
+        now = perf_counter()
+        with self.lock:
+            for key in (None, account_name):
+                self.completions.setdefault(key, deque(maxlen=1024)).append(now)
+
+    def drain_rate(self, account_name: Optional[str] = None) -> float:
+        now = perf_counter()
+        with self.lock:
+            times = self.completions.get(account_name)
+            if not times:
+                return 0.0
+            while times and now - times[0] > RATE_WINDOW:
+                times.popleft()
+            if len(times) < 2:
+                return 0.0
+            return len(times) / max(now - times[0], 1.0)
+
+    def retry_after(self, excess: float = 0, account_name: Optional[str] = None) -> int:
+        # Ask clients to come back once the backlog has drained a tenth below the limit, not all at the same instant.
+        rate = self.drain_rate(account_name)
+        if excess <= 0 or rate <= 0:
+            return self.retry_after_min
+        return int(min(MAX_RETRY_AFTER, max(self.retry_after_min, math.ceil(excess / rate))))
+
+    def overloaded(self) -> bool:
+        last_rejected_at = self.last_rejected_at
+        if last_rejected_at is not None and perf_counter() - last_rejected_at < DEGRADED_FOR:
+            return True
+
+        return bool(
+            (self.max_in_flight and self.in_flight >= self.max_in_flight)
+            or (self.max_queued and self.queued() >= self.max_queued)
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "overloaded": self.overloaded(),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued(),
+            "max_queued": self.max_queued,
+            "max_queued_per_account": self.max_queued_per_account,
+            "drain_rate": round(self.drain_rate(), 1),
+            "rejected": dict(self.rejected),
+        }
+
+admission = AdmissionController()
@@ -0,0 +1,155 @@
+from typing import *
+
+from app.config import config
+from app.core.compression import load_zstd
+from app.core.enums import MessageEvent
+from app.core.models import MessageLog
+from app.register import get_appdata_path
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+FILTER_HASHES = 4
+FILTER_BITS_PER_ENTRY = 10
+
+# Bloom filter over the message ids of a segment, so lookups by message skip most files.
+class MessageFilter:
+    def __init__(self, bits: bytearray, hashes: int = FILTER_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+
+    @classmethod
+    def build(cls, message_ids: Iterable[str]) -> "MessageFilter":
+        message_ids = set(message_ids)
+        size = max(8, (len(message_ids) * FILTER_BITS_PER_ENTRY + 7) // 8)
+        message_filter = cls(bytearray(size))
+        for message_id in message_ids:
+            message_filter.add(message_id)
+        return message_filter
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MessageFilter":
+        return cls(bytearray(data[1:]), data[0])
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.hashes]) + bytes(self.bits)
+
+    def positions(self, message_id: str) -> Iterator[int]:
+        digest = hashlib.blake2b(message_id.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        size = len(self.bits) * 8
+        for i in range(self.hashes):
+            yield (first + i * second) % size
+
+    def add(self, message_id: str):
+        for position in self.positions(message_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, message_id: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(message_id))
+
+class LogArchive:
+    def __init__(self, root: Optional[str] = None, cached_segments: int = 4):
+        self._root = root
+        self.cached_segments = cached_segments
+        self.lock = Lock()
+        self.cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.filters: Dict[str, MessageFilter] = {}
+        self._zstd = None
+
+    @property
+    def root(self) -> str:
+        if self._root is None:
+            register_dir = os.path.dirname(config.vars.appdata_register)
+            self._root = os.path.join(get_appdata_path(), register_dir, "log_archive")
+        return self._root
+
+    @property
+    def zstd(self):
+        if self._zstd is None:
+            self._zstd = load_zstd() or False
+        return self._zstd or None
+
+    def path(self, file_name: str) -> str:
+        return os.path.join(self.root, file_name)
+
+    def write_segment(self, records: List[Dict[str, Any]]) -> Tuple[str, int]:
+        codec = "zst" if self.zstd is not None else "gz"
+        file_name = f"logs-{records[0]['id']:012d}-{records[-1]['id']:012d}.ndjson.{codec}"
+
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        if codec == "zst":
+            data = self.zstd.ZstdCompressor(level=10).compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=9)
+
+        # Segments are written next to their final path and renamed, so a crash never leaves half a file.
+        os.makedirs(self.root, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path(file_name))
+
+        return file_name, len(data)
+
+    def read_segment(self, file_name: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            records = self.cache.get(file_name)
+            if records is not None:
+                self.cache.move_to_end(file_name)
+                return records
+
+        with open(self.path(file_name), "rb") as f:
+            data = f.read()
+
+        if file_name.endswith(".zst"):
+            data = self.zstd.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        records = [json.loads(line) for line in data.splitlines() if line]
+
+        with self.lock:
+            self.cache[file_name] = records
+            while len(self.cache) > self.cached_segments:
+                self.cache.popitem(last=False)
+
+        return records
+
+    def remove_segment(self, file_name: str) -> bool:
+        with self.lock:
+            self.cache.pop(file_name, None)
+            self.filters.pop(file_name, None)
+        try:
+            os.remove(self.path(file_name))
+            return True
+        except FileNotFoundError:
+            return False
+
+log_archive = LogArchive()
+
+def log_record(log: MessageLog) -> Dict[str, Any]:
+    return {
+        "id": log.id,
+        "message_id": log.message_id,
+        "event": log.event.value if log.event is not None else None,
+        "details": log.details,
+        "timestamp": log.timestamp.isoformat() if log.timestamp is not None else None,
+    }
+
+def archived_log(record: Dict[str, Any]) -> MessageLog:
+    return MessageLog(
+        id=record["id"],
+        message_id=record["message_id"],
+        event=MessageEvent(record["event"]) if record["event"] else None,
+        details=record["details"],
+        timestamp=datetime.fromisoformat(record["timestamp"]) if record["timestamp"] else None
+    )
@@ -0,0 +1,199 @@
+from typing import *
+
+from app.config import config
+from app.register import get_appdata_path
+
+from collections import deque
+from datetime import datetime
+from threading import Lock, Event, Thread
+
+import glob
+import os
+import sqlite3
+import time
+import uuid
+
+SNAPSHOT_PREFIX = "app_db-"
+
+class BackupCancelled(Exception):
+    pass
+
+class BackupJob:
+    def __init__(self, trigger: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.path = path
+        self.status = "running"
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.snapshot = False
+        self.pages_total = 0
+        self.pages_remaining = 0
+        self.steps = 0
+        self.restarts = 0
+        self.full_pass = False
+        self.size = 0
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "status": self.status,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "snapshot": self.snapshot,
+            "progress": round(1 - self.pages_remaining / self.pages_total, 4) if self.pages_total else 0.0,
+            "pages_total": self.pages_total,
+            "steps": self.steps,
+            "restarts": self.restarts,
+            "full_pass": self.full_pass,
+            "size": self.size,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+        }
+
+class BackupManager:
+    def __init__(self, root: Optional[str] = None, history: int = 20):
+        self._root = root
+        self.lock = Lock()
+        self.cancel_event = Event()
+        self.current: Optional[BackupJob] = None
+        self.thread: Optional[Thread] = None
+        self.history: Deque[BackupJob] = deque(maxlen=history)
+
+    @property
+    def root(self) -> str:
+        if self._root is None:
+            register_dir = os.path.dirname(config.vars.appdata_register)
+            self._root = os.path.join(get_appdata_path(), register_dir, "backups")
+        return self._root
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, database_path: str, trigger: str = "manual", pages_per_step: int = 256, pause: float = 0.005,
+              retention: int = 7, max_restarts: int = 10,
+              on_finish: Optional[Callable[[BackupJob], None]] = None) -> Optional[BackupJob]:
+        with self.lock:
+            if self.running:
+                return None
+
+            os.makedirs(self.root, exist_ok=True)
+            name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+            job = BackupJob(trigger, os.path.join(self.root, name))
+
+            self.current = job
+            self.history.appendleft(job)
+            self.cancel_event.clear()
+            self.thread = Thread(
+                target=self.run,
+                args=(job, database_path, pages_per_step, pause, retention, max_restarts, on_finish),
+                name="database-backup", daemon=True
+            )
+            self.thread.start()
+            return job
+
+    def cancel(self, timeout: float = 5):
+        self.cancel_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=timeout)
+
+    def run(self, job: BackupJob, database_path: str, pages_per_step: int, pause: float,
+            retention: int, max_restarts: int, on_finish: Optional[Callable[[BackupJob], None]] = None):
+        temp_path = job.path + ".part"
+        start = time.perf_counter()
+
+        try:
+            self.copy(job, database_path, temp_path, pages_per_step, pause, max_restarts)
+            os.replace(temp_path, job.path)
+
+            job.size = os.path.getsize(job.path)
+            job.status = "done"
+            self.apply_retention(retention)
+        except Exception as error:
+            job.status = "cancelled" if isinstance(error, BackupCancelled) else "failed"
+            job.error = str(error)
+            for path in (temp_path, temp_path + "-journal"):
+                if os.path.exists(path):
+                    os.remove(path)
+        finally:
+            job.seconds = time.perf_counter() - start
+            job.finished_at = datetime.now()
+            if on_finish is not None:
+                on_finish(job)
+
+    def copy(self, job: BackupJob, database_path: str, temp_path: str,
+             pages_per_step: int, pause: float, max_restarts: int):
+        source = sqlite3.connect(database_path, timeout=30, isolation_level=None, check_same_thread=False)
+        target = sqlite3.connect(temp_path)
+
+        try:
+            # In WAL mode an open read transaction pins a snapshot: writers keep committing to the WAL
+            # while every step copies from the same version, so the copy never restarts.
+            job.snapshot = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+            if job.snapshot:
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def progress(status, remaining, total):
+                if self.cancel_event.is_set():
+                    raise BackupCancelled("❌ Backup cancelled")
+
+                if job.steps and remaining > job.pages_remaining:
+                    job.restarts += 1
+                    if job.restarts > max_restarts:
+                        raise OverflowError("❌ Database kept changing during the backup")
+
+                job.steps += 1
+                job.pages_total, job.pages_remaining = total, remaining
+
+                # sqlite3 only sleeps after a busy step, so the pause that gives writers room happens here.
+                if remaining and pause > 0:
+                    time.sleep(pause)
+
+            try:
+                source.backup(target, pages=pages_per_step if pages_per_step > 0 else -1, progress=progress, sleep=pause)
+            except OverflowError:
+                # Without WAL every write restarts the copy, so finish in one pass and let writers wait once.
+                job.full_pass = True
+                source.backup(target, pages=-1)
+                job.pages_remaining = 0
+
+            if job.snapshot:
+                source.execute("COMMIT")
+
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+            source.close()
+
+    def snapshots(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.root, f"{SNAPSHOT_PREFIX}*.db")), reverse=True)
+
+    def last_success(self) -> Optional[datetime]:
+        snapshots = self.snapshots()
+        return datetime.fromtimestamp(os.path.getmtime(snapshots[0])) if snapshots else None
+
+    def apply_retention(self, retention: int):
+        if retention <= 0:
+            return
+
+        for path in self.snapshots()[retention:]:
+            os.remove(path)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "current": self.current.to_dict() if self.current is not None else None,
+            "history": [job.to_dict() for job in list(self.history)],
+            "snapshots": [
+                {"file": os.path.basename(path), "size": os.path.getsize(path)}
+                for path in self.snapshots()
+            ],
+        }
+
+backup_manager = BackupManager()
@@ -0,0 +1,89 @@
+from typing import *
+
+from app.config import config
+from app.register import get_appdata_path
+
+import hashlib
+import os
+import re
+import tempfile
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+def is_blob_digest(value: Any) -> bool:
+    return isinstance(value, str) and DIGEST_PATTERN.fullmatch(value) is not None
+
+class BlobWriter:
+    def __init__(self, store: "BlobStore", limit: Optional[int] = None):
+        self.store = store
+        self.limit = limit
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+        os.makedirs(store.temp_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=store.temp_dir, suffix=".part")
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise OverflowError(f"❌ Attachment exceeds {self.limit} bytes")
+
+        self.hasher.update(data)
+        self.file.write(data)
+
+    def commit(self) -> Tuple[str, int]:
+        self.file.close()
+        digest = self.hasher.hexdigest()
+
+        path = self.store.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.temp_path, path)
+
+        return digest, self.size
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+class BlobStore:
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        if self._root is None:
+            register_dir = os.path.dirname(config.vars.appdata_register)
+            self._root = os.path.join(get_appdata_path(), register_dir, "attachments")
+        return self._root
+
+    @property
+    def temp_dir(self) -> str:
+        return os.path.join(self.root, "tmp")
+
+    def path(self, digest: str) -> str:
+        if not is_blob_digest(digest):
+            raise ValueError(f"❌ Invalid attachment blob reference '{digest}'")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def writer(self, limit: Optional[int] = None) -> BlobWriter:
+        return BlobWriter(self, limit)
+
+    def read(self, digest: str) -> bytes:
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ValueError(f"❌ Attachment blob '{digest}' is missing") from None
+
+    def remove(self, digest: str) -> bool:
+        try:
+            os.remove(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+blob_store = BlobStore()
@@ -0,0 +1,171 @@
+from typing import *
+
+from sqlalchemy.types import TypeDecorator, Text, LargeBinary
+from collections import Counter
+from threading import Lock
+
+import json
+import re
+import struct
+import zlib
+
+MAGIC = b"MDZ1"
+HEADER = struct.Struct(">4sBI")
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+CODEC_NAMES = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+ZLIB_MAX_DICTIONARY = 32 * 1024
+
+def load_zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+class BodyCodec:
+    def __init__(self, codec: str = "auto", level: int = 0, min_size: int = 512):
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self.lock = Lock()
+        self.dictionaries: Dict[int, Tuple[int, bytes]] = {}
+        self.active_dictionaries: Dict[int, int] = {}
+        self.zstd_dictionaries: Dict[int, Any] = {}
+        self._zstd = None
+
+    @property
+    def zstd(self):
+        if self._zstd is None:
+            self._zstd = load_zstd() or False
+        return self._zstd or None
+
+    def configure(self, codec: str = "auto", level: int = 0, min_size: int = 512):
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self.zstd_dictionaries.clear()
+
+    def resolve_codec(self) -> int:
+        if self.codec == "auto":
+            return CODEC_ZSTD if self.zstd is not None else CODEC_ZLIB
+        if self.codec == "zstd" and self.zstd is None:
+            return CODEC_ZLIB
+        return CODEC_NAMES.get(self.codec, CODEC_ZLIB)
+
+    def register_dictionary(self, dictionary_id: int, codec: int, data: bytes, activate: bool = True):
+        with self.lock:
+            self.dictionaries[dictionary_id] = (codec, data)
+            if activate and dictionary_id >= self.active_dictionaries.get(codec, 0):
+                self.active_dictionaries[codec] = dictionary_id
+
+    def zstd_dictionary(self, dictionary_id: int):
+        compiled = self.zstd_dictionaries.get(dictionary_id)
+        if compiled is None:
+            _, data = self.dictionaries[dictionary_id]
+            compiled = self.zstd.ZstdCompressionDict(data)
+            compiled.precompute_compress(level=self.level or 3)
+            self.zstd_dictionaries[dictionary_id] = compiled
+        return compiled
+
+    def compress(self, data: bytes) -> Union[bytes, None]:
+        codec = self.resolve_codec()
+        if codec == CODEC_NONE or len(data) < self.min_size:
+            return None
+
+        dictionary_id = self.active_dictionaries.get(codec, 0)
+
+        if codec == CODEC_ZSTD:
+            kwargs = {"level": self.level or 3}
+            if dictionary_id:
+                kwargs["dict_data"] = self.zstd_dictionary(dictionary_id)
+            payload = self.zstd.ZstdCompressor(**kwargs).compress(data)
+        else:
+            args = [self.level or 6, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY]
+            if dictionary_id:
+                args.append(self.dictionaries[dictionary_id][1])
+            compressor = zlib.compressobj(*args)
+            payload = compressor.compress(data) + compressor.flush()
+
+        return HEADER.pack(MAGIC, codec, dictionary_id) + payload
+
+    def decompress(self, blob: bytes) -> bytes:
+        if not blob.startswith(MAGIC):
+            return blob
+
+        _, codec, dictionary_id = HEADER.unpack_from(blob)
+        payload = blob[HEADER.size:]
+
+        if codec == CODEC_ZSTD:
+            if self.zstd is None:
+                raise RuntimeError("❌ A stored body is zstd-compressed but 'zstandard' is not installed")
+            kwargs = {"dict_data": self.zstd_dictionary(dictionary_id)} if dictionary_id else {}
+            return self.zstd.ZstdDecompressor(**kwargs).decompress(payload)
+
+        if dictionary_id:
+            decompressor = zlib.decompressobj(zdict=self.dictionaries[dictionary_id][1])
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(payload) + decompressor.flush()
+
+    def train(self, samples: List[bytes], size: int = 64 * 1024) -> Tuple[int, bytes]:
+        codec = self.resolve_codec()
+
+        if codec == CODEC_ZSTD:
+            return codec, self.zstd.train_dictionary(size, samples).as_bytes()
+
+        return CODEC_ZLIB, self.build_zlib_dictionary(samples, min(size, ZLIB_MAX_DICTIONARY))
+
+    def build_zlib_dictionary(self, samples: List[bytes], size: int) -> bytes:
+        fragments = Counter()
+        for sample in samples:
+            fragments.update(set(re.findall(rb"[^>]{4,200}>", sample)))
+
+        dictionary = []
+        total = 0
+        for fragment, count in fragments.most_common():
+            if count < 2 or total + len(fragment) > size:
+                continue
+            dictionary.append(fragment)
+            total += len(fragment)
+
+        # zlib matches best against the end of the dictionary, so the most
+        # common fragments go last.
+        return b"".join(reversed(dictionary))
+
+body_codec = BodyCodec()
+
+class CompressedText(TypeDecorator):
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return body_codec.compress(value.encode("utf-8")) or value
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            return body_codec.decompress(value).decode("utf-8")
+        return value
+
+class CompressedJSON(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        serialized = json.dumps(value).encode("utf-8")
+        return body_codec.compress(serialized) or serialized
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = body_codec.decompress(value).decode("utf-8")
+        return json.loads(value)
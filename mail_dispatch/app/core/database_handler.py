@@ -4,20 +4,51 @@ from app.core.models import *
 from app.core.schemas import *
 
 from app.config import config
+from app.core.migrations import upgrade_schema, rebuild_search_index
+from app.core.metrics import DB_SESSIONS_TOTAL, DB_SESSIONS_ACTIVE
+from app.core.vault import vault
+from app.core.compression import body_codec
+from app.core.blobs import is_blob_digest
+from app.core.archive import MessageFilter, log_archive, archived_log
+from app.core.events import event_bus
+from app.core.recipients import link_recipients, normalize_address
+from app.core.search import (
+    register_search_functions, build_match_query, INDEX_PENDING_SQL, RANKED_SEARCH_SQL,
+    MESSAGE_SNIPPETS_SQL, LOG_SNIPPETS_SQL
+)
 from app.mail.signature import list_signatures
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, func, text, select, inspect
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, load_only
+
+from datetime import datetime
+from time import perf_counter
 
 import hashlib
 import json
 
+DENSE_PREFIX_MATCHES = 1000
+
 class DataBaseHandler:
     def __init__(self):
         engine = create_engine(config.vars.url_app_database)
-        Base.metadata.create_all(bind=engine)
+        event.listen(engine, "connect", register_search_functions)
+        upgrade_schema(engine)
+        self.watch_pool(engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.load_compression_dictionaries()
+        self.search_enabled = inspect(engine).has_table("messages_fts")
+
+    def watch_pool(self, engine):
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            DB_SESSIONS_TOTAL.inc()
+            DB_SESSIONS_ACTIVE.inc()
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            DB_SESSIONS_ACTIVE.dec()
 
     def store_config_variable(self, key: str, value: str, 
                               var_type: ConfigVarType, 
@@ -42,13 +73,17 @@ class DataBaseHandler:
         finally:
             db.close()
 
-    def store_new_account(self, account_name: str, email: EmailStr, plain_password: str):
+    def store_new_account(self, account_name: str, email: EmailStr, plain_password: str,
+                          transport: Optional[str] = None,
+                          transport_options: Optional[Dict[str, Any]] = None):
         db = self.SessionLocal()
 
         try:
             new_account = RegisteredAccount(
                 account_name=account_name,
-                email=email
+                email=email,
+                transport=transport or TransportKind.EWS.value,
+                transport_options=transport_options
             )
 
             new_account.set_password(plain_password)
@@ -90,7 +125,8 @@ class DataBaseHandler:
     def store_new_message(self, payload_data: MessageData):
         db = self.SessionLocal()
         try:
-            header_dict = payload_data.model_dump()
+            # Priority only decides the dispatch lane, the same content sent at another priority is still a duplicate.
+            header_dict = payload_data.model_dump(exclude={"priority"})
             serialized_data = json.dumps(header_dict, sort_keys=True)
             
             hasher = hashlib.new("sha256")
@@ -104,11 +140,18 @@ class DataBaseHandler:
 
             header_dict["hash_value"] = hash_value
             
-            new_message = Message(**header_dict)
+            new_message = Message(**header_dict, priority=payload_data.priority)
             db.add(new_message)
+            db.flush()
+
+            link_recipients(db.connection(), [
+                (new_message.id, new_message.created_at, new_message.to_recipients, new_message.cc_recipients)
+            ])
+            self.link_blobs(db, new_message.id, new_message.attachments)
             db.commit()
             db.refresh(new_message)
-            
+
+            self.publish_stored(new_message)
             return new_message
             
         except Exception as error:
@@ -120,6 +163,118 @@ class DataBaseHandler:
         finally:
             db.close()
 
+    def publish_stored(self, message: Message):
+        event_bus.remember(message.id, message.account_name)
+        event_bus.publish(
+            "status", message.id, message.account_name,
+            status=MessageStatus.STORED.value, priority=message.priority
+        )
+
+    def get_message_account(self, message_id: str) -> Optional[str]:
+        route = self.get_message_route(message_id)
+        return route[0] if route is not None else None
+
+    def link_blobs(self, db, message_id: str, attachments: Optional[List[Any]]):
+        blobs = {
+            attachment["blob"]: attachment.get("size")
+            for attachment in attachments or []
+            if isinstance(attachment, dict) and is_blob_digest(attachment.get("blob"))
+        }
+
+        if blobs:
+            db.add_all([MessageBlob(message_id=message_id, digest=digest, size=size) for digest, size in blobs.items()])
+
+    def store_template_message(self, payload_data: TemplateMessageData):
+        db = self.SessionLocal()
+        try:
+            serialized_data = json.dumps(payload_data.model_dump(exclude={"priority"}), sort_keys=True)
+            hash_value = hashlib.sha256(serialized_data.encode("utf-8")).hexdigest()
+
+            existing_message = db.query(Message).filter(Message.hash_value == hash_value).first()
+
+            if existing_message:
+                return existing_message
+
+            addresses = [recipient.address for recipient in payload_data.recipients]
+            new_message = Message(
+                hash_value=hash_value,
+                account_name=payload_data.account_name,
+                subject=payload_data.subject,
+                to_recipients=addresses,
+                attachments=payload_data.attachments,
+                html_body=payload_data.html_body,
+                use_signature=payload_data.use_signature,
+                fan_out=FanOutMode.TEMPLATE.value,
+                template_context=payload_data.context or None,
+                priority=payload_data.priority
+            )
+            db.add(new_message)
+            db.flush()
+
+            conn = db.connection()
+            link_recipients(conn, [(new_message.id, new_message.created_at, addresses, None)])
+            self.link_blobs(db, new_message.id, new_message.attachments)
+            conn.execute(MessageChunk.__table__.insert(), [
+                {
+                    "message_id": new_message.id, "chunk_index": index, "to_recipients": [recipient.address],
+                    "context": recipient.context or None, "status": MessageStatus.STORED, "attempts": 0
+                }
+                for index, recipient in enumerate(payload_data.recipients)
+            ])
+            db.commit()
+            db.refresh(new_message)
+
+            self.publish_stored(new_message)
+            return new_message
+
+        except Exception as error:
+            self.log_details(
+                details=f"❌ Error saving the template message: {error}"
+            )
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def store_message_chunks(self, message_id: str, chunks: List[Tuple[List[str], List[str]]]):
+        db = self.SessionLocal()
+        try:
+            rows = [
+                MessageChunk(
+                    message_id=message_id, chunk_index=index,
+                    to_recipients=to_recipients, cc_recipients=cc_recipients or None
+                )
+                for index, (to_recipients, cc_recipients) in enumerate(chunks)
+            ]
+            db.add_all(rows)
+            db.commit()
+
+            return len(rows)
+        except IntegrityError:
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def store_compression_dictionary(self, codec: int, data: bytes, samples: int):
+        db = self.SessionLocal()
+        try:
+            dictionary = CompressionDictionary(codec=codec, data=data, samples=samples)
+            db.add(dictionary)
+            db.commit()
+            db.refresh(dictionary)
+            return dictionary.id
+        finally:
+            db.close()
+
+    def load_compression_dictionaries(self):
+        db = self.SessionLocal()
+        try:
+            for dictionary in db.query(CompressionDictionary).order_by(CompressionDictionary.id).all():
+                body_codec.register_dictionary(dictionary.id, dictionary.codec, dictionary.data)
+        finally:
+            db.close()
+
     def update_config_variable(self, key: str, value: str, 
                                var_type: Optional[ConfigVarType] = None,
                                description: Optional[str] = None):
@@ -148,7 +303,9 @@ class DataBaseHandler:
 
     def update_registered_account(self, account_name: str, 
                                   email: Optional[EmailStr] = None, 
-                                  plain_password: Optional[str] = None):
+                                  plain_password: Optional[str] = None,
+                                  transport: Optional[str] = None,
+                                  transport_options: Optional[Dict[str, Any]] = None):
         db = self.SessionLocal()
         try:
             account = db.query(
@@ -166,12 +323,33 @@ class DataBaseHandler:
             if plain_password is not None:
                 account.set_password(plain_password)
 
+            if transport is not None:
+                account.transport = transport
+                account.transport_options = transport_options
+
             db.commit()
 
             return True
         finally:
             db.close()
 
+    def rotate_account_passwords(self):
+        db = self.SessionLocal()
+        try:
+            accounts = db.query(RegisteredAccount).all()
+
+            for account in accounts:
+                account.password = vault.rotate(account.password)
+
+            db.commit()
+
+            return len(accounts)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     def enable_account_signature(self, account_name: str, signature_key: str):
         account = self.get_registered_account(account_name)
         
@@ -190,17 +368,155 @@ class DataBaseHandler:
         finally:
             db.close()
 
-    def log_details(self, message_id: Optional[str] = None, details: str = "<Empty log>"):
+    def update_message_status(self, message_id: str, status: MessageStatus, **values):
+        sources = [
+            source for source, targets in MESSAGE_STATUS_TRANSITIONS.items()
+            if status in targets
+        ]
+
+        db = self.SessionLocal()
+        try:
+            updated = db.query(Message).filter(
+                Message.id == message_id,
+                Message.status.in_(sources)
+            ).update({
+                Message.status: status,
+                Message.status_changed_at: datetime.now(),
+                **{getattr(Message, key): value for key, value in values.items()}
+            }, synchronize_session=False)
+            db.commit()
+
+            if updated == 1:
+                event_bus.publish(
+                    "status", message_id, resolve_account=self.get_message_account, status=status.value
+                )
+            return updated == 1
+        finally:
+            db.close()
+
+    def update_message_chunk(self, chunk_id: int, status: MessageStatus, **values):
+        db = self.SessionLocal()
+        try:
+            db.query(MessageChunk).filter(MessageChunk.id == chunk_id).update({
+                MessageChunk.status: status,
+                **{getattr(MessageChunk, key): value for key, value in values.items()}
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def get_dead_letter_ids(self, message_ids: Optional[List[str]] = None) -> List[str]:
+        db = self.SessionLocal()
+        try:
+            query = db.query(Message.id).filter(Message.status == MessageStatus.DEAD_LETTER)
+
+            if message_ids is not None:
+                query = query.filter(Message.id.in_(message_ids))
+
+            return [row.id for row in query.order_by(Message.created_at).all()]
+        finally:
+            db.close()
+
+    def recover_interrupted_sends(self):
+        db = self.SessionLocal()
+        try:
+            recovered = db.query(Message).filter(
+                Message.status.in_([MessageStatus.QUEUED, MessageStatus.SENDING])
+            ).update({
+                Message.status: MessageStatus.RETRYING,
+                Message.status_changed_at: datetime.now(),
+                Message.next_retry_at: datetime.now()
+            }, synchronize_session=False)
+            db.commit()
+
+            return recovered
+        finally:
+            db.close()
+
+    def purge_expired_messages_batch(self, cutoff: datetime, batch_size: int = 500):
+        db = self.SessionLocal()
+        try:
+            message_ids = [row.id for row in db.query(Message.id).filter(
+                Message.created_at < cutoff,
+                Message.status.in_(PURGEABLE_STATUSES)
+            ).order_by(Message.created_at).limit(batch_size).all()]
+
+            if not message_ids:
+                return 0, 0, 0.0, []
+
+            expired = db.query(Message.id).filter(
+                Message.id.in_(message_ids),
+                Message.status.in_(PURGEABLE_STATUSES)
+            )
+
+            digests = [row.digest for row in db.query(MessageBlob.digest).filter(
+                MessageBlob.message_id.in_(expired.scalar_subquery())
+            ).distinct()]
+
+            start = perf_counter()
+            db.query(MessageBlob).filter(
+                MessageBlob.message_id.in_(expired.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.query(MessageRecipient).filter(
+                MessageRecipient.message_id.in_(expired.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.query(MessageChunk).filter(
+                MessageChunk.message_id.in_(expired.scalar_subquery())
+            ).delete(synchronize_session=False)
+            logs = db.query(MessageLog).filter(
+                MessageLog.message_id.in_(expired.scalar_subquery())
+            ).delete(synchronize_session=False)
+            messages = db.query(Message).filter(
+                Message.id.in_(message_ids),
+                Message.status.in_(PURGEABLE_STATUSES)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            return messages, logs, perf_counter() - start, digests
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def incremental_vacuum(self, pages: int = 256):
+        engine = self.SessionLocal.kw["bind"]
+        if engine.dialect.name != "sqlite":
+            return 0, 0
+
+        with engine.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                return 0, 0
+
+            before = conn.execute(text("PRAGMA freelist_count")).scalar()
+            if before:
+                conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages)})")
+                conn.commit()
+            after = conn.execute(text("PRAGMA freelist_count")).scalar()
+
+            return before - after, after
+
+    def log_details(self, message_id: Optional[str] = None, details: str = "<Empty log>",
+                    event: Optional[MessageEvent] = None):
         db = self.SessionLocal()
 
         try:
             log = MessageLog(
                 message_id=message_id,
-                details=details
+                event=event,
+                details=str(details)
             )
             db.add(log)
+            db.flush()
+            record = {"log_id": log.id, "event": event.value if event is not None else None, "details": log.details}
             db.commit()
 
+            event_bus.publish("log", message_id, resolve_account=self.get_message_account, **record)
+
+            # With the archive on, the archive worker moves old rows out instead.
+            if self.get_config_variable("logArchiveEnabled").get_var():
+                return log
+
             max_logs = self.get_config_variable("maxLogHistoryLength").get_var()
 
             total_logs = db.query(MessageLog).count()
@@ -229,6 +545,13 @@ class DataBaseHandler:
         finally:
             db.close()
 
+    def get_config_variable_keys(self):
+        db = self.SessionLocal()
+        try:
+            return {row.key for row in db.query(ConfigVariable.key).all()}
+        finally:
+            db.close()
+
     def get_list_registered_accounts(self):
         db = self.SessionLocal()
         try:
@@ -285,10 +608,91 @@ class DataBaseHandler:
             
             results = query.all()
 
+            # Archived logs are all older than the hot ones, so the page continues into the segments.
+            if len(results) < w:
+                hot_total = y + len(results) if results else db.query(func.count(MessageLog.id)).scalar()
+                offset = max(0, y - hot_total)
+
+                segments = db.query(LogSegment.file_name, LogSegment.rows).order_by(LogSegment.last_log_id.desc())
+                for segment in segments:
+                    if offset >= segment.rows:
+                        offset -= segment.rows
+                        continue
+
+                    records = log_archive.read_segment(segment.file_name)[::-1]
+                    results.extend(archived_log(record) for record in records[offset:offset + w - len(results)])
+                    offset = 0
+                    if len(results) >= w:
+                        break
+
             return list(reversed(results))
         finally:
             db.close()
 
+    def get_archivable_logs(self, keep: int, limit: int) -> List[MessageLog]:
+        db = self.SessionLocal()
+        try:
+            total = db.query(func.count(MessageLog.id)).scalar()
+            if total - keep < limit:
+                return []
+
+            return db.query(MessageLog).order_by(MessageLog.id).limit(limit).all()
+        finally:
+            db.close()
+
+    def store_log_segment(self, file_name: str, size: int, logs: List[MessageLog]) -> int:
+        db = self.SessionLocal()
+        try:
+            timestamps = [log.timestamp for log in logs if log.timestamp is not None]
+            db.add(LogSegment(
+                file_name=file_name,
+                first_log_id=logs[0].id,
+                last_log_id=logs[-1].id,
+                min_timestamp=min(timestamps, default=None),
+                max_timestamp=max(timestamps, default=None),
+                rows=len(logs),
+                size=size,
+                message_filter=MessageFilter.build(log.message_id for log in logs if log.message_id).to_bytes()
+            ))
+
+            # Log ids only grow, so the segment holds every row up to its last id.
+            archived = db.query(MessageLog).filter(
+                MessageLog.id <= logs[-1].id
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            return archived
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def expire_log_segments(self, cutoff: datetime) -> List[str]:
+        db = self.SessionLocal()
+        try:
+            segments = db.query(LogSegment).filter(LogSegment.max_timestamp < cutoff).all()
+            file_names = [segment.file_name for segment in segments]
+
+            db.query(LogSegment).filter(
+                LogSegment.file_name.in_(file_names)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            return file_names
+        finally:
+            db.close()
+
+    def get_log_segments_summary(self) -> Dict[str, int]:
+        db = self.SessionLocal()
+        try:
+            segments, rows, size = db.query(
+                func.count(LogSegment.id), func.sum(LogSegment.rows), func.sum(LogSegment.size)
+            ).one()
+            return {"segments": segments, "rows": rows or 0, "bytes": size or 0}
+        finally:
+            db.close()
+
     def get_message(self, message_id: str):
         db = self.SessionLocal()
         try:
@@ -298,11 +702,295 @@ class DataBaseHandler:
         finally:
             db.close()
 
+    def get_message_route(self, message_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        db = self.SessionLocal()
+        try:
+            row = db.query(Message.account_name, Message.priority).filter(
+                Message.id == message_id
+            ).first()
+            return (row.account_name, row.priority) if row is not None else None
+        finally:
+            db.close()
+
+    def get_message_routes(self, message_ids: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        db = self.SessionLocal()
+        try:
+            rows = db.query(Message.id, Message.account_name, Message.priority).filter(
+                Message.id.in_(message_ids)
+            ).all()
+            return {row.id: (row.account_name, row.priority) for row in rows}
+        finally:
+            db.close()
+
+    def get_message_chunks(self, message_id: str):
+        db = self.SessionLocal()
+        try:
+            return db.query(MessageChunk).filter(
+                MessageChunk.message_id == message_id
+            ).order_by(MessageChunk.chunk_index).all()
+        finally:
+            db.close()
+
+    def has_message_chunks(self, message_id: str):
+        db = self.SessionLocal()
+        try:
+            return db.query(MessageChunk.id).filter(
+                MessageChunk.message_id == message_id
+            ).first() is not None
+        finally:
+            db.close()
+
+    def reset_sent_message_chunks(self, message_id: str) -> int:
+        db = self.SessionLocal()
+        try:
+            sent = db.query(Message.id).filter(
+                Message.id == message_id,
+                Message.status == MessageStatus.SENT
+            ).first()
+            if sent is None:
+                return 0
+
+            reset = db.query(MessageChunk).filter(MessageChunk.message_id == message_id).update({
+                MessageChunk.status: MessageStatus.STORED,
+                MessageChunk.attempts: 0,
+                MessageChunk.last_error: None,
+                MessageChunk.sent_at: None
+            }, synchronize_session=False)
+            db.commit()
+            return reset
+        finally:
+            db.close()
+
+    def get_pending_message_chunks(self, message_id: str, after_index: int = -1, limit: int = 500):
+        db = self.SessionLocal()
+        try:
+            return db.query(MessageChunk).filter(
+                MessageChunk.message_id == message_id,
+                MessageChunk.chunk_index > after_index,
+                MessageChunk.status != MessageStatus.SENT
+            ).order_by(MessageChunk.chunk_index).limit(limit).all()
+        finally:
+            db.close()
+
+    def get_unreferenced_blobs(self, digests: Iterable[str]):
+        digests = set(digests)
+        if not digests:
+            return []
+
+        db = self.SessionLocal()
+        try:
+            referenced = {row.digest for row in db.query(MessageBlob.digest).filter(
+                MessageBlob.digest.in_(digests)
+            ).distinct()}
+            return sorted(digests - referenced)
+        finally:
+            db.close()
+
+    def get_due_retry_messages(self, now: datetime, limit: int = 50):
+        db = self.SessionLocal()
+        try:
+            query = db.query(Message.id).filter(
+                Message.status == MessageStatus.RETRYING,
+                Message.next_retry_at <= now
+            ).order_by(Message.next_retry_at).limit(limit)
+
+            return [row.id for row in query.all()]
+        finally:
+            db.close()
+
+    def count_retry_backlog(self):
+        db = self.SessionLocal()
+        try:
+            return db.query(Message).filter(
+                Message.status == MessageStatus.RETRYING
+            ).count()
+        finally:
+            db.close()
+
+    def get_status_counts(self, since: datetime, account_name: Optional[str] = None):
+        db = self.SessionLocal()
+        try:
+            query = db.query(
+                Message.account_name, Message.status, func.count()
+            ).filter(Message.status_changed_at >= since)
+
+            if account_name is not None:
+                query = query.filter(Message.account_name == account_name)
+
+            return query.group_by(Message.account_name, Message.status).all()
+        finally:
+            db.close()
+
+    def get_body_samples(self, limit: int = 500):
+        db = self.SessionLocal()
+        try:
+            rows = db.query(Message.html_body).order_by(Message.created_at.desc()).limit(limit).all()
+            return [row.html_body.encode("utf-8") for row in rows]
+        finally:
+            db.close()
+
+    def search_messages(self, recipient: Optional[str] = None, domain: Optional[str] = None,
+                        subject_prefix: Optional[str] = None, before: Optional[datetime] = None,
+                        limit: int = 50):
+        db = self.SessionLocal()
+        try:
+            subject_filters = []
+            if subject_prefix:
+                prefix = subject_prefix.lower()
+                subject_key = func.lower(Message.subject)
+
+                # Common prefixes are cheaper to read newest-first along created_at
+                # than to collect and sort every match from the subject index.
+                if not (recipient or domain) and db.execute(select(func.count()).select_from(
+                    select(Message.id)
+                    .where(subject_key >= prefix, subject_key < prefix + "\uffff")
+                    .limit(DENSE_PREFIX_MATCHES).subquery()
+                )).scalar() >= DENSE_PREFIX_MATCHES:
+                    subject_key = func.lower(func.coalesce(Message.subject, ""))
+
+                subject_filters = [subject_key >= prefix, subject_key < prefix + "\uffff"]
+
+            if recipient or domain:
+                links = select(MessageRecipient.message_id, MessageRecipient.created_at).distinct()
+
+                if recipient:
+                    links = links.where(MessageRecipient.recipient_id == (
+                        select(Recipient.id)
+                        .where(Recipient.address == normalize_address(recipient))
+                        .scalar_subquery()
+                    ))
+                if domain:
+                    links = links.where(MessageRecipient.domain == domain.strip().lower().lstrip("@"))
+                if before is not None:
+                    links = links.where(MessageRecipient.created_at < before)
+                if subject_filters:
+                    links = links.join(Message, Message.id == MessageRecipient.message_id).where(*subject_filters)
+
+                message_ids = db.execute(
+                    links.order_by(MessageRecipient.created_at.desc()).limit(limit)
+                ).scalars().all()
+
+                query = db.query(Message).filter(Message.id.in_(message_ids))
+            else:
+                query = db.query(Message).filter(*subject_filters)
+                if before is not None:
+                    query = query.filter(Message.created_at < before)
+
+            return query.options(load_only(
+                Message.id, Message.account_name, Message.subject, Message.to_recipients,
+                Message.cc_recipients, Message.created_at, Message.status
+            )).order_by(Message.created_at.desc()).limit(limit).all()
+        finally:
+            db.close()
+
+    def rebuild_search_index(self):
+        rebuild_search_index(self.SessionLocal.kw["bind"])
+
+    def database_path(self) -> Optional[str]:
+        database = self.SessionLocal.kw["bind"].url.database
+        return database if database and database != ":memory:" else None
+
+    def set_journal_mode(self, wal: bool) -> Optional[str]:
+        if self.database_path() is None:
+            return None
+
+        # Leaving WAL needs the only open connection, so pooled ones are dropped first.
+        engine = self.SessionLocal.kw["bind"]
+        engine.dispose()
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}").scalar()
+
+    def index_pending_messages(self, batch_size: int = 500):
+        if not self.search_enabled:
+            return 0
+
+        with self.SessionLocal.kw["bind"].begin() as conn:
+            for statement in INDEX_PENDING_SQL:
+                indexed = conn.execute(text(statement), {"limit": batch_size}).rowcount
+
+        return indexed
+
+    def count_search_queue(self):
+        db = self.SessionLocal()
+        try:
+            return db.query(func.count(SearchQueue.message_rowid)).scalar()
+        finally:
+            db.close()
+
+    def search_full_text(self, query: str, limit: int = 20, offset: int = 0):
+        match = build_match_query(query)
+        if match is None or not self.search_enabled:
+            return []
+
+        while self.index_pending_messages():
+            pass
+
+        db = self.SessionLocal()
+        try:
+            ranked = db.execute(
+                text(RANKED_SEARCH_SQL), {"match": match, "limit": limit, "offset": offset}
+            ).all()
+            if not ranked:
+                return []
+
+            params = {"match": match, **{f"id{i}": row.message_id for i, row in enumerate(ranked)}}
+            ids = ", ".join(f":id{i}" for i in range(len(ranked)))
+
+            snippets = dict(db.execute(text(LOG_SNIPPETS_SQL.format(ids=ids)), params).all())
+            snippets.update(db.execute(text(MESSAGE_SNIPPETS_SQL.format(ids=ids)), params).all())
+
+            messages = {
+                message.id: message for message in db.query(Message).options(load_only(
+                    Message.id, Message.account_name, Message.subject, Message.created_at, Message.status
+                )).filter(Message.id.in_([row.message_id for row in ranked])).all()
+            }
+
+            return [
+                {
+                    "message_id": row.message_id,
+                    "account_name": messages[row.message_id].account_name,
+                    "subject": messages[row.message_id].subject,
+                    "created_at": messages[row.message_id].created_at.isoformat(),
+                    "status": messages[row.message_id].status.value,
+                    "score": round(-row.score, 4),
+                    "matched_in": row.source,
+                    "snippet": snippets.get(row.message_id)
+                }
+                for row in ranked if row.message_id in messages
+            ]
+        finally:
+            db.close()
+
+    def get_list_dead_letters(self):
+        db = self.SessionLocal()
+        try:
+            query = db.query(Message).filter(
+                Message.status == MessageStatus.DEAD_LETTER
+            ).order_by(Message.created_at)
+
+            return query.all()
+        finally:
+            db.close()
+
     def get_logs_for_message(self, message_id: str):
         db = self.SessionLocal()
         try:
-            return db.query(MessageLog).filter(
+            logs = db.query(MessageLog).filter(
                 MessageLog.message_id == message_id
             ).order_by(MessageLog.timestamp).all()
+
+            segments = db.query(LogSegment.id, LogSegment.file_name).order_by(LogSegment.last_log_id).all()
+            missing = [segment.id for segment in segments if segment.file_name not in log_archive.filters]
+            if missing:
+                for segment in db.query(LogSegment.file_name, LogSegment.message_filter).filter(LogSegment.id.in_(missing)):
+                    log_archive.filters[segment.file_name] = MessageFilter.from_bytes(segment.message_filter)
+
+            archived = [
+                archived_log(record)
+                for segment in segments if message_id in log_archive.filters[segment.file_name]
+                for record in log_archive.read_segment(segment.file_name) if record["message_id"] == message_id
+            ]
+
+            return archived + logs
         finally:
             db.close()
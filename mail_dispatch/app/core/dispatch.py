@@ -0,0 +1,131 @@
+from typing import *
+
+from app.core.enums import MessagePriority
+
+from collections import OrderedDict, deque
+from threading import Condition
+from time import perf_counter
+
+class DispatchItem(NamedTuple):
+    message_id: str
+    lane: str
+    account_name: str
+    enqueued_at: float
+
+class Lane:
+    def __init__(self, weight: float):
+        self.weight = max(float(weight), 0.01)
+        self.pass_value = 0.0
+        self.size = 0
+        self.accounts: "OrderedDict[str, Deque[DispatchItem]]" = OrderedDict()
+
+class DispatchQueue:
+    def __init__(self, weights: Optional[Dict[str, float]] = None, account_concurrency: int = 0):
+        self.condition = Condition()
+        self.lanes: Dict[str, Lane] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.virtual_time = 0.0
+        self.closed = False
+        self.configure(weights or {priority.value: 1 for priority in MessagePriority}, account_concurrency)
+
+    def configure(self, weights: Dict[str, float], account_concurrency: int):
+        with self.condition:
+            for name, weight in weights.items():
+                lane = self.lanes.setdefault(name, Lane(weight))
+                lane.weight = max(float(weight), 0.01)
+            self.account_concurrency = account_concurrency
+            self.condition.notify_all()
+
+    def open(self):
+        with self.condition:
+            self.closed = False
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def put(self, message_id: str, lane: str, account_name: str) -> DispatchItem:
+        with self.condition:
+            if lane not in self.lanes:
+                lane = MessagePriority.NORMAL.value
+            item = DispatchItem(message_id, lane, account_name, perf_counter())
+
+            queue = self.lanes[lane]
+            # An idle lane must not bank credit while empty, or it would starve the others when it wakes up.
+            if not queue.size:
+                queue.pass_value = max(queue.pass_value, self.virtual_time)
+            queue.accounts.setdefault(account_name, deque()).append(item)
+            queue.size += 1
+
+            self.condition.notify()
+            return item
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DispatchItem]:
+        deadline = None if timeout is None else perf_counter() + timeout
+
+        with self.condition:
+            while not self.closed:
+                item = self.pop()
+                if item is not None:
+                    return item
+
+                remaining = None if deadline is None else deadline - perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            return None
+
+    def pop(self) -> Optional[DispatchItem]:
+        # Stride scheduling: the lane with the lowest pass goes next and then advances by 1 / weight,
+        # and inside a lane accounts take turns so one campaign can not hold the whole lane.
+        for lane in sorted((lane for lane in self.lanes.values() if lane.size), key=lambda lane: lane.pass_value):
+            for account_name, items in lane.accounts.items():
+                if not self.account_concurrency or self.in_flight.get(account_name, 0) < self.account_concurrency:
+                    break
+            else:
+                continue
+
+            item = items.popleft()
+            if items:
+                lane.accounts.move_to_end(account_name)
+            else:
+                del lane.accounts[account_name]
+            lane.size -= 1
+
+            self.virtual_time = lane.pass_value
+            lane.pass_value += 1 / lane.weight
+            self.in_flight[account_name] = self.in_flight.get(account_name, 0) + 1
+            return item
+
+        return None
+
+    def done(self, item: DispatchItem):
+        with self.condition:
+            remaining = self.in_flight.get(item.account_name, 1) - 1
+            if remaining > 0:
+                self.in_flight[item.account_name] = remaining
+            else:
+                self.in_flight.pop(item.account_name, None)
+            self.condition.notify()
+
+    def account_backlog(self, account_name: str) -> int:
+        with self.condition:
+            queued = sum(len(lane.accounts.get(account_name, ())) for lane in self.lanes.values())
+            return queued + self.in_flight.get(account_name, 0)
+
+    def depths(self) -> Dict[Tuple[str, ...], int]:
+        return {(name,): lane.size for name, lane in list(self.lanes.items())}
+
+    def __len__(self) -> int:
+        return sum(lane.size for lane in list(self.lanes.values()))
+
+    def status(self) -> Dict[str, Any]:
+        with self.condition:
+            return {
+                "lanes": {name: {"weight": lane.weight, "queued": lane.size, "accounts": len(lane.accounts)}
+                          for name, lane in self.lanes.items()},
+                "in_flight": sum(self.in_flight.values()),
+                "account_concurrency": self.account_concurrency,
+            }
@@ -5,4 +5,58 @@ class ConfigVarType(enum.Enum):
     INTEGER = "integer"
     FLOAT = "float"
     BOOLEAN = "boolean"
-    JSON = "json"
\ No newline at end of file
+    JSON = "json"
+
+class MessageStatus(enum.Enum):
+    STORED = "stored"
+    QUEUED = "queued"
+    SENDING = "sending"
+    RETRYING = "retrying"
+    SENT = "sent"
+    DEAD_LETTER = "dead_letter"
+
+MESSAGE_STATUS_TRANSITIONS = {
+    MessageStatus.STORED: {MessageStatus.QUEUED, MessageStatus.SENDING, MessageStatus.DEAD_LETTER},
+    MessageStatus.QUEUED: {MessageStatus.SENDING, MessageStatus.RETRYING, MessageStatus.DEAD_LETTER},
+    MessageStatus.SENDING: {MessageStatus.SENT, MessageStatus.RETRYING, MessageStatus.DEAD_LETTER},
+    MessageStatus.RETRYING: {MessageStatus.QUEUED, MessageStatus.SENDING, MessageStatus.DEAD_LETTER},
+    MessageStatus.SENT: {MessageStatus.QUEUED, MessageStatus.SENDING},
+    MessageStatus.DEAD_LETTER: {MessageStatus.RETRYING},
+}
+
+PURGEABLE_STATUSES = (MessageStatus.STORED, MessageStatus.SENT, MessageStatus.DEAD_LETTER)
+
+class FanOutMode(enum.Enum):
+    CHUNKED = "chunked"
+    PER_RECIPIENT = "per_recipient"
+    TEMPLATE = "template"
+
+class MessagePriority(enum.Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    BULK = "bulk"
+
+class TransportKind(enum.Enum):
+    EWS = "ews"
+    SMTP = "smtp"
+    SINK = "sink"
+
+class MessageEvent(enum.Enum):
+    STORED = "stored"
+    QUEUED = "queued"
+    RETRIEVED = "retrieved"
+    SENDING = "sending"
+    SENT = "sent"
+    CHUNK_SENT = "chunk_sent"
+    CHUNK_FAILED = "chunk_failed"
+    RETRY_SCHEDULED = "retry_scheduled"
+    DEAD_LETTERED = "dead_lettered"
+    REQUEUED = "requeued"
+    SKIPPED = "skipped"
+    PURGED = "purged"
+    ERROR = "error"
+
+class FailureClass(enum.Enum):
+    TRANSIENT = "transient"
+    THROTTLED = "throttled"
+    PERMANENT = "permanent"
@@ -0,0 +1,211 @@
+from typing import *
+
+from collections import OrderedDict, deque
+from datetime import datetime
+from threading import Lock
+
+from app.core.metrics import EVENTS_PUBLISHED_TOTAL, EVENTS_DROPPED_TOTAL
+
+import asyncio
+import json
+import time
+
+class Subscription:
+    __slots__ = ("loop", "message_id", "account", "queue", "wake", "pending", "dropped")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, message_id: Optional[str] = None,
+                 account: Optional[str] = None, queue_size: int = 256):
+        self.loop = loop
+        self.message_id = message_id
+        self.account = account
+        self.queue: Deque[Dict[str, Any]] = deque(maxlen=queue_size)
+        self.wake = asyncio.Event()
+        self.pending = False
+        self.dropped = 0
+
+    def push(self, event: Dict[str, Any]) -> bool:
+        # A slow subscriber loses its oldest events instead of growing without bound.
+        dropped = len(self.queue) == self.queue.maxlen
+        if dropped:
+            self.dropped += 1
+        self.queue.append(event)
+
+        # Publishers run on worker threads; one wake-up per burst is enough for the subscriber to drain it.
+        if not self.pending:
+            self.pending = True
+            try:
+                self.loop.call_soon_threadsafe(self.wake.set)
+            except RuntimeError:
+                pass
+
+        return dropped
+
+    async def next_events(self, timeout: float) -> List[Dict[str, Any]]:
+        if not self.queue:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        self.wake.clear()
+        self.pending = False
+
+        events = []
+        while self.queue:
+            events.append(self.queue.popleft())
+        return events
+
+class EventBus:
+    def __init__(self, history: int = 1024, cached_routes: int = 100000):
+        self.lock = Lock()
+        self.everyone: Set[Subscription] = set()
+        self.by_message: Dict[str, Set[Subscription]] = {}
+        self.by_account: Dict[str, Set[Subscription]] = {}
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.routes: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.cached_routes = cached_routes
+        # Seeded from the clock so event ids keep growing across restarts and Last-Event-ID stays meaningful.
+        self.sequence = time.time_ns() // 1000
+        self.queue_size = 256
+        self.ping_interval = 15.0
+        self.published = 0
+        self.delivered = 0
+
+    def configure(self, queue_size: int, ping_interval: float):
+        self.queue_size = max(1, queue_size)
+        self.ping_interval = max(1.0, ping_interval)
+
+    def subscribe(self, message_id: Optional[str] = None, account: Optional[str] = None,
+                  last_event_id: Optional[int] = None,
+                  resolve_account: Optional[Callable[[str], Optional[str]]] = None) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), message_id, account, self.queue_size)
+
+        with self.lock:
+            if message_id is not None:
+                self.by_message.setdefault(message_id, set()).add(subscription)
+            elif account is not None:
+                self.by_account.setdefault(account, set()).add(subscription)
+            else:
+                self.everyone.add(subscription)
+
+            missed = [event for event in self.history if last_event_id is not None and event["id"] > last_event_id]
+
+        for event in missed:
+            if account is not None and event.get("account") is None and event.get("message_id"):
+                event["account"] = self.account_for(event["message_id"], resolve_account)
+            if self.matches(subscription, event):
+                subscription.push(event)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            for key, index in ((subscription.message_id, self.by_message), (subscription.account, self.by_account)):
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del index[key]
+            self.everyone.discard(subscription)
+
+    @staticmethod
+    def matches(subscription: Subscription, event: Dict[str, Any]) -> bool:
+        if subscription.message_id is not None:
+            return event.get("message_id") == subscription.message_id
+        if subscription.account is not None:
+            return event.get("account") == subscription.account
+        return True
+
+    def remember(self, message_id: str, account: Optional[str]):
+        with self.lock:
+            self.routes[message_id] = account
+            self.routes.move_to_end(message_id)
+            while len(self.routes) > self.cached_routes:
+                self.routes.popitem(last=False)
+
+    def account_for(self, message_id: str,
+                    resolve_account: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+        with self.lock:
+            if message_id in self.routes:
+                self.routes.move_to_end(message_id)
+                return self.routes[message_id]
+
+        if resolve_account is None:
+            return None
+
+        account = resolve_account(message_id)
+        self.remember(message_id, account)
+        return account
+
+    def publish(self, kind: str, message_id: Optional[str] = None, account: Optional[str] = None,
+                resolve_account: Optional[Callable[[str], Optional[str]]] = None, **fields):
+        # Only look the account up when someone is filtering by account.
+        if account is None and message_id is not None and self.by_account:
+            account = self.account_for(message_id, resolve_account)
+
+        with self.lock:
+            self.sequence += 1
+            event = {
+                "id": self.sequence,
+                "type": kind,
+                "message_id": message_id,
+                "account": account,
+                "timestamp": datetime.now().isoformat(),
+                **fields
+            }
+            self.history.append(event)
+            self.published += 1
+
+            targets = list(self.everyone)
+            if message_id is not None:
+                targets.extend(self.by_message.get(message_id, ()))
+            if account is not None:
+                targets.extend(self.by_account.get(account, ()))
+
+            dropped = sum(subscription.push(event) for subscription in targets)
+            self.delivered += len(targets)
+
+        EVENTS_PUBLISHED_TOTAL.inc(kind)
+        if dropped:
+            EVENTS_DROPPED_TOTAL.inc(amount=dropped)
+
+        return event
+
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return (
+                len(self.everyone)
+                + sum(len(subscribers) for subscribers in self.by_message.values())
+                + sum(len(subscribers) for subscribers in self.by_account.values())
+            )
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "subscribers": {
+                    "all": len(self.everyone),
+                    "messages": sum(len(subscribers) for subscribers in self.by_message.values()),
+                    "accounts": sum(len(subscribers) for subscribers in self.by_account.values()),
+                },
+                "published": self.published,
+                "delivered": self.delivered,
+                "history": len(self.history),
+                "last_event_id": self.sequence,
+            }
+
+event_bus = EventBus()
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+async def sse_stream(subscription: Subscription, bus: EventBus = event_bus) -> AsyncIterator[str]:
+    try:
+        yield "retry: 3000\n: subscribed\n\n"
+        while True:
+            events = await subscription.next_events(bus.ping_interval)
+            if not events:
+                yield ": ping\n\n"
+                continue
+            yield "".join(format_sse(event) for event in events)
+    finally:
+        bus.unsubscribe(subscription)
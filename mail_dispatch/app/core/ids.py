@@ -0,0 +1,47 @@
+from typing import *
+
+from threading import Lock
+
+import os
+import time
+import uuid
+
+COUNTER_BITS = 12
+COUNTER_MAX = (1 << COUNTER_BITS) - 1
+
+class UUID7Generator:
+    def __init__(self):
+        self.lock = Lock()
+        self.last_ms = 0
+        self.counter = 0
+
+    def next_stamp(self) -> Tuple[int, int]:
+        with self.lock:
+            now_ms = time.time_ns() // 1_000_000
+
+            # Within one millisecond, or if the clock steps back, keep counting on the
+            # last timestamp so ids from this process stay strictly increasing.
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.counter = int.from_bytes(os.urandom(2), "big") & (COUNTER_MAX >> 1)
+            elif self.counter < COUNTER_MAX:
+                self.counter += 1
+            else:
+                self.last_ms += 1
+                self.counter = 0
+
+            return self.last_ms, self.counter
+
+    def __call__(self) -> uuid.UUID:
+        timestamp_ms, counter = self.next_stamp()
+        random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+
+        value = (timestamp_ms & ((1 << 48) - 1)) << 80
+        value |= 0x7 << 76 | counter << 64
+        value |= 0b10 << 62 | random_bits
+        return uuid.UUID(int=value)
+
+uuid7 = UUID7Generator()
+
+def new_message_id() -> str:
+    return str(uuid7())
@@ -1,15 +1,152 @@
 from typing import *
 from app.core.schemas import *
+from app.core.models import Message, MessageChunk, AccountSignature, RegisteredAccount
 
-from app.mail.send import send_message
+from app.mail.send import prepare_message, PreparedMessage
+from app.mail.transports import Transport, EwsTransport, open_transport
+from app.mail.fanout import needs_fan_out, split_recipients
+from app.mail.retry import classify_failure, compute_backoff, server_back_off
+from app.core.metrics import (
+    metrics, DB_FETCH_SECONDS, ACCOUNT_LOAD_SECONDS, SENDS_TOTAL, SEND_FAILURES_TOTAL,
+    PENDING_SENDS, DISPATCH_WAIT_SECONDS, CACHE_REQUESTS_TOTAL, PURGED_ROWS_TOTAL, PURGE_LAST_RUN_ROWS, PURGE_LOCK_SECONDS,
+    ARCHIVED_LOGS_TOTAL, BACKUPS_TOTAL, BACKUP_SECONDS, EWS_REQUESTS_TOTAL, EWS_CONNECTIONS_TOTAL, IMAGE_BYTES_SAVED_TOTAL
+)
 from app.core.database_handler import DataBaseHandler, ConfigVarType
+from app.core.dispatch import DispatchQueue, DispatchItem
+from app.core.vault import vault
+from app.core.responses import response_cache
+from app.mail.images import image_optimizer
+from app.core.profiling import sampling_profiler
+from app.core.compression import body_codec
+from app.core.blobs import blob_store, is_blob_digest
+from app.core.archive import log_archive, log_record
+from app.core.backup import backup_manager, BackupJob
+from app.core.events import event_bus
+from app.core.admission import admission
+from app.core.uploads import MessageUpload
 from app.markdown.format import render_mdx
 from app.config import config
 
-from datetime import datetime
-from exchangelib import Account, Credentials
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 import socket
+import threading
+import time
+
+CHUNK_PAGE_SIZE = 500
+
+UPLOAD_PATHS = ("/upload-msg", "/jit-upload-msg")
+
+REQUEST_LIMIT_KEYS = ("maxRequestBytes", "maxUploadBytes", "maxUploadMessageBytes", "maxAttachmentBytes")
+
+INGEST_PATHS = (
+    "/store-msg", "/store-msgs", "/store-template-msg", "/jit-send-msg", "/send-msg", "/send-msgs", *UPLOAD_PATHS
+)
+
+INITIAL_CONFIG_VARS = [
+    ("maxLogHistoryLength", "10000", ConfigVarType.INTEGER,
+     "Límite de registros en el historial de logs"),
+    ("maxMsgAntiquity", "43200", ConfigVarType.INTEGER,
+     "Límite de longevidad del mensaje mas antiguo guardado"),
+    ("maxSendAttempts", "5", ConfigVarType.INTEGER,
+     "Intentos de envío antes de mover el mensaje a dead-letter"),
+    ("retryBaseDelay", "30", ConfigVarType.FLOAT,
+     "Segundos de espera base para el back-off exponencial"),
+    ("retryMaxDelay", "3600", ConfigVarType.FLOAT,
+     "Segundos máximos de espera entre reintentos"),
+    ("retryPollInterval", "5", ConfigVarType.FLOAT,
+     "Segundos entre revisiones de mensajes pendientes de reintento"),
+    ("maxRecipientsPerMessage", "500", ConfigVarType.INTEGER,
+     "Destinatarios máximos por envío antes de dividir el mensaje en lotes"),
+    ("accountSendConcurrency", "4", ConfigVarType.INTEGER,
+     "Envíos simultáneos permitidos por cuenta"),
+    ("dispatchWorkers", "8", ConfigVarType.INTEGER,
+     "Hilos que despachan los envíos encolados"),
+    ("dispatchLaneWeights", '{"high": 16, "normal": 4, "bulk": 1}', ConfigVarType.JSON,
+     "Peso de cada cola de prioridad al repartir los hilos de despacho"),
+    ("maxRequestBytes", "10485760", ConfigVarType.INTEGER,
+     "Bytes máximos del cuerpo de una petición JSON"),
+    ("maxUploadBytes", "104857600", ConfigVarType.INTEGER,
+     "Bytes máximos del cuerpo de una subida multipart"),
+    ("maxAttachmentBytes", "26214400", ConfigVarType.INTEGER,
+     "Bytes máximos por adjunto subido"),
+    ("maxUploadMessageBytes", "1048576", ConfigVarType.INTEGER,
+     "Bytes máximos de la parte JSON del mensaje en una subida multipart"),
+    ("imageOptimization", "false", ConfigVarType.BOOLEAN,
+     "Recomprime las imágenes en línea y de firma antes de enviarlas"),
+    ("imageMaxDimension", "1600", ConfigVarType.INTEGER,
+     "Píxeles máximos por lado de una imagen en línea, requiere Pillow (0 sin límite)"),
+    ("imageJpegQuality", "85", ConfigVarType.INTEGER,
+     "Calidad máxima de las imágenes JPEG en línea, requiere Pillow (0 no las recodifica)"),
+    ("profilerMinInterval", "0.005", ConfigVarType.FLOAT,
+     "Segundos mínimos entre muestras del perfilador, acota su sobrecarga"),
+    ("profilerMaxSeconds", "900", ConfigVarType.FLOAT,
+     "Segundos máximos que el perfilador puede quedar encendido"),
+    ("smtpPoolSize", "4", ConfigVarType.INTEGER,
+     "Conexiones SMTP autenticadas que se mantienen abiertas por cuenta"),
+    ("smtpIdleTimeout", "30", ConfigVarType.FLOAT,
+     "Segundos de inactividad tras los que una conexión SMTP se comprueba con NOOP antes de reutilizarla"),
+    ("ewsPoolSize", "4", ConfigVarType.INTEGER,
+     "Sesiones HTTP simultáneas por cuenta de Exchange"),
+    ("ewsTimeout", "120", ConfigVarType.FLOAT,
+     "Segundos de espera por petición a Exchange"),
+    ("ewsRetryMaxWait", "0", ConfigVarType.FLOAT,
+     "Segundos que exchangelib reintenta ante throttling antes de fallar (0 falla de inmediato)"),
+    ("ewsKeepAliveInterval", "45", ConfigVarType.FLOAT,
+     "Segundos entre pings a las sesiones inactivas de Exchange (0 desactiva)"),
+    ("credentialCacheTTL", "900", ConfigVarType.FLOAT,
+     "Segundos que una contraseña descifrada permanece en memoria"),
+    ("responseCacheTTL", "30", ConfigVarType.FLOAT,
+     "Segundos que se reutiliza una respuesta de cuentas o firmas ya serializada"),
+    ("purgeInterval", "600", ConfigVarType.FLOAT,
+     "Segundos entre ejecuciones de la purga de mensajes antiguos"),
+    ("purgeBatchSize", "500", ConfigVarType.INTEGER,
+     "Mensajes eliminados por lote durante la purga"),
+    ("purgeBatchPause", "0.05", ConfigVarType.FLOAT,
+     "Segundos de pausa entre lotes de la purga para liberar la base de datos"),
+    ("purgeIncrementalVacuum", "true", ConfigVarType.BOOLEAN,
+     "Recuperar espacio en disco con incremental_vacuum tras la purga"),
+    ("logArchiveEnabled", "true", ConfigVarType.BOOLEAN,
+     "Mover los logs que superan maxLogHistoryLength a segmentos comprimidos en lugar de borrarlos"),
+    ("logArchiveSegmentSize", "10000", ConfigVarType.INTEGER,
+     "Registros de log por segmento de archivo"),
+    ("logArchiveInterval", "60", ConfigVarType.FLOAT,
+     "Segundos entre ejecuciones del archivado de logs"),
+    ("logArchiveRetentionDays", "0", ConfigVarType.INTEGER,
+     "Días que se conservan los segmentos de logs archivados (0 = sin límite)"),
+    ("databaseWalMode", "true", ConfigVarType.BOOLEAN,
+     "Usar el modo WAL de SQLite para que las lecturas y las copias de seguridad no bloqueen las escrituras"),
+    ("backupInterval", "0", ConfigVarType.FLOAT,
+     "Segundos entre copias de seguridad programadas de la base de datos (0 = desactivadas)"),
+    ("backupRetention", "7", ConfigVarType.INTEGER,
+     "Número de copias de seguridad que se conservan (0 = sin límite)"),
+    ("backupPagesPerStep", "256", ConfigVarType.INTEGER,
+     "Páginas de la base de datos copiadas en cada paso de la copia de seguridad"),
+    ("backupStepPause", "0.005", ConfigVarType.FLOAT,
+     "Segundos de pausa entre pasos de la copia de seguridad"),
+    ("eventStreamQueueSize", "256", ConfigVarType.INTEGER,
+     "Eventos pendientes por suscriptor del stream antes de descartar los más antiguos"),
+    ("eventStreamPingInterval", "15", ConfigVarType.FLOAT,
+     "Segundos sin eventos tras los que el stream envía un ping para mantener la conexión"),
+    ("admissionMaxInFlight", "32", ConfigVarType.INTEGER,
+     "Peticiones de envío o almacenamiento atendidas a la vez antes de responder 429 (0 = sin límite)"),
+    ("admissionMaxQueued", "10000", ConfigVarType.INTEGER,
+     "Envíos en cola antes de rechazar nuevas peticiones con 429 (0 = sin límite)"),
+    ("admissionMaxQueuedPerAccount", "2000", ConfigVarType.INTEGER,
+     "Envíos en cola o en curso por cuenta antes de rechazar sus peticiones con 429 (0 = sin límite)"),
+    ("admissionRetryAfter", "1", ConfigVarType.INTEGER,
+     "Segundos mínimos indicados en Retry-After al rechazar una petición"),
+    ("searchIndexInterval", "2", ConfigVarType.FLOAT,
+     "Segundos entre ejecuciones del indexador de búsqueda"),
+    ("bodyCompression", "auto", ConfigVarType.STRING,
+     "Códec de compresión del cuerpo de los mensajes (auto, zstd, zlib, none)"),
+    ("bodyCompressionLevel", "0", ConfigVarType.INTEGER,
+     "Nivel de compresión del cuerpo (0 usa el valor por defecto del códec)"),
+    ("bodyCompressionMinSize", "512", ConfigVarType.INTEGER,
+     "Bytes mínimos del cuerpo para comprimirlo"),
+]
 
 def find_available_port():
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -27,8 +164,77 @@ class MailDispatchKernel:
         self.db_handler = DataBaseHandler()
 
         self.set_initial_config_vars()
+        self.db_handler.set_journal_mode(self.db_handler.get_config_variable("databaseWalMode").get_var())
+
+        self.configure_vault()
+        self.configure_response_cache()
+
+        self.configure_image_optimizer()
+
+        self.configure_body_codec()
+
+        self.configure_event_bus()
+
+        self.opened_accounts: Dict[str, "Account"] = {}
+        self.transports: Dict[str, Transport] = {}
+
+        self.account_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.account_slots_lock = threading.Lock()
+
+        self.retry_stop_event = threading.Event()
+        self.retry_thread: Optional[threading.Thread] = None
+
+        self.purge_stop_event = threading.Event()
+        self.purge_thread: Optional[threading.Thread] = None
+
+        self.index_stop_event = threading.Event()
+        self.index_thread: Optional[threading.Thread] = None
+
+        self.keepalive_stop_event = threading.Event()
+        self.keepalive_thread: Optional[threading.Thread] = None
+
+        self.archive_stop_event = threading.Event()
+        self.archive_thread: Optional[threading.Thread] = None
+
+        self.backup_stop_event = threading.Event()
+        self.backup_thread: Optional[threading.Thread] = None
 
-        self.opened_accounts: Dict[str, Account] = {}
+        self.dispatch_queue = DispatchQueue()
+        self.dispatch_threads: List[threading.Thread] = []
+        self.dispatch_lock = threading.Lock()
+
+        self.request_limits: Dict[str, int] = {}
+        self.configure_request_limits()
+
+        self.configure_admission()
+        admission.bind(queued=lambda: len(self.dispatch_queue), account_backlog=self.dispatch_queue.account_backlog)
+
+        metrics.gauge(
+            "maildispatch_retry_backlog",
+            "Messages waiting for a retry",
+            callback=self.db_handler.count_retry_backlog
+        )
+        metrics.gauge(
+            "maildispatch_search_queue_depth",
+            "Messages stored but not yet added to the full-text index",
+            callback=self.db_handler.count_search_queue
+        )
+        metrics.gauge(
+            "maildispatch_dispatch_queue_depth",
+            "Sends waiting for a dispatch worker per priority lane",
+            ("lane",),
+            callback=self.dispatch_queue.depths
+        )
+        metrics.gauge(
+            "maildispatch_ingest_in_flight",
+            "Ingest requests being handled right now",
+            callback=lambda: admission.in_flight
+        )
+        metrics.gauge(
+            "maildispatch_event_subscribers",
+            "Open status stream subscriptions",
+            callback=event_bus.subscriber_count
+        )
 
     def get_addr(self):
         return self.host, self.port
@@ -43,26 +249,55 @@ class MailDispatchKernel:
         try:
             _ = self.db_handler.get_list_registered_accounts()
             health["database"] = True
+            health["log_archive"] = self.db_handler.get_log_segments_summary()
         except Exception:
             health["database"] = False
 
-        health["status"] = "ok" if (health["database"]) else "error"
+        last_backup = backup_manager.last_success()
+        health["backup"] = {
+            "running": backup_manager.running,
+            "last_success": last_backup.isoformat() if last_backup is not None else None
+        }
+
+        requests = int(EWS_REQUESTS_TOTAL.values.get((), 0))
+        connections = int(EWS_CONNECTIONS_TOTAL.values.get((), 0))
+        health["ews"] = {
+            "requests": requests,
+            "connections": connections,
+            "reused": max(0, requests - connections),
+            "sessions": {
+                name: account.protocol.session_pool_size
+                for name, account in list(self.opened_accounts.items())
+                if hasattr(account, "protocol")
+            }
+        }
+        health["dispatch"] = {**self.dispatch_queue.status(), "workers": len(self.dispatch_threads)}
+        health["events"] = event_bus.status()
+        health["transports"] = {name: transport.status() for name, transport in list(self.transports.items())}
+
+        health["admission"] = admission.status()
+
+        if not health["database"]:
+            health["status"] = "error"
+        elif health["admission"]["overloaded"]:
+            health["status"] = "degraded"
+        else:
+            health["status"] = "ok"
         return health
 
     def set_initial_config_vars(self):
-        self.db_handler.store_config_variable(
-            "maxLogHistoryLength", "10000", ConfigVarType.INTEGER, 
-            "Límite de registros en el historial de logs"
-        )
-        self.db_handler.store_config_variable(
-            "maxMsgAntiquity", "43200", ConfigVarType.INTEGER, 
-            "Límite de longevidad del mensaje mas antiguo guardado"
-        )
+        existing_keys = self.db_handler.get_config_variable_keys()
+
+        for key, value, var_type, description in INITIAL_CONFIG_VARS:
+            if key not in existing_keys:
+                self.db_handler.store_config_variable(key, value, var_type, description)
     
     def load_account(self, account_name: str):
         open_account = self.opened_accounts.get(account_name)
 
         if open_account is None:
+            CACHE_REQUESTS_TOTAL.inc("accounts", "miss")
+
             account = self.db_handler.get_registered_account(
                 account_name=account_name
             )
@@ -70,20 +305,173 @@ class MailDispatchKernel:
             if account is None:
                 return None
 
-            credentials = Credentials(
-                username=account.email, 
-                password=account.get_password()
-            )
-            open_account = Account(
-                primary_smtp_address=account.email, 
-                credentials=credentials, 
-                autodiscover=True
-            )
-
+            open_account = self.open_ews_account(account)
             self.opened_accounts[account_name] = open_account
+        else:
+            CACHE_REQUESTS_TOTAL.inc("accounts", "hit")
 
         return open_account
+
+    def open_ews_account(self, account: RegisteredAccount) -> "Account":
+        from exchangelib import Account, Credentials
+        from app.mail.protocol import configure_protocol
+
+        configure_protocol(self.db_handler.get_config_variable("ewsTimeout").get_var())
+
+        credentials = Credentials(
+            username=account.email, 
+            password=account.get_password()
+        )
+        open_account = Account(
+            primary_smtp_address=account.email, 
+            credentials=credentials, 
+            autodiscover=True
+        )
+        self.tune_account(open_account)
+
+        return open_account
+
+    def load_transport(self, account_name: str) -> Optional[Transport]:
+        transport = self.transports.get(account_name)
+        if transport is not None:
+            return transport
+
+        if account_name in self.opened_accounts:
+            return EwsTransport(self.load_account(account_name))
+
+        account = self.db_handler.get_registered_account(account_name)
+        if account is None:
+            return None
+
+        if (account.transport or TransportKind.EWS.value) == TransportKind.EWS.value:
+            open_account = self.load_account(account_name)
+            return EwsTransport(open_account) if open_account is not None else None
+
+        transport = open_transport(
+            account,
+            smtp_pool_size=self.db_handler.get_config_variable("smtpPoolSize").get_var(),
+            smtp_idle_timeout=self.db_handler.get_config_variable("smtpIdleTimeout").get_var(),
+            timeout=self.db_handler.get_config_variable("ewsTimeout").get_var()
+        )
+
+        with self.account_slots_lock:
+            existing = self.transports.setdefault(account_name, transport)
+        if existing is not transport:
+            transport.close()
+
+        return existing
+
+    def close_transports(self):
+        with self.account_slots_lock:
+            transports, self.transports = self.transports, {}
+
+        for transport in transports.values():
+            transport.close()
     
+    def tune_account(self, account: "Account"):
+        from app.mail.protocol import tune_account
+
+        tune_account(
+            account,
+            pool_size=self.db_handler.get_config_variable("ewsPoolSize").get_var(),
+            max_wait=self.db_handler.get_config_variable("ewsRetryMaxWait").get_var()
+        )
+
+    def keep_accounts_warm(self) -> int:
+        accounts = [account for account in list(self.opened_accounts.values()) if hasattr(account, "protocol")]
+        if not accounts:
+            return 0
+
+        from app.mail.protocol import keep_warm
+
+        timeout = self.db_handler.get_config_variable("ewsTimeout").get_var()
+        return sum(keep_warm(account, timeout)[0] for account in accounts)
+
+    def start_profiler(self, interval: float, duration: float) -> Optional[Dict[str, Any]]:
+        interval = max(interval, self.db_handler.get_config_variable("profilerMinInterval").get_var())
+        duration = min(duration, self.db_handler.get_config_variable("profilerMaxSeconds").get_var())
+
+        if not sampling_profiler.start(interval, duration):
+            return None
+
+        self.db_handler.log_details(
+            details=f"🔬 Sampling profiler started every {interval}s for up to {duration}s"
+        )
+        return {"interval": interval, "duration": duration}
+
+    def memory_inventory(self) -> Dict[str, int]:
+        return {
+            "opened_accounts": len(self.opened_accounts),
+            "account_slots": len(self.account_slots),
+            "credentials": len(vault.entries),
+            "responses": len(response_cache.entries),
+            "event_subscribers": event_bus.subscriber_count(),
+            "event_history": len(event_bus.history),
+            "images": len(image_optimizer.cache),
+            "image_bytes": sum(len(content) for content in list(image_optimizer.cache.values())),
+        }
+
+    def update_account(self, account_name: str, 
+                       email: Optional[str] = None, 
+                       plain_password: Optional[str] = None,
+                       transport: Optional[str] = None,
+                       transport_options: Optional[Dict[str, Any]] = None):
+        updated = self.db_handler.update_registered_account(
+            account_name, email, plain_password, transport, transport_options
+        )
+
+        vault.invalidate(account_name)
+        self.opened_accounts.pop(account_name, None)
+
+        with self.account_slots_lock:
+            open_transport = self.transports.pop(account_name, None)
+        if open_transport is not None:
+            open_transport.close()
+
+        return updated
+
+    def rotate_account_secrets(self):
+        try:
+            rotated = self.db_handler.rotate_account_passwords()
+        except Exception as error:
+            self.db_handler.log_details(
+                details=f"❌ Can not re-encrypt account credentials, nothing was changed: {error!r}"
+            )
+            return None
+
+        vault.invalidate()
+        self.db_handler.log_details(
+            details=f"🔑 Re-encrypted credentials of {rotated} account(s) with the primary key"
+        )
+
+        return rotated
+
+    def train_compression_dictionary(self, samples: int = 500, dict_size: int = 64 * 1024):
+        bodies = self.db_handler.get_body_samples(samples)
+
+        if len(bodies) < 8:
+            self.db_handler.log_details(
+                details=f"❌ Not enough stored messages to train a compression dictionary ({len(bodies)} found)"
+            )
+            return None
+
+        try:
+            codec, data = body_codec.train(bodies, dict_size)
+        except Exception as error:
+            self.db_handler.log_details(
+                details=f"❌ Can not train a compression dictionary: {error!r}"
+            )
+            return None
+
+        dictionary_id = self.db_handler.store_compression_dictionary(codec, data, len(bodies))
+        body_codec.register_dictionary(dictionary_id, codec, data)
+
+        self.db_handler.log_details(
+            details=f"🗜️ Compression dictionary #{dictionary_id} trained on {len(bodies)} message(s), {len(data)} bytes"
+        )
+
+        return {"dictionary_id": dictionary_id, "codec": codec, "size": len(data), "samples": len(bodies)}
+
     def get_message(self, message_id: str) -> MessageData:
         try:
             message = self.db_handler.get_message(message_id)
@@ -92,7 +480,8 @@ class MailDispatchKernel:
             
             self.db_handler.log_details(
                 message_id=message_id,
-                details="✅ Message retrieved from database"
+                details="✅ Message retrieved from database",
+                event=MessageEvent.RETRIEVED
             )
 
             return message
@@ -100,23 +489,25 @@ class MailDispatchKernel:
         except Exception as error:
             self.db_handler.log_details(
                 message_id=message_id,
-                details=error
+                details=error,
+                event=MessageEvent.ERROR
             )
             raise
 
     def store_message(self, payload_data: MessageData):
         try:
             account_name = payload_data.account_name
-            account = self.load_account(account_name)
+            transport = self.load_transport(account_name)
 
             message = self.db_handler.store_new_message(payload_data)
 
-            if account is None:
+            if transport is None:
                 raise ValueError(f"❌ Given mail account '{account_name}' does not exist")
             
             self.db_handler.log_details(
                 message_id=message.id, 
-                details="✅ Message stored for future dispatch"
+                details="✅ Message stored for future dispatch",
+                event=MessageEvent.STORED
             )
 
             return message
@@ -124,39 +515,736 @@ class MailDispatchKernel:
         except Exception as error:
             self.db_handler.log_details(
                 message_id=message.id, 
-                details=error
+                details=error,
+                event=MessageEvent.ERROR
             )
 
 
+    def configure_vault(self):
+        vault.ttl = self.db_handler.get_config_variable("credentialCacheTTL").get_var()
+
+    def configure_response_cache(self):
+        response_cache.ttl = self.db_handler.get_config_variable("responseCacheTTL").get_var()
+
+    def configure_image_optimizer(self):
+        image_optimizer.configure(
+            enabled=self.db_handler.get_config_variable("imageOptimization").get_var(),
+            max_dimension=self.db_handler.get_config_variable("imageMaxDimension").get_var(),
+            jpeg_quality=self.db_handler.get_config_variable("imageJpegQuality").get_var()
+        )
+
+    def configure_body_codec(self):
+        body_codec.configure(
+            codec=self.db_handler.get_config_variable("bodyCompression").get_var(),
+            level=self.db_handler.get_config_variable("bodyCompressionLevel").get_var(),
+            min_size=self.db_handler.get_config_variable("bodyCompressionMinSize").get_var()
+        )
+
+    def configure_event_bus(self):
+        event_bus.configure(
+            queue_size=self.db_handler.get_config_variable("eventStreamQueueSize").get_var(),
+            ping_interval=self.db_handler.get_config_variable("eventStreamPingInterval").get_var()
+        )
+
+    # Read on the event loop for every request, so the values are cached and refreshed by /upd-confvar.
+    def configure_request_limits(self):
+        self.request_limits = {key: self.db_handler.get_config_variable(key).get_var() for key in REQUEST_LIMIT_KEYS}
+
+    def request_size_limit(self, path: str) -> int:
+        key = "maxUploadBytes" if path in UPLOAD_PATHS else "maxRequestBytes"
+        return self.request_limits[key]
+
+    async def receive_upload(self, stream: AsyncIterator[bytes], content_type: Optional[str]) -> MessageData:
+        upload = MessageUpload(
+            content_type,
+            max_message_bytes=self.request_limits["maxUploadMessageBytes"],
+            max_attachment_bytes=self.request_limits["maxAttachmentBytes"]
+        )
+
+        try:
+            async for data in stream:
+                upload.feed(data)
+            return upload.finish()
+        except BaseException:
+            upload.abort()
+            await run_in_threadpool(self.remove_unreferenced_blobs, upload.digests)
+            raise
+
+    def store_upload(self, payload_data: MessageData):
+        digests = [
+            attachment["blob"] for attachment in payload_data.attachments or []
+            if isinstance(attachment, dict) and attachment.get("blob")
+        ]
+
+        message = None
+        try:
+            message = self.store_message(payload_data)
+        finally:
+            if message is None:
+                self.remove_unreferenced_blobs(digests)
+
+        return message
+
+    def store_template_message(self, payload_data: TemplateMessageData):
+        account_name = payload_data.account_name
+        if self.load_transport(account_name) is None:
+            raise ValueError(f"❌ Given mail account '{account_name}' does not exist")
+
+        first = payload_data.recipients[0]
+        try:
+            render_mdx(payload_data.subject, {**payload_data.context, **first.context})
+            render_mdx(payload_data.html_body, {**payload_data.context, **first.context})
+        except Exception as error:
+            raise ValueError(f"❌ Template can not be rendered for '{first.address}': {error!r}") from error
+
+        message = self.db_handler.store_template_message(payload_data)
+        if message is None:
+            raise ValueError("❌ Template message could not be stored, see logs")
+
+        self.db_handler.log_details(
+            message_id=message.id,
+            details=f"✅ Template message stored for {len(payload_data.recipients)} recipient(s)",
+            event=MessageEvent.STORED
+        )
+
+        return message
+
     def send_message(self, message_id: str):
+        message = None
         try:
-            message = self.db_handler.get_message(message_id)
+            with DB_FETCH_SECONDS.time():
+                message = self.db_handler.get_message(message_id)
 
             if message is None:
                 raise ValueError(f"❌ Given message id '{message_id}' does not exist in the database")
 
+            if message.status == MessageStatus.DEAD_LETTER:
+                self.db_handler.log_details(
+                    message_id=message.id,
+                    details="⚠️ Message is dead-lettered, requeue it before sending",
+                    event=MessageEvent.SKIPPED
+                )
+                return
+
+            if message.next_retry_at is not None and message.next_retry_at > datetime.now():
+                # Hand it back to the retry worker, which only picks up RETRYING messages.
+                self.db_handler.update_message_status(message.id, MessageStatus.RETRYING)
+                self.db_handler.log_details(
+                    message_id=message.id,
+                    details=f"⏳ Message is backing off until {message.next_retry_at.isoformat()}",
+                    event=MessageEvent.SKIPPED
+                )
+                return
+
+            if not self.db_handler.update_message_status(message.id, MessageStatus.SENDING):
+                self.db_handler.log_details(
+                    message_id=message.id,
+                    details=f"⚠️ Message can not be sent from status '{message.status.value}'",
+                    event=MessageEvent.SKIPPED
+                )
+                return
+
             account_name = message.account_name
-            account = self.load_account(account_name)
+            with ACCOUNT_LOAD_SECONDS.time():
+                transport = self.load_transport(account_name)
 
             signature_key = None
 
             if message.use_signature:
                 signature_key = self.db_handler.get_account_signature(account_name)
 
-            if account is None:
+            if transport is None:
                 raise ValueError(f"❌ Given mail account '{account_name}' does not exist")
-            
-            send_message(account, message, signature_key)
 
+            fan_out = FanOutMode(message.fan_out) if message.fan_out else None
+            limit = self.db_handler.get_config_variable("maxRecipientsPerMessage").get_var()
+
+            if needs_fan_out(message.to_recipients, message.cc_recipients, limit, fan_out):
+                saved_bytes = self.send_fan_out(transport, message, signature_key, limit, fan_out)
+            else:
+                prepared = prepare_message(message, signature_key)
+                with self.account_slot(account_name):
+                    transport.send(message, prepared, message.to_recipients, message.cc_recipients)
+
+                saved_bytes = prepared.saved_bytes
+                IMAGE_BYTES_SAVED_TOTAL.inc(amount=saved_bytes)
+
+            self.db_handler.update_message_status(
+                message.id, MessageStatus.SENT,
+                attempts=(message.attempts or 0) + 1,
+                next_retry_at=None,
+                last_error=None
+            )
+            SENDS_TOTAL.inc(account_name)
             self.db_handler.log_details(
                 message_id=message.id, 
-                details="✅ Sending success"
+                details=f"✅ Sending success, {saved_bytes} byte(s) of images saved" if saved_bytes else "✅ Sending success",
+                event=MessageEvent.SENT
             )
         except Exception as error:
+            if message is None:
+                self.db_handler.log_details(details=error, event=MessageEvent.ERROR)
+                return
+
+            self.handle_send_failure(message, error)
+
+    def account_slot(self, account_name: str) -> threading.BoundedSemaphore:
+        slot = self.account_slots.get(account_name)
+
+        if slot is None:
+            with self.account_slots_lock:
+                slot = self.account_slots.get(account_name)
+                if slot is None:
+                    concurrency = self.db_handler.get_config_variable("accountSendConcurrency").get_var()
+                    slot = threading.BoundedSemaphore(max(1, concurrency))
+                    self.account_slots[account_name] = slot
+
+        return slot
+
+    def send_fan_out(self, transport: Transport, message: Message, signature_key: Optional[AccountSignature],
+                     limit: int, fan_out: Optional[FanOutMode] = None):
+        if not self.db_handler.has_message_chunks(message.id):
+            self.db_handler.store_message_chunks(
+                message.id, split_recipients(message.to_recipients, message.cc_recipients, limit, fan_out)
+            )
+
+        prepared = prepare_message(message, signature_key)
+        workers = self.db_handler.get_config_variable("accountSendConcurrency").get_var()
+
+        sent, errors = 0, []
+        after_index = -1
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fan-out") as pool:
+            while True:
+                pending = self.db_handler.get_pending_message_chunks(message.id, after_index, CHUNK_PAGE_SIZE)
+                if not pending:
+                    break
+
+                after_index = pending[-1].chunk_index
+                for error in pool.map(lambda chunk: self.send_chunk(transport, message, prepared, chunk), pending):
+                    if error is None:
+                        sent += 1
+                    else:
+                        errors.append(error)
+
+        saved_bytes = prepared.saved_bytes * sent
+        self.db_handler.log_details(
+            message_id=message.id,
+            details=f"📤 Fan-out sent {sent} chunk(s), {len(errors)} failed, {saved_bytes} byte(s) of images saved",
+            event=MessageEvent.CHUNK_SENT
+        )
+
+        if errors:
+            raise errors[0]
+
+        return saved_bytes
+
+    def send_chunk(self, transport: Transport, message: Message, prepared: PreparedMessage,
+                   chunk: MessageChunk) -> Optional[Exception]:
+        recipients = len(chunk.to_recipients) + len(chunk.cc_recipients or [])
+
+        try:
+            if message.fan_out == FanOutMode.TEMPLATE.value:
+                prepared = prepared.personalize({**(message.template_context or {}), **(chunk.context or {})})
+
+            with self.account_slot(message.account_name):
+                transport.send(message, prepared, chunk.to_recipients, chunk.cc_recipients)
+        except Exception as error:
+            self.db_handler.update_message_chunk(
+                chunk.id, MessageStatus.RETRYING,
+                attempts=chunk.attempts + 1,
+                last_error=str(error)
+            )
             self.db_handler.log_details(
-                message_id=message.id, 
-                details=error
+                message_id=message.id,
+                details=f"❌ Chunk {chunk.chunk_index} ({recipients} recipient(s)) failed: {error}",
+                event=MessageEvent.CHUNK_FAILED
+            )
+            return error
+
+        IMAGE_BYTES_SAVED_TOTAL.inc(amount=prepared.saved_bytes)
+        self.db_handler.update_message_chunk(
+            chunk.id, MessageStatus.SENT,
+            attempts=chunk.attempts + 1,
+            last_error=None,
+            sent_at=datetime.now()
+        )
+        return None
+
+    def configure_admission(self):
+        admission.configure(
+            max_in_flight=self.db_handler.get_config_variable("admissionMaxInFlight").get_var(),
+            max_queued=self.db_handler.get_config_variable("admissionMaxQueued").get_var(),
+            max_queued_per_account=self.db_handler.get_config_variable("admissionMaxQueuedPerAccount").get_var(),
+            retry_after=self.db_handler.get_config_variable("admissionRetryAfter").get_var()
+        )
+
+    def admit(self, account_name: Optional[str] = None, count: int = 1):
+        admission.check(account_name, count)
+
+    def schedule_send(self, message_id: str, priority: Optional[str] = None,
+                      default_priority: MessagePriority = MessagePriority.NORMAL, admit: bool = False,
+                      route: Optional[Tuple[str, Optional[str]]] = None):
+        account_name, stored_priority = route or self.db_handler.get_message_route(message_id) or ("", None)
+        lane = priority or stored_priority or default_priority.value
+
+        if admit:
+            self.admit(account_name)
+
+        # A sent fan-out keeps its chunk rows; sending it again must go out to every chunk.
+        self.db_handler.reset_sent_message_chunks(message_id)
+        if self.db_handler.update_message_status(message_id, MessageStatus.QUEUED):
+            self.db_handler.log_details(
+                message_id=message_id,
+                details=f"📬 Message queued for dispatch ({lane} priority)",
+                event=MessageEvent.QUEUED
+            )
+
+        if not self.dispatch_threads:
+            self.start_dispatch_workers()
+
+        PENDING_SENDS.inc()
+        self.dispatch_queue.put(message_id, lane, account_name)
+
+    def run_dispatch_item(self, item: DispatchItem):
+        PENDING_SENDS.dec()
+        DISPATCH_WAIT_SECONDS.observe(time.perf_counter() - item.enqueued_at, item.lane)
+        self.send_message(item.message_id)
+
+    def dispatch_worker(self):
+        while True:
+            item = self.dispatch_queue.get()
+            if item is None:
+                return
+
+            try:
+                self.run_dispatch_item(item)
+            except Exception as error:
+                self.db_handler.log_details(
+                    message_id=item.message_id,
+                    details=f"❌ Dispatch worker error: {error}",
+                    event=MessageEvent.ERROR
+                )
+            finally:
+                self.dispatch_queue.done(item)
+                admission.record_done(item.account_name)
+
+    def start_dispatch_workers(self):
+        with self.dispatch_lock:
+            if any(thread.is_alive() for thread in self.dispatch_threads):
+                return
+
+            self.dispatch_queue.configure(
+                self.db_handler.get_config_variable("dispatchLaneWeights").get_var() or {},
+                self.db_handler.get_config_variable("accountSendConcurrency").get_var()
+            )
+            self.dispatch_queue.open()
+
+            workers = max(1, self.db_handler.get_config_variable("dispatchWorkers").get_var())
+            self.dispatch_threads = [
+                threading.Thread(target=self.dispatch_worker, name=f"dispatch-worker-{i}", daemon=True)
+                for i in range(workers)
+            ]
+            for thread in self.dispatch_threads:
+                thread.start()
+
+    def stop_dispatch_workers(self):
+        # Sends still queued keep their QUEUED status and are picked up again by the retry recovery on startup.
+        self.dispatch_queue.close()
+
+        with self.dispatch_lock:
+            for thread in self.dispatch_threads:
+                thread.join(timeout=5)
+            self.dispatch_threads = []
+
+    def handle_send_failure(self, message: Message, error: Exception):
+        failure_class = classify_failure(error)
+        SEND_FAILURES_TOTAL.inc(failure_class.value, type(error.__cause__ or error).__name__)
+
+        attempts = (message.attempts or 0) + 1
+        max_attempts = self.db_handler.get_config_variable("maxSendAttempts").get_var()
+
+        if failure_class == FailureClass.PERMANENT or attempts >= max_attempts:
+            self.db_handler.update_message_status(
+                message.id, MessageStatus.DEAD_LETTER,
+                attempts=attempts,
+                next_retry_at=None,
+                last_error=str(error)
+            )
+            self.db_handler.log_details(
+                message_id=message.id,
+                details=f"☠️ Dead-lettered after {attempts} attempt(s) ({failure_class.value}): {error}",
+                event=MessageEvent.DEAD_LETTERED
+            )
+            return
+
+        delay = compute_backoff(
+            attempts,
+            base_delay=self.db_handler.get_config_variable("retryBaseDelay").get_var(),
+            max_delay=self.db_handler.get_config_variable("retryMaxDelay").get_var(),
+            failure_class=failure_class,
+            hint=server_back_off(error)
+        )
+        next_retry_at = datetime.now() + timedelta(seconds=delay)
+
+        self.db_handler.update_message_status(
+            message.id, MessageStatus.RETRYING,
+            attempts=attempts,
+            next_retry_at=next_retry_at,
+            last_error=str(error)
+        )
+        self.db_handler.log_details(
+            message_id=message.id,
+            details=f"🔁 Attempt {attempts} failed ({failure_class.value}), retrying at {next_retry_at.isoformat()}: {error}",
+            event=MessageEvent.RETRY_SCHEDULED
+        )
+
+    def process_due_retries(self):
+        for message_id in self.db_handler.get_due_retry_messages(datetime.now()):
+            if self.retry_stop_event.is_set():
+                break
+            self.schedule_send(message_id)
+
+    def retry_worker(self):
+        while not self.retry_stop_event.is_set():
+            try:
+                self.process_due_retries()
+            except Exception as error:
+                self.db_handler.log_details(
+                    details=f"❌ Retry worker error: {error}",
+                    event=MessageEvent.ERROR
+                )
+
+            poll_interval = self.db_handler.get_config_variable("retryPollInterval").get_var()
+            self.retry_stop_event.wait(poll_interval)
+
+    def start_retry_worker(self):
+        if self.retry_thread is not None and self.retry_thread.is_alive():
+            return
+
+        recovered = self.db_handler.recover_interrupted_sends()
+        if recovered:
+            self.db_handler.log_details(
+                details=f"🔁 {recovered} interrupted send(s) scheduled for retry",
+                event=MessageEvent.REQUEUED
             )
 
+        self.retry_stop_event.clear()
+        self.retry_thread = threading.Thread(target=self.retry_worker, name="retry-worker", daemon=True)
+        self.retry_thread.start()
+
+    def stop_retry_worker(self):
+        self.retry_stop_event.set()
+
+        if self.retry_thread is not None:
+            self.retry_thread.join(timeout=5)
+            self.retry_thread = None
+
+    def purge_expired_messages(self):
+        max_antiquity = self.db_handler.get_config_variable("maxMsgAntiquity").get_var()
+        batch_size = self.db_handler.get_config_variable("purgeBatchSize").get_var()
+        pause = self.db_handler.get_config_variable("purgeBatchPause").get_var()
+
+        cutoff = datetime.now() - timedelta(minutes=max_antiquity)
+        summary = {"messages": 0, "message_logs": 0, "batches": 0, "max_lock_ms": 0.0, "freed_pages": 0, "blobs": 0}
+        digests = set()
+
+        while not self.purge_stop_event.is_set():
+            messages, logs, lock_seconds, blobs = self.db_handler.purge_expired_messages_batch(cutoff, batch_size)
+            if not messages:
+                break
+
+            digests.update(blobs)
+            PURGE_LOCK_SECONDS.observe(lock_seconds)
+            summary["messages"] += messages
+            summary["message_logs"] += logs
+            summary["batches"] += 1
+            summary["max_lock_ms"] = max(summary["max_lock_ms"], lock_seconds * 1000)
+
+            if messages < batch_size:
+                break
+            self.purge_stop_event.wait(pause)
+
+        summary["blobs"] = self.remove_unreferenced_blobs(digests)
+
+        if summary["messages"] and self.db_handler.get_config_variable("purgeIncrementalVacuum").get_var():
+            while not self.purge_stop_event.is_set():
+                freed, remaining = self.db_handler.incremental_vacuum()
+                summary["freed_pages"] += freed
+                if not freed or not remaining:
+                    break
+                self.purge_stop_event.wait(pause)
+
+        for table in ("messages", "message_logs"):
+            PURGED_ROWS_TOTAL.inc(table, amount=summary[table])
+            PURGE_LAST_RUN_ROWS.set(summary[table], table)
+
+        if summary["messages"]:
+            self.db_handler.log_details(
+                details=f"🧹 Purged {summary['messages']} message(s) and {summary['message_logs']} log(s) older than "
+                        f"{cutoff.isoformat()} in {summary['batches']} batch(es), max lock {summary['max_lock_ms']:.1f} ms",
+                event=MessageEvent.PURGED
+            )
+
+        return summary
+
+    def remove_unreferenced_blobs(self, digests: Iterable[str]) -> int:
+        digests = [digest for digest in digests if is_blob_digest(digest)]
+        return sum(blob_store.remove(digest) for digest in self.db_handler.get_unreferenced_blobs(digests))
+
+    def purge_worker(self):
+        while not self.purge_stop_event.is_set():
+            try:
+                self.purge_expired_messages()
+            except Exception as error:
+                self.db_handler.log_details(
+                    details=f"❌ Purge worker error: {error}",
+                    event=MessageEvent.ERROR
+                )
+
+            interval = self.db_handler.get_config_variable("purgeInterval").get_var()
+            self.purge_stop_event.wait(interval)
+
+    def start_purge_worker(self):
+        if self.purge_thread is not None and self.purge_thread.is_alive():
+            return
+
+        self.purge_stop_event.clear()
+        self.purge_thread = threading.Thread(target=self.purge_worker, name="purge-worker", daemon=True)
+        self.purge_thread.start()
+
+    def stop_purge_worker(self):
+        self.purge_stop_event.set()
+
+        if self.purge_thread is not None:
+            self.purge_thread.join(timeout=5)
+            self.purge_thread = None
+
+    def archive_logs(self):
+        keep = self.db_handler.get_config_variable("maxLogHistoryLength").get_var()
+        segment_size = max(1, self.db_handler.get_config_variable("logArchiveSegmentSize").get_var())
+        retention_days = self.db_handler.get_config_variable("logArchiveRetentionDays").get_var()
+        summary = {"logs": 0, "segments": 0, "bytes": 0, "expired_segments": 0}
+
+        while not self.archive_stop_event.is_set():
+            logs = self.db_handler.get_archivable_logs(keep, segment_size)
+            if not logs:
+                break
+
+            file_name, size = log_archive.write_segment([log_record(log) for log in logs])
+            try:
+                archived = self.db_handler.store_log_segment(file_name, size, logs)
+            except Exception:
+                log_archive.remove_segment(file_name)
+                raise
+
+            ARCHIVED_LOGS_TOTAL.inc(amount=archived)
+            summary["logs"] += archived
+            summary["segments"] += 1
+            summary["bytes"] += size
+
+        if retention_days > 0:
+            cutoff = datetime.now() - timedelta(days=retention_days)
+            for file_name in self.db_handler.expire_log_segments(cutoff):
+                log_archive.remove_segment(file_name)
+                summary["expired_segments"] += 1
+
+        if summary["segments"] or summary["expired_segments"]:
+            self.db_handler.log_details(
+                details=f"🗄️ Archived {summary['logs']} log(s) into {summary['segments']} segment(s) "
+                        f"({summary['bytes']} bytes), {summary['expired_segments']} expired segment(s) removed",
+                event=MessageEvent.PURGED
+            )
+
+        return summary
+
+    def archive_worker(self):
+        while not self.archive_stop_event.is_set():
+            if self.db_handler.get_config_variable("logArchiveEnabled").get_var():
+                try:
+                    self.archive_logs()
+                except Exception as error:
+                    self.db_handler.log_details(
+                        details=f"❌ Log archive worker error: {error}",
+                        event=MessageEvent.ERROR
+                    )
+
+            interval = self.db_handler.get_config_variable("logArchiveInterval").get_var()
+            self.archive_stop_event.wait(interval)
+
+    def start_archive_worker(self):
+        if self.archive_thread is not None and self.archive_thread.is_alive():
+            return
+
+        self.archive_stop_event.clear()
+        self.archive_thread = threading.Thread(target=self.archive_worker, name="archive-worker", daemon=True)
+        self.archive_thread.start()
+
+    def stop_archive_worker(self):
+        self.archive_stop_event.set()
+
+        if self.archive_thread is not None:
+            self.archive_thread.join(timeout=5)
+            self.archive_thread = None
+
+    def start_backup(self, trigger: str = "manual") -> Optional[BackupJob]:
+        database_path = self.db_handler.database_path()
+        if database_path is None:
+            raise RuntimeError("❌ Backups need a file-backed SQLite database")
+
+        return backup_manager.start(
+            database_path,
+            trigger=trigger,
+            pages_per_step=self.db_handler.get_config_variable("backupPagesPerStep").get_var(),
+            pause=self.db_handler.get_config_variable("backupStepPause").get_var(),
+            retention=self.db_handler.get_config_variable("backupRetention").get_var(),
+            on_finish=self.finish_backup
+        )
+
+    def finish_backup(self, job: BackupJob):
+        BACKUPS_TOTAL.inc(job.status)
+        BACKUP_SECONDS.observe(job.seconds)
+
+        if job.status == "done":
+            self.db_handler.log_details(
+                details=f"💾 Database snapshot {job.path} written ({job.size} bytes) in {job.seconds:.1f}s, "
+                        f"{job.steps} step(s), {job.restarts} restart(s)"
+            )
+        else:
+            self.db_handler.log_details(
+                details=f"❌ Database snapshot {job.path} {job.status}: {job.error}",
+                event=MessageEvent.ERROR
+            )
+
+    def backup_worker(self):
+        last_run = time.monotonic()
+
+        while not self.backup_stop_event.is_set():
+            interval = self.db_handler.get_config_variable("backupInterval").get_var()
+
+            if interval > 0 and time.monotonic() - last_run >= interval:
+                try:
+                    if self.start_backup("scheduled") is not None:
+                        last_run = time.monotonic()
+                except Exception as error:
+                    last_run = time.monotonic()
+                    self.db_handler.log_details(
+                        details=f"❌ Backup worker error: {error}",
+                        event=MessageEvent.ERROR
+                    )
+
+            self.backup_stop_event.wait(min(interval, 60) if interval > 0 else 60)
+
+    def start_backup_worker(self):
+        if self.backup_thread is not None and self.backup_thread.is_alive():
+            return
+
+        self.backup_stop_event.clear()
+        self.backup_thread = threading.Thread(target=self.backup_worker, name="backup-worker", daemon=True)
+        self.backup_thread.start()
+
+    def stop_backup_worker(self):
+        self.backup_stop_event.set()
+        backup_manager.cancel()
+
+        if self.backup_thread is not None:
+            self.backup_thread.join(timeout=5)
+            self.backup_thread = None
+
+    def index_worker(self):
+        while not self.index_stop_event.is_set():
+            try:
+                while self.db_handler.index_pending_messages() and not self.index_stop_event.is_set():
+                    pass
+            except Exception as error:
+                self.db_handler.log_details(
+                    details=f"❌ Search indexer error: {error}",
+                    event=MessageEvent.ERROR
+                )
+
+            interval = self.db_handler.get_config_variable("searchIndexInterval").get_var()
+            self.index_stop_event.wait(interval)
+
+    def start_index_worker(self):
+        if not self.db_handler.search_enabled:
+            return
+        if self.index_thread is not None and self.index_thread.is_alive():
+            return
+
+        self.index_stop_event.clear()
+        self.index_thread = threading.Thread(target=self.index_worker, name="index-worker", daemon=True)
+        self.index_thread.start()
+
+    def stop_index_worker(self):
+        self.index_stop_event.set()
+
+        if self.index_thread is not None:
+            self.index_thread.join(timeout=5)
+            self.index_thread = None
+
+    def keepalive_worker(self):
+        while not self.keepalive_stop_event.is_set():
+            interval = self.db_handler.get_config_variable("ewsKeepAliveInterval").get_var()
+
+            if interval > 0:
+                try:
+                    self.keep_accounts_warm()
+                except Exception as error:
+                    self.db_handler.log_details(
+                        details=f"❌ Exchange keep-alive error: {error}",
+                        event=MessageEvent.ERROR
+                    )
+
+            self.keepalive_stop_event.wait(interval if interval > 0 else 60)
+
+    def start_keepalive_worker(self):
+        if self.keepalive_thread is not None and self.keepalive_thread.is_alive():
+            return
+
+        self.keepalive_stop_event.clear()
+        self.keepalive_thread = threading.Thread(target=self.keepalive_worker, name="keepalive-worker", daemon=True)
+        self.keepalive_thread.start()
+
+    def stop_keepalive_worker(self):
+        self.keepalive_stop_event.set()
+
+        if self.keepalive_thread is not None:
+            self.keepalive_thread.join(timeout=5)
+            self.keepalive_thread = None
+
+    def requeue_dead_letters(self, message_ids: Optional[List[str]] = None):
+        requeued = 0
+        for message_id in self.db_handler.get_dead_letter_ids(message_ids):
+            if not self.db_handler.update_message_status(
+                message_id, MessageStatus.RETRYING,
+                attempts=0,
+                next_retry_at=datetime.now()
+            ):
+                continue
+
+            requeued += 1
+            self.db_handler.log_details(
+                message_id=message_id,
+                details="🔁 Requeued from the dead letters",
+                event=MessageEvent.REQUEUED
+            )
+
+        self.db_handler.log_details(
+            details=f"🔁 {requeued} dead-lettered message(s) requeued",
+            event=MessageEvent.REQUEUED
+        )
+
+        return requeued
+
+    def get_status_summary(self, since_minutes: int = 60, account_name: Optional[str] = None):
+        since = datetime.now() - timedelta(minutes=since_minutes)
+        accounts: Dict[str, Dict[str, int]] = {}
+        totals: Dict[str, int] = {}
+
+        for name, status, count in self.db_handler.get_status_counts(since, account_name):
+            accounts.setdefault(name, {})[status.value] = count
+            totals[status.value] = totals.get(status.value, 0) + count
+
+        return {"since": since.isoformat(), "accounts": accounts, "totals": totals}
+
     def format_mdx(self, template: str, context: Dict[str, Any]):
         return render_mdx(template, context)
\ No newline at end of file
@@ -0,0 +1,109 @@
+from typing import *
+
+from app.core.uploads import PayloadTooLarge
+from app.core.admission import AdmissionController, Overloaded
+
+import json
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app, limit_for: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit_for = limit_for
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+
+        limit = self.limit_for(scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            return await self.reject(send, limit)
+
+        received = 0
+        exceeded = started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise PayloadTooLarge(limit)
+            return message
+
+        # FastAPI turns errors raised while parsing a JSON body into a 400, so
+        # once the limit is hit whatever response the app produces becomes a 413.
+        async def tracked_send(message):
+            nonlocal started
+            if exceeded:
+                if message["type"] == "http.response.start" and not started:
+                    started = True
+                    await self.reject(send, limit)
+                return
+
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except PayloadTooLarge as error:
+            if started:
+                raise
+            await self.reject(send, error.limit)
+
+    async def reject(self, send, limit: int):
+        body = json.dumps({"message": f"❌ Request body exceeds {limit} bytes", "data": {"limit": limit}}).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def overloaded_content(error: Overloaded) -> Dict[str, Any]:
+    return {"message": str(error), "data": {"reason": error.reason, "limit": error.limit, "retry_after": error.retry_after}}
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str]):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        try:
+            self.controller.enter()
+        except Overloaded as error:
+            return await self.reject(send, error)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.leave()
+
+    async def reject(self, send, error: Overloaded):
+        body = json.dumps(overloaded_content(error), ensure_ascii=False).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(error.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
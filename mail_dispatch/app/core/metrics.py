@@ -0,0 +1,298 @@
+from typing import *
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+def escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        # Worker and API threads update the same values, and += is not atomic.
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            yield f"{self.name}{format_labels(self.label_names, label_values)} {value}"
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Any]] = None):
+        super().__init__(name, documentation, label_names)
+        self.callback = callback
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str):
+        with self.lock:
+            self.values[label_values] = value
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                value = self.callback()
+                if isinstance(value, dict):
+                    for label_values, v in value.items():
+                        self.set(v, *label_values)
+                else:
+                    self.set(value)
+            except Exception:
+                pass
+        yield from super().samples()
+
+class HistogramSeries:
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return Timer(self)
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], HistogramSeries] = {}
+        self.lock = Lock()
+
+    def labels(self, *label_values: str) -> HistogramSeries:
+        series = self.series.get(label_values)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(label_values, HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value: float, *label_values: str):
+        self.labels(*label_values).observe(value)
+
+    def time(self, *label_values: str):
+        return Timer(self.labels(*label_values))
+
+    def samples(self):
+        for label_values, series in list(self.series.items()):
+            with series.lock:
+                counts, total_sum = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = format_labels(self.label_names, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            total = cumulative + counts[-1]
+            labels = format_labels(self.label_names, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {total}"
+            yield f"{self.name}_sum{format_labels(self.label_names, label_values)} {total_sum}"
+            yield f"{self.name}_count{format_labels(self.label_names, label_values)} {total}"
+
+class Timer:
+    __slots__ = ("series", "start")
+
+    def __init__(self, series: HistogramSeries):
+        self.series = series
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.series.observe(perf_counter() - self.start)
+        return False
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Union[Counter, Gauge, Histogram]] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self.metrics.get(name) or self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+              callback: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.metrics.get(name) or self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+SEND_STAGE_SECONDS = metrics.histogram(
+    "maildispatch_send_stage_seconds",
+    "Latency of each stage of the send pipeline",
+    ("stage",)
+)
+DB_FETCH_SECONDS = SEND_STAGE_SECONDS.labels("db_fetch")
+ACCOUNT_LOAD_SECONDS = SEND_STAGE_SECONDS.labels("account_load")
+SIGNATURE_LOAD_SECONDS = SEND_STAGE_SECONDS.labels("signature_load")
+ATTACHMENT_DECODE_SECONDS = SEND_STAGE_SECONDS.labels("attachment_decode")
+EWS_SEND_SECONDS = SEND_STAGE_SECONDS.labels("ews_send")
+IMAGE_OPTIMIZE_SECONDS = SEND_STAGE_SECONDS.labels("image_optimize")
+SMTP_SEND_SECONDS = SEND_STAGE_SECONDS.labels("smtp_send")
+
+SENDS_TOTAL = metrics.counter(
+    "maildispatch_sends_total",
+    "Messages sent successfully per account",
+    ("account",)
+)
+SEND_FAILURES_TOTAL = metrics.counter(
+    "maildispatch_send_failures_total",
+    "Failed send attempts by failure class and error type",
+    ("failure_class", "error")
+)
+PENDING_SENDS = metrics.gauge(
+    "maildispatch_pending_sends",
+    "Sends queued for dispatch but not started yet"
+)
+DISPATCH_WAIT_SECONDS = metrics.histogram(
+    "maildispatch_dispatch_wait_seconds",
+    "Time a queued send waits for a dispatch worker per priority lane",
+    ("lane",)
+)
+DB_SESSIONS_TOTAL = metrics.counter(
+    "maildispatch_db_sessions_total",
+    "Database connections checked out of the pool"
+)
+DB_SESSIONS_ACTIVE = metrics.gauge(
+    "maildispatch_db_sessions_active",
+    "Database connections currently checked out of the pool"
+)
+CACHE_REQUESTS_TOTAL = metrics.counter(
+    "maildispatch_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result")
+)
+
+def cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    counts = dict(CACHE_REQUESTS_TOTAL.values)
+
+    ratios = {}
+    for cache in {cache for cache, _ in counts}:
+        hits = counts.get((cache, "hit"), 0)
+        total = hits + counts.get((cache, "miss"), 0)
+        ratios[(cache,)] = hits / total if total else 0.0
+    return ratios
+
+CACHE_HIT_RATIO = metrics.gauge(
+    "maildispatch_cache_hit_ratio",
+    "Share of cache lookups served from the cache",
+    ("cache",),
+    callback=cache_hit_ratios
+)
+
+PURGED_ROWS_TOTAL = metrics.counter(
+    "maildispatch_purged_rows_total",
+    "Rows deleted by the retention purger per table",
+    ("table",)
+)
+ARCHIVED_LOGS_TOTAL = metrics.counter(
+    "maildispatch_archived_logs_total",
+    "Log rows moved from the hot table into archive segments"
+)
+BACKUPS_TOTAL = metrics.counter(
+    "maildispatch_backups_total",
+    "Database snapshots attempted per result",
+    ("result",)
+)
+BACKUP_SECONDS = metrics.histogram(
+    "maildispatch_backup_seconds",
+    "Time taken to copy the database into a snapshot",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+).labels()
+EVENTS_PUBLISHED_TOTAL = metrics.counter(
+    "maildispatch_events_published_total",
+    "Status and log events published to stream subscribers per type",
+    ("type",)
+)
+EVENTS_DROPPED_TOTAL = metrics.counter(
+    "maildispatch_events_dropped_total",
+    "Events dropped because a stream subscriber fell behind"
+)
+ADMISSION_REJECTED_TOTAL = metrics.counter(
+    "maildispatch_admission_rejected_total",
+    "Ingest requests answered with 429 per limit that was hit",
+    ("reason",)
+)
+PURGE_LAST_RUN_ROWS = metrics.gauge(
+    "maildispatch_purge_last_run_rows",
+    "Rows deleted per table by the last retention purge run",
+    ("table",)
+)
+PURGE_LOCK_SECONDS = metrics.histogram(
+    "maildispatch_purge_lock_seconds",
+    "Time the retention purger holds the database write lock per batch"
+).labels()
+
+EWS_REQUESTS_TOTAL = metrics.counter(
+    "maildispatch_ews_requests_total",
+    "HTTP requests sent to Exchange, keep-alive pings included"
+)
+EWS_CONNECTIONS_TOTAL = metrics.counter(
+    "maildispatch_ews_connections_total",
+    "TCP/TLS connections opened to Exchange"
+)
+SMTP_CONNECTIONS_TOTAL = metrics.counter(
+    "maildispatch_smtp_connections_total",
+    "Authenticated SMTP sessions opened"
+)
+EWS_KEEPALIVE_PINGS_TOTAL = metrics.counter(
+    "maildispatch_ews_keepalive_pings_total",
+    "Keep-alive pings sent on idle Exchange sessions by result",
+    ("result",)
+)
+
+IMAGE_BYTES_SAVED_TOTAL = metrics.counter(
+    "maildispatch_image_bytes_saved_total",
+    "Bytes of inline images saved by optimization across all sends"
+)
@@ -0,0 +1,135 @@
+from typing import *
+
+from app.core.models import Base, Message
+from app.core.recipients import link_recipients
+from app.core.compression import body_codec
+from app.core.search import SEARCH_DDL, SEARCH_REBUILD, fts5_available
+
+from sqlalchemy import inspect, text, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+# Bump whenever a model gains a column, index or table so existing
+# databases run upgrade_schema again on the next start.
+SCHEMA_VERSION = 14
+
+def get_schema_version(engine: Engine) -> Optional[int]:
+    if engine.dialect.name != "sqlite":
+        return None
+
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar()
+
+def set_schema_version(engine: Engine, version: int):
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+def enable_incremental_vacuum(conn):
+    if conn.dialect.name == "sqlite" and not inspect(conn).get_table_names():
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+
+def column_ddl(column, engine: Engine) -> str:
+    ddl = f'"{column.name}" {column.type.compile(dialect=engine.dialect)}'
+
+    if column.server_default is not None:
+        default = column.server_default.arg
+        default = default.text if hasattr(default, "text") else f"'{default}'"
+        ddl += f" NOT NULL DEFAULT {default}" if not column.nullable else f" DEFAULT {default}"
+
+    return ddl
+
+def backfill_recipients(engine: Engine, batch_size: int = 5000):
+    messages = Message.__table__
+    last_id = ""
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(messages.c.id, messages.c.created_at, messages.c.to_recipients, messages.c.cc_recipients)
+                .where(messages.c.id > last_id)
+                .order_by(messages.c.id)
+                .limit(batch_size)
+            ).all()
+
+            if not rows:
+                return
+
+            link_recipients(conn, rows)
+            last_id = rows[-1].id
+
+def create_search_index(conn) -> bool:
+    if conn.dialect.name != "sqlite" or not fts5_available(conn):
+        return False
+
+    for statement in SEARCH_DDL:
+        conn.execute(text(statement))
+    return True
+
+def rebuild_search_index(engine: Engine):
+    with engine.begin() as conn:
+        if not fts5_available(conn):
+            return
+
+        for dictionary_id, codec, data in conn.execute(text("SELECT id, codec, data FROM compression_dictionaries")):
+            body_codec.register_dictionary(dictionary_id, codec, data)
+
+        for statement in SEARCH_REBUILD:
+            conn.execute(text(statement))
+
+def convert_to_incremental_vacuum(engine: Engine):
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.connect() as conn:
+        if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+            return
+
+    # An existing database only switches auto_vacuum on a full VACUUM, which can not run in a
+    # transaction and may renumber the message rowids the search index is keyed by.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+    rebuild_search_index(engine)
+
+DATA_MIGRATIONS = [
+    (6, backfill_recipients),
+    (7, rebuild_search_index),
+    (14, convert_to_incremental_vacuum),
+]
+
+def upgrade_schema(engine: Engine) -> bool:
+    previous_version = get_schema_version(engine)
+    if previous_version == SCHEMA_VERSION:
+        return False
+
+    with engine.begin() as conn:
+        enable_incremental_vacuum(conn)
+        Base.metadata.create_all(bind=conn)
+
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    conn.execute(text(
+                        f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl(column, engine)}'
+                    ))
+
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+        create_search_index(conn)
+
+    for version, migrate in DATA_MIGRATIONS:
+        if previous_version is not None and previous_version < version:
+            migrate(engine)
+
+    set_schema_version(engine, SCHEMA_VERSION)
+    return True
@@ -3,20 +3,21 @@ from pydantic import *
 
 from app.config import config
 from app.core.enums import *
+from app.core.vault import vault
+from app.core.compression import CompressedText, CompressedJSON
+from app.core.ids import new_message_id
 
 from sqlalchemy import (
     event, ForeignKey, Column, 
     Integer, Boolean, String, Text, 
-    DateTime, JSON, Enum, func, UniqueConstraint
+    DateTime, JSON, Enum, func, UniqueConstraint, Index, LargeBinary
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, relationship
 
-from cryptography.fernet import Fernet
 from datetime import datetime
 
 import json
-import uuid
 
 Base = declarative_base()
 
@@ -28,16 +29,17 @@ class RegisteredAccount(Base):
     email = Column(String(150), nullable=False, unique=True)
     password = Column(String(500), nullable=False)
 
+    transport = Column(String(20), nullable=False, default=TransportKind.EWS.value, server_default=TransportKind.EWS.value)
+    transport_options = Column(JSON, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     def set_password(self, plain_password: str):
-        fernet = Fernet(config.vars.account_secrets_fernet_key.encode())
-        self.password = fernet.encrypt(plain_password.encode())
+        self.password = vault.encrypt(plain_password)
 
     def get_password(self):
-        fernet = Fernet(config.vars.account_secrets_fernet_key.encode())
-        return fernet.decrypt(self.password).decode()
+        return vault.get_password(self.account_name, self.password)
     
 class AccountSignature(Base):
     __tablename__ = "account_signatures"
@@ -71,35 +73,149 @@ def ensure_single_enabled_signature(session, flush_context, instances):
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=new_message_id)
     hash_value = Column(String(64), nullable=False, unique=True)
     account_name = Column(String(150), nullable=False)
     subject = Column(String(512), nullable=False)
     to_recipients = Column(JSON, nullable=False)
     cc_recipients = Column(JSON, nullable=True)
-    attachments = Column(JSON, nullable=True)
+    attachments = Column(CompressedJSON, nullable=True)
     
-    html_body = Column(Text, nullable=False)
+    html_body = Column(CompressedText, nullable=False)
     use_signature = Column(Boolean, nullable=True)
-    created_at = Column(DateTime, default=datetime.now)
+    fan_out = Column(String(20), nullable=True)
+    priority = Column(String(10), nullable=True)
+    template_context = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+    status = Column(Enum(MessageStatus), nullable=False, default=MessageStatus.STORED, server_default=MessageStatus.STORED.name, index=True)
+    status_changed_at = Column(DateTime, nullable=True, default=datetime.now)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_retry_at = Column(DateTime, nullable=True, index=True)
+    last_error = Column(Text, nullable=True)
 
     logs = relationship("MessageLog", back_populates="message")
+    chunks = relationship("MessageChunk", back_populates="message", order_by="MessageChunk.chunk_index")
+
+    __table_args__ = (
+        Index("ix_messages_status_changed", "status_changed_at", "account_name", "status"),
+    )
 
     def __repr__(self):
         return f"<Message(id={self.id}, subject='{self.subject}', status='{self.status}')>"
 
+Index("ix_messages_subject_lower", func.lower(Message.subject))
+
+class Recipient(Base):
+    __tablename__ = "recipients"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    address = Column(String(320), nullable=False, unique=True)
+    domain = Column(String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<Recipient(id={self.id}, address='{self.address}')>"
+
+class MessageRecipient(Base):
+    __tablename__ = "message_recipients"
+
+    message_id = Column(String(36), ForeignKey("messages.id"), primary_key=True)
+    recipient_id = Column(Integer, ForeignKey("recipients.id"), primary_key=True)
+    kind = Column(String(2), nullable=False, default="to")
+    domain = Column(String(255), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_message_recipients_recipient", "recipient_id", "created_at"),
+        Index("ix_message_recipients_domain", "domain", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<MessageRecipient(message_id={self.message_id}, recipient_id={self.recipient_id}, kind='{self.kind}')>"
+
+class MessageChunk(Base):
+    __tablename__ = "message_chunks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    message_id = Column(String(36), ForeignKey("messages.id"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    to_recipients = Column(JSON, nullable=False)
+    cc_recipients = Column(JSON, nullable=True)
+    context = Column(JSON, nullable=True)
+    status = Column(Enum(MessageStatus), nullable=False, default=MessageStatus.STORED)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    message = relationship("Message", back_populates="chunks")
+
+    __table_args__ = (
+        UniqueConstraint("message_id", "chunk_index", name="uq_message_chunk_index"),
+    )
+
+    def __repr__(self):
+        return f"<MessageChunk(message_id={self.message_id}, chunk_index={self.chunk_index}, status='{self.status}')>"
+
+class MessageBlob(Base):
+    __tablename__ = "message_blobs"
+
+    message_id = Column(String(36), ForeignKey("messages.id"), primary_key=True)
+    digest = Column(String(64), primary_key=True, index=True)
+    size = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<MessageBlob(message_id={self.message_id}, digest={self.digest})>"
+
+class SearchQueue(Base):
+    __tablename__ = "search_queue"
+
+    message_rowid = Column(Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f"<SearchQueue(message_rowid={self.message_rowid})>"
+
 class MessageLog(Base):
     __tablename__ = "message_logs"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    message_id = Column(String(36), ForeignKey("messages.id"), nullable=True)
+    message_id = Column(String(36), ForeignKey("messages.id"), nullable=True, index=True)
+    event = Column(Enum(MessageEvent), nullable=True, index=True)
     details = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.now)
 
     message = relationship("Message", back_populates="logs")
 
     def __repr__(self):
-        return f"<MessageLog(id={self.id}, message_id={self.message_id}, details='{self.details}')>"
+        return f"<MessageLog(id={self.id}, message_id={self.message_id}, event={self.event}, details='{self.details}')>"
+
+class LogSegment(Base):
+    __tablename__ = "log_segments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_name = Column(String(255), nullable=False, unique=True)
+    first_log_id = Column(Integer, nullable=False)
+    last_log_id = Column(Integer, nullable=False, index=True)
+    min_timestamp = Column(DateTime, nullable=True)
+    max_timestamp = Column(DateTime, nullable=True, index=True)
+    rows = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    message_filter = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<LogSegment(id={self.id}, file_name='{self.file_name}', logs={self.first_log_id}..{self.last_log_id}, rows={self.rows})>"
+
+class CompressionDictionary(Base):
+    __tablename__ = "compression_dictionaries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    codec = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<CompressionDictionary(id={self.id}, codec={self.codec}, size={len(self.data or b'')}, samples={self.samples})>"
 
 class ConfigVariable(Base):
     __tablename__ = "config_variables"
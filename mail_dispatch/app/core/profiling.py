@@ -0,0 +1,203 @@
+from typing import *
+
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+
+import os
+import sys
+import threading
+import tracemalloc
+
+# Threads parked in these frames are idle, sampling them would bury the busy stacks.
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+TRACEMALLOC_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+OTHER_STACKS = "[other stacks]"
+
+class SamplingProfiler:
+    def __init__(self, max_stacks: int = 20000, max_depth: int = 96):
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.lock = Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.labels: Dict[Any, str] = {}
+        self.reset(0.0)
+
+    def reset(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, interval: float, duration: float) -> bool:
+        with self.lock:
+            if self.running:
+                return False
+
+            self.reset(interval)
+            self.stop_event.clear()
+            self.started_at = perf_counter()
+            self.thread = threading.Thread(target=self.run, args=(duration,), name="sampling-profiler", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self) -> str:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        return self.collapsed()
+
+    def run(self, duration: float):
+        own_ident = threading.get_ident()
+        deadline = self.started_at + duration
+
+        while not self.stop_event.wait(self.interval) and perf_counter() < deadline:
+            start = perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = self.collapse(frame, names.get(ident, str(ident)))
+                if stack is None:
+                    continue
+
+                with self.lock:
+                    if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                        stack = OTHER_STACKS
+                    self.stacks[stack] += 1
+
+            self.samples += 1
+            self.sampling_seconds += perf_counter() - start
+
+        self.stopped_at = perf_counter()
+
+    def label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            path = code.co_filename.replace("\\", "/").split("/")
+            label = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def collapse(self, frame, thread_name: str) -> Optional[str]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            frames.append(self.label(frame.f_code))
+            frame = frame.f_back
+        frames.append(thread_name.replace(" ", "_"))
+
+        return ";".join(reversed(frames))
+
+    def collapsed(self) -> str:
+        with self.lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.stopped_at or perf_counter()) - self.started_at
+
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "elapsed_seconds": round(elapsed, 3),
+            "overhead": round(self.sampling_seconds / elapsed, 4) if elapsed else 0.0,
+        }
+
+class MemoryTracker:
+    def __init__(self, max_frames: int = 25):
+        self.max_frames = max_frames
+        self.lock = Lock()
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.previous: Optional[tracemalloc.Snapshot] = None
+        self.latest: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 1) -> bool:
+        if tracemalloc.is_tracing():
+            return False
+
+        tracemalloc.start(max(1, min(frames, self.max_frames)))
+        with self.lock:
+            self.baseline = self.previous = self.latest = None
+        return True
+
+    def stop(self):
+        tracemalloc.stop()
+        with self.lock:
+            self.baseline = self.previous = self.latest = None
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("❌ tracemalloc is not running, start it first")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+        with self.lock:
+            if self.baseline is None:
+                self.baseline = snapshot
+            self.previous, self.latest = self.latest, snapshot
+        return snapshot
+
+    def top(self, limit: int = 25, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        if self.latest is None:
+            raise RuntimeError("❌ No tracemalloc snapshot taken yet")
+
+        return [self.format(stat, group_by) for stat in self.latest.statistics(group_by)[:limit]]
+
+    def diff(self, limit: int = 25, group_by: str = "lineno", against: str = "baseline") -> List[Dict[str, Any]]:
+        reference = self.baseline if against == "baseline" else self.previous
+        if self.latest is None or reference is None or reference is self.latest:
+            raise RuntimeError(f"❌ Take another snapshot to diff against the {against} one")
+
+        return [self.format(stat, group_by) for stat in self.latest.compare_to(reference, group_by)[:limit]]
+
+    def format(self, stat, group_by: str) -> Dict[str, Any]:
+        frame = stat.traceback[-1]
+        entry = {
+            "location": f"{frame.filename}:{frame.lineno}" if group_by != "filename" else frame.filename,
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        if hasattr(stat, "size_diff"):
+            entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+            entry["count_diff"] = stat.count_diff
+        if group_by == "traceback":
+            entry["traceback"] = [f"{step.filename}:{step.lineno}" for step in stat.traceback]
+        return entry
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            "snapshots": len({id(snapshot) for snapshot in (self.baseline, self.previous, self.latest) if snapshot is not None}),
+        }
+
+sampling_profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
@@ -0,0 +1,52 @@
+from typing import *
+
+from app.core.models import Recipient, MessageRecipient
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from datetime import datetime
+
+MAX_SQL_VARIABLES = 900
+
+def normalize_address(address: str) -> str:
+    return address.strip().lower()
+
+def address_domain(address: str) -> str:
+    return address.rpartition("@")[2]
+
+def link_recipients(conn, messages: Iterable[Tuple[str, datetime, Optional[List[str]], Optional[List[str]]]]) -> int:
+    links: Dict[Tuple[str, str], Tuple[str, datetime]] = {}
+    for message_id, created_at, to_recipients, cc_recipients in messages:
+        for kind, addresses in (("cc", cc_recipients), ("to", to_recipients)):
+            for address in addresses or []:
+                links[(message_id, normalize_address(address))] = (kind, created_at)
+
+    if not links:
+        return 0
+
+    addresses = sorted({address for _, address in links})
+    conn.execute(
+        sqlite_insert(Recipient).on_conflict_do_nothing(),
+        [{"address": address, "domain": address_domain(address)} for address in addresses]
+    )
+
+    recipient_ids: Dict[str, int] = {}
+    for start in range(0, len(addresses), MAX_SQL_VARIABLES):
+        chunk = addresses[start:start + MAX_SQL_VARIABLES]
+        recipient_ids.update(conn.execute(
+            select(Recipient.address, Recipient.id).where(Recipient.address.in_(chunk))
+        ).all())
+
+    conn.execute(
+        sqlite_insert(MessageRecipient).on_conflict_do_nothing(),
+        [
+            {
+                "message_id": message_id, "recipient_id": recipient_ids[address], "kind": kind,
+                "domain": address_domain(address), "created_at": created_at
+            }
+            for (message_id, address), (kind, created_at) in links.items()
+        ]
+    )
+
+    return len(links)
@@ -0,0 +1,94 @@
+from typing import *
+
+from app.core.metrics import CACHE_REQUESTS_TOTAL
+
+from fastapi.responses import Response
+from threading import Lock
+
+import hashlib
+import json
+import time
+
+def load_orjson():
+    try:
+        import orjson
+        return orjson
+    except ImportError:
+        return None
+
+_orjson = load_orjson()
+
+def dumps(content: Any) -> bytes:
+    if _orjson is not None:
+        return _orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status_code: int
+    etag: str
+    expires_at: float
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+class ResponseCache:
+    def __init__(self, ttl: float = 30):
+        self.ttl = ttl
+        self.lock = Lock()
+        self.entries: Dict[Tuple[str, ...], CachedResponse] = {}
+        self.generation = 0
+
+    def get(self, key: Tuple[str, ...], build: Callable[[], Tuple[Any, int]]) -> CachedResponse:
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                CACHE_REQUESTS_TOTAL.inc("responses", "hit")
+                return entry
+            generation = self.generation
+
+        CACHE_REQUESTS_TOTAL.inc("responses", "miss")
+        content, status_code = build()
+        body = dumps(content)
+        entry = CachedResponse(body, status_code, make_etag(body), now + self.ttl)
+
+        # A write that lands while the response is built makes it stale, so it is served but not kept.
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = entry
+
+        return entry
+
+    def respond(self, key: Tuple[str, ...], build: Callable[[], Tuple[Any, int]],
+                if_none_match: Optional[str] = None) -> Response:
+        entry = self.get(key, build)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+
+        if entry.status_code == 200 and etag_matches(if_none_match, entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=entry.body,
+            status_code=entry.status_code,
+            media_type="application/json",
+            headers=headers
+        )
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def __repr__(self):
+        return f"<ResponseCache(entries={len(self.entries)}, ttl={self.ttl})>"
+
+response_cache = ResponseCache()
@@ -2,7 +2,7 @@ from typing import *
 from pydantic import *
 
 from app.core.enums import *
-from app.json.schemas import MessageData
+from app.json.schemas import MessageData, TemplateMessageData, check_attachment_blobs
 
 from datetime import datetime
 
@@ -10,6 +10,8 @@ class RegisteredAccountSchema(BaseModel):
     id: int
     account_name: str
     email: str
+    transport: str = "ews"
+    transport_options: Optional[Dict[str, Any]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -33,6 +35,7 @@ class AccountSignatureSchema(BaseModel):
         return v.isoformat() if v else None
 
 class MessageSchema(MessageData):
+    id: str
     account_name: str
     subject: str
     to_recipients: List[str]
@@ -40,7 +43,37 @@ class MessageSchema(MessageData):
     attachments: Optional[List[Any]] = None
     html_body: str
     use_signature: Optional[bool] = None
+    fan_out: Optional[str] = None
+    template_context: Optional[Dict[str, Any]] = None
     created_at: datetime
+    status: MessageStatus
+    status_changed_at: Optional[datetime] = None
+    attempts: int = 0
+    next_retry_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("attachments")
+    def check_attachments(cls, v):
+        return check_attachment_blobs(v, allow_blobs=True)
+
+    @field_serializer("created_at", "status_changed_at", "next_retry_at")
+    def _ser_dt(self, v):
+        return v.isoformat() if v else None
+
+    @field_serializer("status")
+    def _ser_status(self, v):
+        return v.value
+
+class MessageSummarySchema(BaseModel):
+    id: str
+    account_name: str
+    subject: str
+    to_recipients: List[str]
+    cc_recipients: Optional[List[str]] = None
+    created_at: datetime
+    status: MessageStatus
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -48,9 +81,36 @@ class MessageSchema(MessageData):
     def _ser_dt(self, v):
         return v.isoformat() if v else None
 
+    @field_serializer("status")
+    def _ser_status(self, v):
+        return v.value
+
+class MessageChunkSchema(BaseModel):
+    id: int
+    message_id: str
+    chunk_index: int
+    to_recipients: List[str]
+    cc_recipients: Optional[List[str]] = None
+    context: Optional[Dict[str, Any]] = None
+    status: MessageStatus
+    attempts: int = 0
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_serializer("sent_at")
+    def _ser_dt(self, v):
+        return v.isoformat() if v else None
+
+    @field_serializer("status")
+    def _ser_status(self, v):
+        return v.value
+
 class MessageLogSchema(BaseModel):
     id: int
     message_id: Optional[str] = None
+    event: Optional[MessageEvent] = None
     details: str
     timestamp: datetime
 
@@ -60,6 +120,10 @@ class MessageLogSchema(BaseModel):
     def _ser_dt(self, v):
         return v.isoformat() if v else None
 
+    @field_serializer("event")
+    def _ser_event(self, v):
+        return v.value if v else None
+
 class ConfigVariableSchema(BaseModel):
     key: str
     value: str
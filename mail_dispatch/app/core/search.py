@@ -0,0 +1,125 @@
+from typing import *
+
+from app.core.compression import body_codec
+
+from sqlalchemy import text
+from html import unescape
+
+import re
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+HIDDEN_PATTERN = re.compile(r"<(script|style|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+HIDDEN_MARKERS = ("<style", "<script", "<head", "<STYLE", "<SCRIPT", "<HEAD")
+TOKEN_PATTERN = re.compile(r"\w+\*?")
+
+SEARCH_DDL = [
+    """CREATE VIEW IF NOT EXISTS messages_search_source AS
+        SELECT rowid AS message_rowid, subject, mail_body_text(html_body) AS body FROM messages""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        subject, body,
+        content='messages_search_source', content_rowid='message_rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT OR IGNORE INTO search_queue(message_rowid) VALUES (new.rowid);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, subject, body)
+        SELECT 'delete', old.rowid, old.subject, mail_body_text(old.html_body)
+        WHERE NOT EXISTS (SELECT 1 FROM search_queue WHERE message_rowid = old.rowid);
+        DELETE FROM search_queue WHERE message_rowid = old.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF subject, html_body ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, subject, body)
+        SELECT 'delete', old.rowid, old.subject, mail_body_text(old.html_body)
+        WHERE NOT EXISTS (SELECT 1 FROM search_queue WHERE message_rowid = old.rowid);
+        INSERT OR IGNORE INTO search_queue(message_rowid) VALUES (new.rowid);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+        details,
+        content='message_logs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON message_logs BEGIN
+        INSERT INTO logs_fts(rowid, details) VALUES (new.id, new.details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON message_logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, details) VALUES ('delete', old.id, old.details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF details ON message_logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, details) VALUES ('delete', old.id, old.details);
+        INSERT INTO logs_fts(rowid, details) VALUES (new.id, new.details);
+    END""",
+]
+
+SEARCH_REBUILD = [
+    "DELETE FROM search_queue",
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+    "INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')",
+]
+
+INDEX_PENDING_SQL = [
+    """INSERT INTO messages_fts(rowid, subject, body)
+        SELECT m.rowid, m.subject, mail_body_text(m.html_body) FROM messages m
+        WHERE m.rowid IN (SELECT message_rowid FROM search_queue ORDER BY message_rowid LIMIT :limit)""",
+    """DELETE FROM search_queue
+        WHERE message_rowid IN (SELECT message_rowid FROM search_queue ORDER BY message_rowid LIMIT :limit)""",
+]
+
+RANKED_SEARCH_SQL = """
+    SELECT message_id, MIN(score) AS score, source FROM (
+        SELECT m.id AS message_id, bm25(messages_fts, 5.0, 1.0) AS score, 'message' AS source
+        FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid
+        WHERE messages_fts MATCH :match
+        UNION ALL
+        SELECT l.message_id AS message_id, bm25(logs_fts) AS score, 'log' AS source
+        FROM logs_fts JOIN message_logs l ON l.id = logs_fts.rowid
+        WHERE logs_fts MATCH :match AND l.message_id IS NOT NULL
+    )
+    GROUP BY message_id
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+"""
+
+MESSAGE_SNIPPETS_SQL = """
+    SELECT m.id, snippet(messages_fts, -1, '<mark>', '</mark>', '…', 16)
+    FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid
+    WHERE messages_fts MATCH :match AND m.id IN ({ids})
+"""
+
+LOG_SNIPPETS_SQL = """
+    SELECT l.message_id, snippet(logs_fts, 0, '<mark>', '</mark>', '…', 16)
+    FROM logs_fts JOIN message_logs l ON l.id = logs_fts.rowid
+    WHERE logs_fts MATCH :match AND l.message_id IN ({ids})
+"""
+
+def html_to_text(html: Optional[str]) -> str:
+    if not html:
+        return ""
+    if any(marker in html for marker in HIDDEN_MARKERS):
+        html = HIDDEN_PATTERN.sub(" ", html)
+    stripped = TAG_PATTERN.sub(" ", html)
+    if "&" in stripped:
+        stripped = unescape(stripped)
+    return " ".join(stripped.split())
+
+def mail_body_text(value: Union[str, bytes, None]) -> str:
+    if isinstance(value, bytes):
+        value = body_codec.decompress(value).decode("utf-8")
+    return html_to_text(value)
+
+def register_search_functions(dbapi_connection, connection_record=None):
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("mail_body_text", 1, mail_body_text, deterministic=True)
+
+def fts5_available(conn) -> bool:
+    options = {row[0] for row in conn.execute(text("PRAGMA compile_options"))}
+    return "ENABLE_FTS5" in options
+
+def build_match_query(query: str) -> Optional[str]:
+    terms = []
+    for token in TOKEN_PATTERN.findall(query):
+        word, star = token.rstrip("*"), token.endswith("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if star else ""))
+    return " ".join(terms) or None
@@ -0,0 +1,192 @@
+from typing import *
+
+from app.core.blobs import blob_store, BlobWriter
+from app.json.schemas import MessageData
+
+from email.message import Message as HeaderMessage
+from email.parser import HeaderParser
+
+MAX_PART_HEADER_BYTES = 16 * 1024
+
+class PayloadTooLarge(Exception):
+    def __init__(self, limit: int, what: str = "Request body"):
+        super().__init__(f"❌ {what} exceeds {limit} bytes")
+        self.limit = limit
+
+class MultipartError(ValueError):
+    pass
+
+def parse_boundary(content_type: Optional[str]) -> bytes:
+    header = HeaderMessage()
+    header["content-type"] = content_type or ""
+
+    if header.get_content_type() != "multipart/form-data":
+        raise MultipartError("❌ Expected a multipart/form-data body")
+
+    boundary = header.get_param("boundary")
+    if not boundary:
+        raise MultipartError("❌ Multipart boundary is missing")
+
+    return boundary.encode("latin-1")
+
+class MultipartParser:
+    PREAMBLE, HEADERS, BODY, DONE = range(4)
+
+    def __init__(self, boundary: bytes,
+                 on_part_begin: Callable[[HeaderMessage], None],
+                 on_part_data: Callable[[bytes], None],
+                 on_part_end: Callable[[], None]):
+        self.delimiter = b"\r\n--" + boundary
+        self.on_part_begin = on_part_begin
+        self.on_part_data = on_part_data
+        self.on_part_end = on_part_end
+
+        # The leading CRLF lets the first boundary match the same delimiter as the rest.
+        self.buffer = bytearray(b"\r\n")
+        self.state = self.PREAMBLE
+
+    def feed(self, data: bytes):
+        self.buffer += data
+
+        while True:
+            if self.state == self.PREAMBLE:
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    del self.buffer[:max(0, len(self.buffer) - len(self.delimiter))]
+                    return
+                if not self.after_delimiter(index):
+                    return
+
+            elif self.state == self.HEADERS:
+                index = self.buffer.find(b"\r\n\r\n", 0, MAX_PART_HEADER_BYTES + 4)
+                if index < 0:
+                    if len(self.buffer) >= MAX_PART_HEADER_BYTES + 4:
+                        raise MultipartError("❌ Multipart part headers are too large")
+                    return
+
+                headers = HeaderParser().parsestr(self.buffer[:index].decode("utf-8", "replace"))
+                del self.buffer[:index + 4]
+                self.state = self.BODY
+                self.on_part_begin(headers)
+
+            elif self.state == self.BODY:
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    keep = len(self.delimiter) - 1
+                    if len(self.buffer) > keep:
+                        self.on_part_data(bytes(self.buffer[:-keep]))
+                        del self.buffer[:-keep]
+                    return
+
+                if index:
+                    self.on_part_data(bytes(self.buffer[:index]))
+                    del self.buffer[:index]
+                if len(self.buffer) < len(self.delimiter) + 2:
+                    return
+
+                self.on_part_end()
+                self.after_delimiter(0)
+
+            else:
+                self.buffer.clear()
+                return
+
+    def after_delimiter(self, index: int) -> bool:
+        end = index + len(self.delimiter)
+        if len(self.buffer) < end + 2:
+            del self.buffer[:index]
+            return False
+
+        suffix = bytes(self.buffer[end:end + 2])
+        if suffix == b"--":
+            self.state = self.DONE
+        elif suffix == b"\r\n":
+            self.state = self.HEADERS
+        else:
+            raise MultipartError("❌ Malformed multipart boundary")
+
+        del self.buffer[:end + 2]
+        return True
+
+    def close(self):
+        if self.state != self.DONE:
+            raise MultipartError("❌ Multipart body ended before the closing boundary")
+
+class MessageUpload:
+    def __init__(self, content_type: Optional[str], max_message_bytes: int, max_attachment_bytes: int):
+        self.max_message_bytes = max_message_bytes
+        self.max_attachment_bytes = max_attachment_bytes
+
+        self.message_json = bytearray()
+        self.attachments: List[Dict[str, Any]] = []
+        self.digests: List[str] = []
+
+        self.target: Optional[str] = None
+        self.part_filename: Optional[str] = None
+        self.part_cid: Optional[str] = None
+        self.writer: Optional[BlobWriter] = None
+
+        self.parser = MultipartParser(
+            parse_boundary(content_type), self.part_begin, self.part_data, self.part_end
+        )
+
+    def part_begin(self, headers: HeaderMessage):
+        disposition = HeaderMessage()
+        disposition["content-disposition"] = headers.get("content-disposition", "")
+        name = disposition.get_param("name", header="content-disposition")
+
+        if name == "message":
+            self.target = "message"
+        elif name == "attachments":
+            filename = disposition.get_param("filename", header="content-disposition")
+            if not filename:
+                raise MultipartError("❌ Attachment parts need a filename")
+
+            self.target = "attachment"
+            self.part_filename = filename
+            self.part_cid = (headers.get("content-id") or "").strip("<> ") or None
+            self.writer = blob_store.writer(self.max_attachment_bytes)
+        else:
+            raise MultipartError(f"❌ Unexpected multipart field '{name}'")
+
+    def part_data(self, data: bytes):
+        if self.target == "message":
+            self.message_json += data
+            if len(self.message_json) > self.max_message_bytes:
+                raise PayloadTooLarge(self.max_message_bytes, "Message part")
+        else:
+            try:
+                self.writer.write(data)
+            except OverflowError:
+                raise PayloadTooLarge(self.max_attachment_bytes, f"Attachment '{self.part_filename}'") from None
+
+    def part_end(self):
+        if self.target == "attachment":
+            digest, size = self.writer.commit()
+            self.writer = None
+            self.digests.append(digest)
+
+            attachment = {"filename": self.part_filename, "blob": digest, "size": size}
+            if self.part_cid:
+                attachment["cid"] = self.part_cid
+            self.attachments.append(attachment)
+
+        self.target = None
+
+    def feed(self, data: bytes):
+        self.parser.feed(data)
+
+    def finish(self) -> MessageData:
+        self.parser.close()
+
+        if not self.message_json:
+            raise MultipartError("❌ The 'message' part is missing")
+
+        payload = MessageData.model_validate_json(bytes(self.message_json))
+        payload.attachments = list(payload.attachments or []) + self.attachments
+        return payload
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.discard()
+            self.writer = None
@@ -0,0 +1,90 @@
+from typing import *
+
+from app.config import config
+from app.core.metrics import CACHE_REQUESTS_TOTAL
+
+from threading import Lock
+
+import time
+
+class CachedCredential:
+    __slots__ = ("token", "secret", "expires_at")
+
+    def __init__(self, token: Union[str, bytes], plain: str, expires_at: float):
+        self.token = token
+        self.secret = bytearray(plain.encode())
+        self.expires_at = expires_at
+
+    def reveal(self) -> str:
+        return self.secret.decode()
+
+    def wipe(self):
+        for i in range(len(self.secret)):
+            self.secret[i] = 0
+
+    def __repr__(self):
+        return "<CachedCredential(***)>"
+
+class CredentialVault:
+    def __init__(self, ttl: float = 900):
+        self.ttl = ttl
+        self.lock = Lock()
+        self.entries: Dict[str, CachedCredential] = {}
+        self._fernet = None
+        self._keys: Optional[str] = None
+
+    @property
+    def fernet(self):
+        keys = config.vars.account_secrets_fernet_key
+
+        if self._fernet is None or keys != self._keys:
+            from cryptography.fernet import Fernet, MultiFernet
+
+            self._fernet = MultiFernet([
+                Fernet(key.strip().encode()) for key in keys.split(",") if key.strip()
+            ])
+            self._keys = keys
+
+        return self._fernet
+
+    def encrypt(self, plain: str) -> bytes:
+        return self.fernet.encrypt(plain.encode())
+
+    def decrypt(self, token: Union[str, bytes]) -> str:
+        return self.fernet.decrypt(token).decode()
+
+    def rotate(self, token: Union[str, bytes]) -> bytes:
+        return self.fernet.rotate(token)
+
+    def get_password(self, account_name: str, token: Union[str, bytes]) -> str:
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(account_name)
+            if entry is not None and entry.token == token and entry.expires_at > now:
+                CACHE_REQUESTS_TOTAL.inc("credentials", "hit")
+                return entry.reveal()
+
+        CACHE_REQUESTS_TOTAL.inc("credentials", "miss")
+        plain = self.decrypt(token)
+
+        with self.lock:
+            old = self.entries.get(account_name)
+            if old is not None:
+                old.wipe()
+            self.entries[account_name] = CachedCredential(token, plain, now + self.ttl)
+
+        return plain
+
+    def invalidate(self, account_name: Optional[str] = None):
+        with self.lock:
+            names = list(self.entries) if account_name is None else [account_name]
+            for name in names:
+                entry = self.entries.pop(name, None)
+                if entry is not None:
+                    entry.wipe()
+
+    def __repr__(self):
+        return f"<CredentialVault(entries={len(self.entries)}, ttl={self.ttl})>"
+
+vault = CredentialVault()
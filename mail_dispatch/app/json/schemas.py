@@ -1,9 +1,29 @@
 from typing import *
 from pydantic import *
 
+from app.core.blobs import is_blob_digest
+
+from datetime import datetime
+
+Priority = Literal["high", "normal", "bulk"]
+
+def check_attachment_blobs(attachments: Optional[List[Any]], allow_blobs: bool) -> Optional[List[Any]]:
+    for attachment in attachments or []:
+        if not isinstance(attachment, dict) or "blob" not in attachment:
+            continue
+        # Blob references point at files on this host, so only the multipart upload may create them.
+        if not allow_blobs:
+            raise ValueError("❌ Attachment 'blob' references can only be created by a multipart upload")
+        if not is_blob_digest(attachment["blob"]):
+            raise ValueError("❌ Attachment 'blob' must be a 64-character lowercase hex digest")
+    return attachments
+
 class MessageIdJSON(BaseModel):
     message_id: str
 
+class PostSendMessageJSON(MessageIdJSON):
+    priority: Optional[Priority] = None
+
 class MessageData(BaseModel):
     account_name: str
     subject: str
@@ -12,9 +32,40 @@ class MessageData(BaseModel):
     attachments: Optional[List[Any]] = None
     html_body: str
     use_signature: Optional[bool] = None
+    fan_out: Optional[Literal["chunked", "per_recipient"]] = None
+    priority: Optional[Priority] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("attachments")
+    def check_attachments(cls, v):
+        return check_attachment_blobs(v, allow_blobs=False)
+
+class TemplateRecipientJSON(BaseModel):
+    address: str
+    context: Dict[str, Any] = {}
+
+class TemplateMessageData(BaseModel):
+    account_name: str
+    subject: str
+    html_body: str
+    recipients: List[TemplateRecipientJSON] = Field(min_length=1)
+    context: Dict[str, Any] = {}
+    attachments: Optional[List[Any]] = None
+    use_signature: Optional[bool] = None
+    priority: Optional[Priority] = None
+
+    @field_validator("attachments")
+    def check_attachments(cls, v):
+        return check_attachment_blobs(v, allow_blobs=False)
+
+class PostStoreMessagesJSON(BaseModel):
+    messages: List[MessageData] = Field(min_length=1, max_length=500)
+
+class PostSendMessagesJSON(BaseModel):
+    message_ids: List[str] = Field(min_length=1, max_length=500)
+    priority: Optional[Priority] = None
+
 class PutConfigVariableJSON(BaseModel):
     key: str
     value: str
@@ -25,14 +76,62 @@ class GetAccountJSON(BaseModel):
 class GetMessageJSON(BaseModel):
     message_id: str
 
+class GetMessagesStatusJSON(BaseModel):
+    since_minutes: PositiveInt = 60
+    account_name: Optional[str] = None
+
+class SearchMessagesJSON(BaseModel):
+    recipient: Optional[str] = None
+    domain: Optional[str] = None
+    subject_prefix: Optional[str] = None
+    before: Optional[datetime] = None
+    limit: int = Field(default=50, ge=1, le=500)
+
+    @model_validator(mode="after")
+    def _check_filters(self):
+        if not (self.recipient or self.domain or self.subject_prefix):
+            raise ValueError("At least one of 'recipient', 'domain' or 'subject_prefix' is required")
+        return self
+
+class FullTextSearchJSON(BaseModel):
+    query: str = Field(min_length=1)
+    limit: int = Field(default=20, ge=1, le=100)
+    offset: int = Field(default=0, ge=0)
+
+class PostRequeueMessagesJSON(BaseModel):
+    message_ids: Optional[List[str]] = None
+
 class GetListLogsJSON(BaseModel):
     w: PositiveInt
     y: Optional[int] = 0
 
+class SmtpTransportOptionsJSON(BaseModel):
+    host: str
+    port: PositiveInt = 587
+    security: Literal["starttls", "ssl", "none"] = "starttls"
+    username: Optional[str] = None
+    pool_size: Optional[PositiveInt] = None
+
+class SinkTransportOptionsJSON(BaseModel):
+    path: Optional[str] = None
+
+TRANSPORT_OPTIONS = {"smtp": SmtpTransportOptionsJSON, "sink": SinkTransportOptionsJSON}
+
 class PostPutNewAccountJSON(BaseModel):
     account_name: str
     email: EmailStr
     password: str
+    transport: Optional[Literal["ews", "smtp", "sink"]] = None
+    transport_options: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def check_transport_options(self):
+        options_model = TRANSPORT_OPTIONS.get(self.transport)
+        if options_model is not None:
+            self.transport_options = options_model.model_validate(self.transport_options or {}).model_dump(exclude_none=True)
+        elif self.transport == "ews":
+            self.transport_options = None
+        return self
 
 class PostPutAccountSignatureJSON(BaseModel):
     account_name: str
@@ -50,4 +149,20 @@ class PutEnableInputDirJSON(BaseModel):
 
 class PostFormatMdxJSON(BaseModel):
     template: str
-    context: Dict[str, Any]
\ No newline at end of file
+    context: Dict[str, Any]
+
+class PostTrainCompressionDictJSON(BaseModel):
+    samples: PositiveInt = 500
+    dict_size: PositiveInt = 65536
+
+class PostStartProfilerJSON(BaseModel):
+    interval: PositiveFloat = 0.01
+    duration: PositiveFloat = 60
+
+class PostStartTracemallocJSON(BaseModel):
+    frames: PositiveInt = 1
+
+class GetTracemallocJSON(BaseModel):
+    limit: PositiveInt = 25
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno"
+    against: Literal["baseline", "previous"] = "baseline"
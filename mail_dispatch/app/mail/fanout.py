@@ -0,0 +1,45 @@
+from typing import *
+
+from app.core.enums import FanOutMode
+from app.core.recipients import normalize_address
+
+RecipientChunk = Tuple[List[str], List[str]]
+
+def needs_fan_out(to_recipients: List[str], cc_recipients: Optional[List[str]],
+                  limit: int, mode: Optional[FanOutMode] = None) -> bool:
+    if mode in (FanOutMode.PER_RECIPIENT, FanOutMode.TEMPLATE):
+        return True
+    return len(to_recipients) + len(cc_recipients or []) > limit
+
+def split_recipients(to_recipients: List[str], cc_recipients: Optional[List[str]],
+                     limit: int, mode: Optional[FanOutMode] = None) -> List[RecipientChunk]:
+    seen: Set[str] = set()
+    addresses: List[Tuple[str, str]] = []
+    for kind, group in (("to", to_recipients), ("cc", cc_recipients or [])):
+        for address in group:
+            key = normalize_address(address)
+            if key not in seen:
+                seen.add(key)
+                addresses.append((kind, address))
+
+    if mode == FanOutMode.PER_RECIPIENT:
+        return [([address], []) for _, address in addresses]
+
+    limit = max(1, limit)
+    to_addresses = [address for kind, address in addresses if kind == "to"]
+    cc_addresses = [address for kind, address in addresses if kind == "cc"]
+    count = -(-len(addresses) // limit)
+
+    # Spread the To recipients over the chunks. When there are more chunks than To
+    # recipients, the chunks left without one send their Cc recipients as To.
+    chunks = []
+    cc_start = 0
+    for index in range(count):
+        to_group = to_addresses[index * len(to_addresses) // count:(index + 1) * len(to_addresses) // count]
+        cc_group = cc_addresses[cc_start:cc_start + limit - len(to_group)]
+        cc_start += len(cc_group)
+
+        if not to_group:
+            to_group, cc_group = cc_group, []
+        chunks.append((to_group, cc_group))
+    return chunks
@@ -0,0 +1,153 @@
+from typing import *
+
+from app.core.metrics import CACHE_REQUESTS_TOTAL, IMAGE_OPTIMIZE_SECONDS
+
+from collections import OrderedDict
+from threading import Lock
+
+import hashlib
+import io
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+
+# Text and timestamp chunks never change how the image is drawn.
+PNG_DROPPED_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME"}
+
+def load_pillow():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+def png_chunks(content: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(content):
+        length, kind = struct.unpack(">I4s", content[offset:offset + 8])
+        yield kind, content[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def deflate(data: bytes, strategy: int) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(data) + compressor.flush()
+
+def optimize_png(content: bytes) -> bytes:
+    chunks = list(png_chunks(content))
+    kinds = {kind for kind, _ in chunks}
+
+    # Animated PNGs keep frame data outside IDAT, leave them untouched.
+    if b"IHDR" not in kinds or b"IDAT" not in kinds or b"acTL" in kinds:
+        return content
+
+    pixels = zlib.decompress(b"".join(data for kind, data in chunks if kind == b"IDAT"))
+    compressed = min((deflate(pixels, strategy) for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)), key=len)
+
+    output = [PNG_SIGNATURE]
+    for kind, data in chunks:
+        if kind in PNG_DROPPED_CHUNKS:
+            continue
+        if kind == b"IDAT":
+            if compressed is not None:
+                output.append(png_chunk(b"IDAT", compressed))
+                compressed = None
+            continue
+        output.append(png_chunk(kind, data))
+
+    return b"".join(output)
+
+class ImageOptimizer:
+    def __init__(self, enabled: bool = False, max_dimension: int = 0, jpeg_quality: int = 0, cache_entries: int = 256):
+        self.enabled = enabled
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self.cache_entries = cache_entries
+        self.lock = Lock()
+        self.cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pillow = None
+
+    def configure(self, enabled: bool, max_dimension: int, jpeg_quality: int):
+        with self.lock:
+            self.enabled = enabled
+            self.max_dimension = max_dimension
+            self.jpeg_quality = jpeg_quality
+            self.cache.clear()
+
+    @property
+    def pillow(self):
+        if self._pillow is None:
+            self._pillow = load_pillow() or False
+        return self._pillow or None
+
+    def optimize(self, content: bytes) -> bytes:
+        if not self.enabled:
+            return content
+
+        digest = hashlib.sha256(content).hexdigest()
+        with self.lock:
+            optimized = self.cache.get(digest)
+            if optimized is not None:
+                self.cache.move_to_end(digest)
+                CACHE_REQUESTS_TOTAL.inc("images", "hit")
+                return optimized
+
+        CACHE_REQUESTS_TOTAL.inc("images", "miss")
+        with IMAGE_OPTIMIZE_SECONDS.time():
+            try:
+                optimized = self.process(content)
+            except Exception:
+                optimized = content
+
+        if len(optimized) >= len(content):
+            optimized = content
+
+        with self.lock:
+            self.cache[digest] = optimized
+            while len(self.cache) > self.cache_entries:
+                self.cache.popitem(last=False)
+
+        return optimized
+
+    def process(self, content: bytes) -> bytes:
+        is_png = content.startswith(PNG_SIGNATURE)
+        is_jpeg = content.startswith(JPEG_SIGNATURE)
+
+        if self.pillow is not None and (is_png or is_jpeg):
+            content = self.process_with_pillow(content, "PNG" if is_png else "JPEG")
+
+        if content.startswith(PNG_SIGNATURE):
+            return optimize_png(content)
+        return content
+
+    def process_with_pillow(self, content: bytes, image_format: str) -> bytes:
+        image = self.pillow.open(io.BytesIO(content))
+        resized = bool(self.max_dimension) and max(image.size) > self.max_dimension
+        if resized:
+            image.thumbnail((self.max_dimension, self.max_dimension), self.pillow.Resampling.LANCZOS)
+
+        options = {"optimize": True}
+        if image.info.get("icc_profile"):
+            options["icc_profile"] = image.info["icc_profile"]
+
+        if image_format == "JPEG":
+            if not self.jpeg_quality and not resized:
+                return content
+            if image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+            options["quality"] = self.jpeg_quality or 95
+        elif not resized:
+            return content
+
+        output = io.BytesIO()
+        image.save(output, format=image_format, **options)
+        return output.getvalue()
+
+    def __repr__(self):
+        return f"<ImageOptimizer(enabled={self.enabled}, entries={len(self.cache)})>"
+
+image_optimizer = ImageOptimizer()
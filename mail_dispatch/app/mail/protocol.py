@@ -0,0 +1,77 @@
+from typing import *
+
+from app.core.metrics import EWS_REQUESTS_TOTAL, EWS_CONNECTIONS_TOTAL, EWS_KEEPALIVE_PINGS_TOTAL
+
+from exchangelib.protocol import BaseProtocol, FailFast, FaultTolerance
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from queue import Empty
+
+class CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        EWS_CONNECTIONS_TOTAL.inc()
+        super().connect()
+
+class CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        EWS_CONNECTIONS_TOTAL.inc()
+        super().connect()
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+# urllib3 reopens dropped keep-alive sockets inside the same connection object,
+# so handshakes are counted in connect() rather than from the pool's counters.
+COUNTING_POOL_CLASSES = {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = COUNTING_POOL_CLASSES
+
+    def send(self, request, *args, **kwargs):
+        EWS_REQUESTS_TOTAL.inc()
+        return super().send(request, *args, **kwargs)
+
+def configure_protocol(timeout: float):
+    BaseProtocol.TIMEOUT = timeout
+    BaseProtocol.HTTP_ADAPTER_CLS = CountingHTTPAdapter
+
+def retry_policy(max_wait: float):
+    return FaultTolerance(max_wait=max_wait) if max_wait > 0 else FailFast()
+
+def tune_account(account: "Account", pool_size: int, max_wait: float):
+    protocol = account.protocol
+    protocol.config.retry_policy = retry_policy(max_wait)
+    protocol.max_connections = max(1, pool_size)
+
+def keep_warm(account: "Account", timeout: float) -> Tuple[int, int]:
+    protocol = account.protocol
+
+    # Borrow only the sessions that are idle right now, so pings never wait
+    # behind sends and the pool never grows because of them.
+    sessions = []
+    while True:
+        try:
+            sessions.append(protocol._session_pool.get(block=False))
+        except Empty:
+            break
+
+    pinged = failed = 0
+    for session in sessions:
+        try:
+            session.head(protocol.service_endpoint, timeout=timeout, allow_redirects=False)
+            pinged += 1
+            EWS_KEEPALIVE_PINGS_TOTAL.inc("ok")
+        except Exception:
+            failed += 1
+            EWS_KEEPALIVE_PINGS_TOTAL.inc("error")
+        finally:
+            protocol.release_session(session)
+
+    return pinged, failed
@@ -0,0 +1,125 @@
+from typing import *
+
+from app.core.enums import FailureClass
+
+from functools import lru_cache
+
+import random
+import smtplib
+
+@lru_cache(maxsize=1)
+def error_classes():
+    from exchangelib.errors import (
+        TransportError,
+        RateLimitError,
+        ErrorServerBusy,
+        ErrorTooManyObjectsOpened,
+        ErrorExceededConnectionCount,
+        ErrorTimeoutExpired,
+        ErrorInternalServerTransientError,
+        ErrorInternalServerError,
+        ErrorMailboxStoreUnavailable,
+        ErrorMailboxMoveInProgress,
+        ErrorConnectionFailed,
+        AutoDiscoverFailed,
+        UnauthorizedError,
+        ErrorAccessDenied,
+        ErrorSendAsDenied,
+        ErrorInvalidRecipients,
+        ErrorInvalidSmtpAddress,
+        ErrorNonExistentMailbox,
+        ErrorMessageSizeExceeded,
+        ErrorQuotaExceeded
+    )
+
+    throttled = (
+        RateLimitError,
+        ErrorServerBusy,
+        ErrorTooManyObjectsOpened,
+        ErrorExceededConnectionCount
+    )
+    transient = (
+        TransportError,
+        ErrorTimeoutExpired,
+        ErrorInternalServerTransientError,
+        ErrorInternalServerError,
+        ErrorMailboxStoreUnavailable,
+        ErrorMailboxMoveInProgress,
+        ErrorConnectionFailed,
+        AutoDiscoverFailed,
+        OSError
+    )
+    permanent = (
+        UnauthorizedError,
+        ErrorAccessDenied,
+        ErrorSendAsDenied,
+        ErrorInvalidRecipients,
+        ErrorInvalidSmtpAddress,
+        ErrorNonExistentMailbox,
+        ErrorMessageSizeExceeded,
+        ErrorQuotaExceeded,
+        ValueError,
+        TypeError,
+        KeyError,
+        FileNotFoundError
+    )
+    return throttled, transient, permanent
+
+def iter_error_chain(error: BaseException):
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def classify_smtp_failure(error: BaseException) -> Optional[FailureClass]:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return FailureClass.PERMANENT if codes and all(code >= 500 for code in codes) else FailureClass.TRANSIENT
+
+    if isinstance(error, smtplib.SMTPResponseException):
+        if error.smtp_code in (421, 450, 451, 452):
+            return FailureClass.THROTTLED
+        return FailureClass.PERMANENT if error.smtp_code >= 500 else FailureClass.TRANSIENT
+
+    return None
+
+def classify_failure(error: BaseException) -> FailureClass:
+    throttled, transient, permanent = error_classes()
+
+    for err in iter_error_chain(error):
+        # SMTP errors are OSErrors, their reply code says whether a retry can help.
+        smtp_class = classify_smtp_failure(err)
+        if smtp_class is not None:
+            return smtp_class
+        if isinstance(err, throttled):
+            return FailureClass.THROTTLED
+        if isinstance(err, permanent):
+            return FailureClass.PERMANENT
+        if isinstance(err, transient):
+            return FailureClass.TRANSIENT
+
+    return FailureClass.TRANSIENT
+
+def server_back_off(error: BaseException) -> Optional[float]:
+    for err in iter_error_chain(error):
+        back_off = getattr(err, "back_off", None) or getattr(err, "wait", None)
+        if back_off:
+            return float(back_off)
+
+    return None
+
+def compute_backoff(attempts: int, base_delay: float, max_delay: float,
+                    failure_class: FailureClass = FailureClass.TRANSIENT,
+                    hint: Optional[float] = None) -> float:
+    ceiling = min(max_delay, base_delay * (2 ** max(attempts - 1, 0)))
+
+    if failure_class == FailureClass.THROTTLED:
+        ceiling = min(max_delay, ceiling * 2)
+
+    delay = random.uniform(ceiling / 2, ceiling)
+
+    if hint is not None:
+        delay = max(delay, min(hint, max_delay))
+
+    return delay
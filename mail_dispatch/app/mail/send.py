@@ -1,23 +1,37 @@
 from typing import *
 
 from app.core.database_handler import Message, AccountSignature
-from exchangelib import (
-    Message as ExMessage,
-    HTMLBody,
-    Mailbox,
-    FileAttachment,
-    Account
-)
 from app.mail.signature import load_signature
-from pydantic import BaseModel, field_validator
+from app.core.blobs import blob_store, is_blob_digest
+from app.mail.images import image_optimizer
+from app.markdown.format import render_mdx
+from app.core.metrics import SIGNATURE_LOAD_SECONDS, ATTACHMENT_DECODE_SECONDS, EWS_SEND_SECONDS
+from pydantic import BaseModel, field_validator, model_validator
+
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 
 import base64
+import mimetypes
 
 class AttachmentManifest(BaseModel):
-    content_bytes: str
+    content_bytes: Optional[str] = None
+    blob: Optional[str] = None
     filename: str
     cid: Optional[str] = None
 
+    @model_validator(mode="after")
+    def must_have_content(self):
+        if self.content_bytes is None and self.blob is None:
+            raise ValueError("❌ Attachment needs 'content_bytes' or an uploaded 'blob'")
+        return self
+
+    @field_validator("blob")
+    def must_be_digest(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and not is_blob_digest(v):
+            raise ValueError("❌ Attachment 'blob' must be a 64-character lowercase hex digest")
+        return v
+
     @field_validator("filename")
     def must_have_extension(cls, v: str) -> str:
         if '.' not in v or v.startswith('.') or v.endswith('.'):
@@ -25,55 +39,133 @@ class AttachmentManifest(BaseModel):
         return v
 
     def decoded_content(self) -> bytes:
+        if self.blob is not None:
+            return blob_store.read(self.blob)
+
         try:
             return base64.b64decode(self.content_bytes)
         except Exception:
             raise ValueError("❌ Invalid base64 content in attachment")
 
 
-def send_message(account: Account, message: Message, signature_key: Optional[AccountSignature] = None):
-    msg_html_body: str = message.html_body
-    msg_attachments: List[Dict[str, Any]] = message.attachments
+class PreparedMessage(NamedTuple):
+    subject: str
+    html_body: str
+    signature_html: Optional[str]
+    attachments: List[Tuple[str, bytes, Optional[str]]]
+    saved_bytes: int = 0
 
-    if signature_key is not None:
-        signature_html, signature_attachments = load_signature(signature_key.signature_key)
+    def full_html_body(self) -> str:
+        if self.signature_html is None:
+            return self.html_body
+        return f"{self.html_body}<br><br>{self.signature_html}"
+
+    def personalize(self, context: Dict[str, Any]) -> "PreparedMessage":
+        return self._replace(
+            subject=render_mdx(self.subject, context),
+            html_body=render_mdx(self.html_body, context)
+        )
 
-        msg_html_body = f"{msg_html_body}<br><br>{signature_html}"
+
+def prepare_message(message: Message, signature_key: Optional[AccountSignature] = None) -> PreparedMessage:
+    signature_html = None
+    msg_attachments: List[Dict[str, Any]] = list(message.attachments or [])
+
+    if signature_key is not None:
+        with SIGNATURE_LOAD_SECONDS.time():
+            signature_html, signature_attachments = load_signature(signature_key.signature_key)
 
         msg_attachments += signature_attachments
 
+    attachments = []
+    saved_bytes = 0
+    for att_dict in msg_attachments:
+        with ATTACHMENT_DECODE_SECONDS.time():
+            attachment = AttachmentManifest.model_validate(att_dict)
+
+            filename = attachment.filename
+            cid = attachment.cid
+            content = attachment.decoded_content()
+
+        if cid:
+            valid_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+            if not filename.lower().endswith(valid_extensions):
+                raise TypeError(f"❌ File {filename} can not be inline image")
+
+            optimized = image_optimizer.optimize(content)
+            saved_bytes += len(content) - len(optimized)
+            content = optimized
+
+        attachments.append((filename, content, cid))
+
+    return PreparedMessage(message.subject, message.html_body, signature_html, attachments, saved_bytes)
+
+
+def send_message(account: "Account", message: Message, signature_key: Optional[AccountSignature] = None,
+                 prepared: Optional[PreparedMessage] = None,
+                 to_recipients: Optional[List[str]] = None,
+                 cc_recipients: Optional[List[str]] = None):
+    from exchangelib import Message as ExMessage, HTMLBody, Mailbox, FileAttachment
+
+    if prepared is None:
+        prepared = prepare_message(message, signature_key)
+
+    if to_recipients is None:
+        to_recipients, cc_recipients = message.to_recipients, message.cc_recipients
+
     email = ExMessage(
         account=account,
         folder=account.sent,
-        subject=message.subject,
-        body=HTMLBody(msg_html_body),
-        to_recipients=[Mailbox(email_address=addr) for addr in message.to_recipients],
-        cc_recipients=[Mailbox(email_address=addr) for addr in (message.cc_recipients or [])]
+        subject=prepared.subject,
+        body=HTMLBody(prepared.full_html_body()),
+        to_recipients=[Mailbox(email_address=addr) for addr in to_recipients],
+        cc_recipients=[Mailbox(email_address=addr) for addr in (cc_recipients or [])]
     )
 
-    for att_dict in msg_attachments:
-        attachment = AttachmentManifest.model_validate(att_dict)
-
-        filename = attachment.filename
-        cid = attachment.cid
-        content = attachment.decoded_content()
-
+    # exchangelib binds each attachment to its parent item, so every chunk
+    # gets its own FileAttachment around the shared decoded bytes.
+    for filename, content, cid in prepared.attachments:
         file_attachment = FileAttachment(
             name=filename,
             content=content
         )
 
         if cid:
-            valid_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
-            if filename.lower().endswith(valid_extensions):
-                file_attachment.is_inline = True
-                file_attachment.content_id = cid
-            else:
-                raise TypeError(f"❌ File {filename} can not be inline image")
+            file_attachment.is_inline = True
+            file_attachment.content_id = cid
 
         email.attach(file_attachment)
 
     try:
-        email.send()
+        with EWS_SEND_SECONDS.time():
+            email.send()
     except Exception as e:
-        raise SystemError(f"❌ Can not send the email: <{e}>")
+        raise SystemError(f"❌ Can not send the email: <{e}>") from e
+
+
+def build_mime(prepared: PreparedMessage, sender: str, to_recipients: List[str],
+               cc_recipients: Optional[List[str]] = None) -> EmailMessage:
+    mime = EmailMessage()
+    mime["Subject"] = prepared.subject
+    mime["From"] = sender
+    mime["To"] = ", ".join(to_recipients)
+    if cc_recipients:
+        mime["Cc"] = ", ".join(cc_recipients)
+    mime["Date"] = formatdate(localtime=True)
+    mime["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or None)
+
+    mime.set_content(prepared.full_html_body(), subtype="html")
+
+    # Inline images must sit next to the HTML in multipart/related, before
+    # regular attachments wrap everything into multipart/mixed.
+    for filename, content, cid in prepared.attachments:
+        if cid:
+            maintype, subtype = (mimetypes.guess_type(filename)[0] or "image/png").split("/")
+            mime.add_related(content, maintype=maintype, subtype=subtype, cid=f"<{cid}>", filename=filename)
+
+    for filename, content, cid in prepared.attachments:
+        if not cid:
+            maintype, subtype = (mimetypes.guess_type(filename)[0] or "application/octet-stream").split("/")
+            mime.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+
+    return mime
@@ -0,0 +1,203 @@
+from typing import *
+
+from app.core.enums import TransportKind
+from app.core.metrics import SMTP_CONNECTIONS_TOTAL, SMTP_SEND_SECONDS
+from app.mail.send import PreparedMessage, send_message, build_mime
+
+from abc import ABC, abstractmethod
+from queue import LifoQueue, Empty
+from threading import BoundedSemaphore, Lock
+
+import os
+import smtplib
+import ssl
+import time
+
+class Transport(ABC):
+    kind: TransportKind
+
+    @abstractmethod
+    def send(self, message: "Message", prepared: PreparedMessage,
+             to_recipients: List[str], cc_recipients: Optional[List[str]] = None):
+        ...
+
+    def close(self):
+        pass
+
+    def status(self) -> Dict[str, Any]:
+        return {"kind": self.kind.value}
+
+class EwsTransport(Transport):
+    kind = TransportKind.EWS
+
+    def __init__(self, account: "Account"):
+        self.account = account
+
+    def send(self, message, prepared, to_recipients, cc_recipients=None):
+        send_message(
+            self.account, message, prepared=prepared,
+            to_recipients=to_recipients, cc_recipients=cc_recipients
+        )
+
+class SmtpTransport(Transport):
+    kind = TransportKind.SMTP
+
+    def __init__(self, sender: str, host: str, port: int = 587, security: str = "starttls",
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 pool_size: int = 4, idle_timeout: float = 30, timeout: float = 60):
+        self.sender = sender
+        self.host = host
+        self.port = port
+        self.security = security
+        self.username = username
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self.slots = BoundedSemaphore(max(1, pool_size))
+        self.idle: "LifoQueue[Tuple[smtplib.SMTP, float]]" = LifoQueue()
+        self.lock = Lock()
+        self.opened = 0
+        self.sent = 0
+
+    def connect(self) -> smtplib.SMTP:
+        if self.security == "ssl":
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        try:
+            connection.ehlo()
+            if self.security == "starttls":
+                connection.starttls(context=ssl.create_default_context())
+                connection.ehlo()
+            if self.username:
+                connection.login(self.username, self.password or "")
+        except BaseException:
+            connection.close()
+            raise
+
+        SMTP_CONNECTIONS_TOTAL.inc()
+        with self.lock:
+            self.opened += 1
+        return connection
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection, last_used = self.idle.get_nowait()
+            except Empty:
+                return self.connect()
+
+            if time.monotonic() - last_used < self.idle_timeout:
+                return connection
+
+            # Servers drop idle sessions on their own schedule, probe before reusing one.
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except OSError:
+                pass
+            self.discard(connection)
+
+    def release(self, connection: smtplib.SMTP):
+        self.idle.put((connection, time.monotonic()))
+
+    def discard(self, connection: smtplib.SMTP):
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+    def send(self, message, prepared, to_recipients, cc_recipients=None):
+        mime = build_mime(prepared, self.sender, to_recipients, cc_recipients)
+        recipients = list(to_recipients) + list(cc_recipients or [])
+
+        with self.slots:
+            for attempt in range(2):
+                connection = self.acquire()
+                try:
+                    with SMTP_SEND_SECONDS.time():
+                        connection.send_message(mime, from_addr=self.sender, to_addrs=recipients)
+                except smtplib.SMTPServerDisconnected as error:
+                    self.discard(connection)
+                    if attempt:
+                        raise SystemError(f"❌ Can not send the email: <{error}>") from error
+                    continue
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as error:
+                    # A rejected message leaves the session usable, anything else may not.
+                    try:
+                        connection.rset()
+                        self.release(connection)
+                    except (OSError, smtplib.SMTPException):
+                        self.discard(connection)
+                    raise SystemError(f"❌ Can not send the email: <{error}>") from error
+                except Exception as error:
+                    self.discard(connection)
+                    raise SystemError(f"❌ Can not send the email: <{error}>") from error
+
+                self.release(connection)
+                with self.lock:
+                    self.sent += 1
+                return
+
+    def close(self):
+        while True:
+            try:
+                connection, _ = self.idle.get_nowait()
+            except Empty:
+                return
+            try:
+                connection.quit()
+            except (OSError, smtplib.SMTPException):
+                self.discard(connection)
+
+    def status(self) -> Dict[str, Any]:
+        return {"kind": self.kind.value, "opened": self.opened, "idle": self.idle.qsize(), "sent": self.sent}
+
+class SinkTransport(Transport):
+    kind = TransportKind.SINK
+
+    def __init__(self, sender: str, path: Optional[str] = None):
+        self.sender = sender
+        self.path = path
+        self.lock = Lock()
+        self.sent = 0
+
+    def send(self, message, prepared, to_recipients, cc_recipients=None):
+        mime = build_mime(prepared, self.sender, to_recipients, cc_recipients)
+
+        with self.lock:
+            self.sent += 1
+            sequence = self.sent
+
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, f"{message.id}-{sequence}.eml"), "wb") as f:
+                f.write(mime.as_bytes())
+
+    def status(self) -> Dict[str, Any]:
+        return {"kind": self.kind.value, "sent": self.sent, "path": self.path}
+
+def open_transport(account: "RegisteredAccount", smtp_pool_size: int = 4, smtp_idle_timeout: float = 30,
+                   timeout: float = 60) -> Transport:
+    kind = TransportKind(account.transport or TransportKind.EWS.value)
+    options = dict(account.transport_options or {})
+
+    if kind == TransportKind.SMTP:
+        return SmtpTransport(
+            sender=account.email,
+            host=options["host"],
+            port=options.get("port", 587),
+            security=options.get("security", "starttls"),
+            username=options.get("username", account.email),
+            password=account.get_password(),
+            pool_size=options.get("pool_size", smtp_pool_size),
+            idle_timeout=smtp_idle_timeout,
+            timeout=timeout
+        )
+
+    if kind == TransportKind.SINK:
+        return SinkTransport(sender=account.email, path=options.get("path"))
+
+    raise ValueError(f"❌ Transport '{kind.value}' is opened through load_account")
@@ -0,0 +1,100 @@
+from typing import *
+
+from time import perf_counter
+
+import builtins
+import os
+import sys
+import tempfile
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started_at: Optional[float] = None
+        self.original_import = builtins.__import__
+        self.records: Dict[str, List[float]] = {}
+        self.stack: List[float] = []
+        self.phases: List[Tuple[str, float]] = []
+
+    def requested(self) -> bool:
+        return "--profile-startup" in sys.argv or \
+            os.environ.get("MAILDISPATCH_PROFILE_STARTUP", "").lower() in ("1", "true", "yes", "on")
+
+    def start_if_requested(self):
+        if self.requested():
+            self.start()
+
+    def start(self):
+        self.enabled = True
+        self.started_at = perf_counter()
+        builtins.__import__ = self.timed_import
+
+    def stop(self):
+        builtins.__import__ = self.original_import
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        self.stack.append(0.0)
+        start = perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = perf_counter() - start
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+
+            record = self.records.setdefault(name, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed - children
+
+    def mark(self, phase: str):
+        if self.enabled:
+            self.phases.append((phase, perf_counter()))
+
+    def report(self, top: int = 25) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        self.stop()
+        self.mark("ready")
+
+        lines = ["Startup profile", "==============="]
+
+        previous = self.started_at
+        for phase, timestamp in self.phases:
+            lines.append(f"{phase:<30} {(timestamp - previous) * 1000:10.1f} ms")
+            previous = timestamp
+        lines.append(f"{'total':<30} {(previous - self.started_at) * 1000:10.1f} ms")
+
+        packages: Dict[str, float] = {}
+        for name, (_, self_time) in self.records.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_time
+
+        lines += ["", "Import self time by package (ms)"]
+        for package, self_time in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"{package:<30} {self_time * 1000:10.1f}")
+
+        lines += ["", "Slowest imports, cumulative (ms)"]
+        for name, (cumulative, self_time) in sorted(self.records.items(), key=lambda item: -item[1][0])[:top]:
+            lines.append(f"{name:<45} {cumulative * 1000:10.1f} {self_time * 1000:10.1f}")
+
+        text = "\n".join(lines)
+
+        if sys.stderr is not None:
+            print(text, file=sys.stderr)
+        else:
+            path = os.environ.get(
+                "MAILDISPATCH_PROFILE_FILE",
+                os.path.join(tempfile.gettempdir(), "maildispatch-startup-profile.txt")
+            )
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+        self.enabled = False
+        return text
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,3 @@
+from mail_dispatch_client.client import MailDispatchClient
+from mail_dispatch_client.discovery import discover_base_url
+from mail_dispatch_client.errors import MailDispatchError, ServiceNotRunning
@@ -0,0 +1,142 @@
+from typing import *
+
+from mail_dispatch_client.client import BaseClient, EventParser, RETRY_STATUSES, as_payload, batched, event_params
+from mail_dispatch_client.errors import MailDispatchError
+
+import asyncio
+import httpx
+
+class AsyncMailDispatchClient(BaseClient):
+    def __init__(self, *args, concurrency: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.concurrency = concurrency
+
+        # Like the sync client, only failed connects are retried by the transport itself.
+        self.http = httpx.AsyncClient(
+            timeout=self.timeout,
+            transport=httpx.AsyncHTTPTransport(
+                retries=self.retries,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        )
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Any:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = await self.http.request(method, self.base_url + path, json=payload)
+            except httpx.TransportError as error:
+                delivered = not isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.retries or not (
+                    (self.rediscover() and not delivered) or self.can_retry(method, path, delivered=delivered)
+                ):
+                    raise MailDispatchError(f"❌ Can not reach MailDispatch at {self.base_url}: {error}") from error
+            else:
+                if (response.status_code not in RETRY_STATUSES or attempt >= self.retries
+                        or not self.can_retry(method, path, response.status_code)):
+                    return self.unwrap(response.status_code, response.content)
+                retry_after = response.headers.get("Retry-After")
+
+            await asyncio.sleep(self.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    async def gather_batches(self, batches: List[Any], call: Callable[[Any], Awaitable[List[Any]]]) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                return await call(batch)
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [item for result in results for item in result]
+
+    async def health(self) -> Dict[str, Any]:
+        return (await self.request("GET", "/"))["health"]
+
+    async def stream_events(self, message_id: Optional[str] = None, account: Optional[str] = None,
+                            last_event_id: Optional[int] = None, idle_timeout: float = 60.0) -> AsyncIterator[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            headers = {"Last-Event-ID": str(last_event_id)} if last_event_id is not None else {}
+            try:
+                async with self.http.stream(
+                    "GET", self.base_url + "/events", params=event_params(message_id, account), headers=headers,
+                    timeout=httpx.Timeout(self.timeout, read=idle_timeout)
+                ) as response:
+                    if response.status_code >= 400:
+                        self.unwrap(response.status_code, await response.aread())
+
+                    attempt = 0
+                    parser = EventParser()
+                    async for line in response.aiter_lines():
+                        event = parser.feed(line)
+                        if event is not None:
+                            last_event_id = event["id"]
+                            yield event
+            except httpx.TransportError as error:
+                if attempt >= self.retries:
+                    raise MailDispatchError(f"❌ Lost the event stream from {self.base_url}: {error}") from error
+                self.rediscover()
+
+            await asyncio.sleep(self.retry_delay(attempt))
+            attempt += 1
+
+    async def store_message(self, message: Any) -> str:
+        return (await self.request("POST", "/store-msg", as_payload(message)))["message_id"]
+
+    async def store_template_message(self, message: Any) -> str:
+        return (await self.request("POST", "/store-template-msg", as_payload(message)))["message_id"]
+
+    async def send_message(self, message_id: str) -> str:
+        return (await self.request("POST", "/send-msg", {"message_id": message_id}))["message_id"]
+
+    async def store_and_send_message(self, message: Any) -> str:
+        return (await self.request("POST", "/jit-send-msg", as_payload(message)))["message_id"]
+
+    async def store_messages(self, messages: Iterable[Any], batch_size: int = 100) -> List[Optional[str]]:
+        async def store(batch):
+            data = await self.request("POST", "/store-msgs", {"messages": [as_payload(message) for message in batch]})
+            return data["message_ids"]
+
+        return await self.gather_batches(list(batched(messages, batch_size)), store)
+
+    async def send_messages(self, message_ids: Iterable[str], batch_size: int = 500) -> List[str]:
+        async def send(batch):
+            return (await self.request("POST", "/send-msgs", {"message_ids": batch}))["message_ids"]
+
+        return await self.gather_batches(list(batched(message_ids, batch_size)), send)
+
+    async def store_and_send_messages(self, messages: Iterable[Any], batch_size: int = 100) -> List[Optional[str]]:
+        async def store_and_send(batch):
+            data = await self.request("POST", "/store-msgs", {"messages": [as_payload(message) for message in batch]})
+            stored = [message_id for message_id in data["message_ids"] if message_id is not None]
+            if stored:
+                await self.request("POST", "/send-msgs", {"message_ids": stored})
+            return data["message_ids"]
+
+        return await self.gather_batches(list(batched(messages, batch_size)), store_and_send)
+
+    async def get_message(self, message_id: str) -> Dict[str, Any]:
+        return await self.request("GET", "/message", {"message_id": message_id})
+
+    async def get_messages_status(self, since_minutes: int = 60, account_name: Optional[str] = None) -> Dict[str, Any]:
+        return await self.request("GET", "/messages/status", {"since_minutes": since_minutes, "account_name": account_name})
+
+    async def get_accounts(self) -> List[Dict[str, Any]]:
+        return await self.request("GET", "/all-accounts")
+
+    async def get_account(self, account_name: str) -> Dict[str, Any]:
+        return await self.request("GET", "/account", {"account_name": account_name})
+
+    async def get_signatures(self) -> List[str]:
+        return (await self.request("GET", "/all-signatures"))["signatures"]
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,231 @@
+from typing import *
+
+from mail_dispatch_client.discovery import discover_base_url
+from mail_dispatch_client.errors import MailDispatchError, ServiceNotRunning
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
+
+import itertools
+import json
+import requests
+import time
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Stores are deduplicated by content hash, so repeating them never stores a second copy.
+RETRYABLE_POSTS = {"/store-msg", "/store-msgs", "/store-template-msg"}
+
+# A sent message can be sent again, so a send is only repeated when the
+# service rejected it with 429 or never received it.
+SEND_POSTS = {"/send-msg", "/send-msgs", "/jit-send-msg"}
+
+def as_payload(message: Any) -> Dict[str, Any]:
+    if hasattr(message, "model_dump"):
+        return message.model_dump(mode="json", exclude_none=True)
+    return dict(message)
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class EventParser:
+    def __init__(self):
+        self.data: List[str] = []
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        if line.startswith("data:"):
+            self.data.append(line[5:].lstrip())
+            return None
+
+        # Every event carries its id and type in the JSON body, so only data lines matter.
+        if line or not self.data:
+            return None
+
+        event, self.data = json.loads("\n".join(self.data)), []
+        return event
+
+def never_sent(error: requests.RequestException) -> bool:
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+def event_params(message_id: Optional[str], account: Optional[str]) -> Dict[str, str]:
+    return {key: value for key, value in (("message_id", message_id), ("account", account)) if value is not None}
+
+class BaseClient:
+    def __init__(self, base_url: Optional[str] = None, status_file: Optional[str] = None,
+                 timeout: float = 30.0, retries: int = 3, backoff: float = 0.2, pool_size: int = 10):
+        self.discovered = base_url is None
+        self.status_file = status_file
+        self.base_url = (base_url or discover_base_url(status_file)).rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+
+    def can_retry(self, method: str, path: str, status_code: Optional[int] = None, delivered: bool = True) -> bool:
+        if method in ("GET", "PUT") or path in RETRYABLE_POSTS:
+            return True
+        return path in SEND_POSTS and (status_code == 429 or not delivered)
+
+    def retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def rediscover(self) -> bool:
+        # The service binds a new port on every start, so a failed connection may only mean it restarted.
+        if not self.discovered:
+            return False
+
+        try:
+            base_url = discover_base_url(self.status_file)
+        except ServiceNotRunning:
+            return False
+
+        changed = base_url != self.base_url
+        self.base_url = base_url
+        return changed
+
+    def unwrap(self, status_code: int, content: bytes) -> Any:
+        try:
+            body = json.loads(content) if content else {}
+        except ValueError:
+            body = {"message": content.decode("utf-8", "replace")}
+
+        if status_code >= 400:
+            message = body.get("message") or str(body.get("detail") or f"HTTP {status_code}")
+            raise MailDispatchError(message, status_code, body.get("data", body.get("detail")))
+
+        return body.get("data")
+
+class MailDispatchClient(BaseClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Refused connections never reach the service, so urllib3 retries them for every method.
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size,
+            max_retries=Retry(total=None, connect=self.retries, read=0, redirect=0, status=0, other=0,
+                              backoff_factor=self.backoff)
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, path: str, payload: Any = None) -> Any:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.request(method, self.base_url + path, json=payload, timeout=self.timeout)
+            except requests.RequestException as error:
+                delivered = not never_sent(error)
+                if attempt >= self.retries or not (
+                    (self.rediscover() and not delivered) or self.can_retry(method, path, delivered=delivered)
+                ):
+                    raise MailDispatchError(f"❌ Can not reach MailDispatch at {self.base_url}: {error}") from error
+            else:
+                if (response.status_code not in RETRY_STATUSES or attempt >= self.retries
+                        or not self.can_retry(method, path, response.status_code)):
+                    return self.unwrap(response.status_code, response.content)
+                retry_after = response.headers.get("Retry-After")
+
+            time.sleep(self.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    def health(self) -> Dict[str, Any]:
+        return self.request("GET", "/")["health"]
+
+    def stream_events(self, message_id: Optional[str] = None, account: Optional[str] = None,
+                      last_event_id: Optional[int] = None, idle_timeout: float = 60.0) -> Iterator[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            headers = {"Last-Event-ID": str(last_event_id)} if last_event_id is not None else {}
+            try:
+                with self.session.get(
+                    self.base_url + "/events", params=event_params(message_id, account), headers=headers,
+                    stream=True, timeout=(self.timeout, idle_timeout)
+                ) as response:
+                    if response.status_code >= 400:
+                        self.unwrap(response.status_code, response.content)
+
+                    attempt = 0
+                    parser = EventParser()
+                    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                        event = parser.feed(line)
+                        if event is not None:
+                            last_event_id = event["id"]
+                            yield event
+            except requests.RequestException as error:
+                if attempt >= self.retries:
+                    raise MailDispatchError(f"❌ Lost the event stream from {self.base_url}: {error}") from error
+                self.rediscover()
+
+            # The server closed the stream or the connection dropped: resume after the last event seen.
+            time.sleep(self.retry_delay(attempt))
+            attempt += 1
+
+    def store_message(self, message: Any) -> str:
+        return self.request("POST", "/store-msg", as_payload(message))["message_id"]
+
+    def store_template_message(self, message: Any) -> str:
+        return self.request("POST", "/store-template-msg", as_payload(message))["message_id"]
+
+    def send_message(self, message_id: str) -> str:
+        return self.request("POST", "/send-msg", {"message_id": message_id})["message_id"]
+
+    def store_and_send_message(self, message: Any) -> str:
+        return self.request("POST", "/jit-send-msg", as_payload(message))["message_id"]
+
+    def store_messages(self, messages: Iterable[Any], batch_size: int = 100) -> List[Optional[str]]:
+        message_ids = []
+        for batch in batched(messages, batch_size):
+            data = self.request("POST", "/store-msgs", {"messages": [as_payload(message) for message in batch]})
+            message_ids.extend(data["message_ids"])
+        return message_ids
+
+    def send_messages(self, message_ids: Iterable[str], batch_size: int = 500) -> List[str]:
+        sent = []
+        for batch in batched(message_ids, batch_size):
+            sent.extend(self.request("POST", "/send-msgs", {"message_ids": batch})["message_ids"])
+        return sent
+
+    def store_and_send_messages(self, messages: Iterable[Any], batch_size: int = 100) -> List[Optional[str]]:
+        message_ids = []
+        for batch in batched(messages, batch_size):
+            stored = self.store_messages(batch, batch_size)
+            self.send_messages([message_id for message_id in stored if message_id is not None], batch_size)
+            message_ids.extend(stored)
+        return message_ids
+
+    def get_message(self, message_id: str) -> Dict[str, Any]:
+        return self.request("GET", "/message", {"message_id": message_id})
+
+    def get_messages_status(self, since_minutes: int = 60, account_name: Optional[str] = None) -> Dict[str, Any]:
+        return self.request("GET", "/messages/status", {"since_minutes": since_minutes, "account_name": account_name})
+
+    def get_accounts(self) -> List[Dict[str, Any]]:
+        return self.request("GET", "/all-accounts")
+
+    def get_account(self, account_name: str) -> Dict[str, Any]:
+        return self.request("GET", "/account", {"account_name": account_name})
+
+    def get_signatures(self) -> List[str]:
+        return self.request("GET", "/all-signatures")["signatures"]
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,36 @@
+from typing import *
+
+from mail_dispatch_client.errors import ServiceNotRunning
+
+import json
+import os
+import platform
+
+def get_appdata_path() -> str:
+    if platform.system() == "Windows":
+        return os.getenv("LOCALAPPDATA")
+    elif platform.system() == "Darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:
+        return os.path.join(os.path.expanduser("~"), ".local", "share")
+
+def status_file_path(appdata_register: Optional[str] = None) -> str:
+    appdata_register = appdata_register or os.environ.get("APPDATA_PATH")
+    if not appdata_register:
+        raise ServiceNotRunning("❌ APPDATA_PATH is not set, pass status_file or base_url to the client")
+
+    return os.path.join(get_appdata_path(), appdata_register)
+
+def discover_base_url(status_file: Optional[str] = None) -> str:
+    path = status_file or status_file_path()
+
+    try:
+        with open(path, "r") as f:
+            status: Dict[str, Any] = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        raise ServiceNotRunning(f"❌ No MailDispatch status file at '{path}'") from None
+
+    if not status.get("is_active"):
+        raise ServiceNotRunning(f"❌ MailDispatch is not running (status file '{path}')")
+
+    return f"http://{status['host']}:{status['port']}"
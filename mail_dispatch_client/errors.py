@@ -0,0 +1,10 @@
+from typing import *
+
+class MailDispatchError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.data = data
+
+class ServiceNotRunning(MailDispatchError):
+    pass
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mail_dispatch"))
+
+# app.config reads these when it is first imported.
+data_dir = tempfile.mkdtemp(prefix="mail-dispatch-test-")
+os.environ.setdefault("APP_HOST", "127.0.0.1")
+os.environ.setdefault("APPDATA_PATH", "mibotsito/status.json")
+os.environ.setdefault("APPDATA", data_dir)
+os.environ.setdefault("ACCOUNT_SECRETS_FERNET_KEY", "3X8lZp8sgAgc17QKTmS3zBLzxZ4yic3XRFzFZOUmcv8=")
+os.environ.setdefault("URL_APP_DATABASE", f"sqlite:///{os.path.join(data_dir, 'app.db')}")
@@ -0,0 +1,59 @@
+from app.core.enums import FanOutMode
+from app.mail.fanout import needs_fan_out, split_recipients
+
+def addresses(chunks):
+    return [address for to_group, cc_group in chunks for address in to_group + cc_group]
+
+def test_duplicates_across_to_and_cc_are_sent_once():
+    chunks = split_recipients(["A@example.com", "b@example.com"], [" a@EXAMPLE.com", "c@example.com", "B@example.com"], 10)
+
+    assert chunks == [(["A@example.com", "b@example.com"], ["c@example.com"])]
+
+def test_per_recipient_deduplicates():
+    chunks = split_recipients(["a@example.com"], ["A@example.com", "b@example.com"], 10, FanOutMode.PER_RECIPIENT)
+
+    assert chunks == [(["a@example.com"], []), (["b@example.com"], [])]
+
+def test_limit_one_sends_every_address_alone():
+    to = ["a@example.com", "b@example.com"]
+    cc = ["c@example.com", "d@example.com"]
+
+    chunks = split_recipients(to, cc, 1)
+
+    assert all(len(to_group) == 1 and not cc_group for to_group, cc_group in chunks)
+    assert sorted(addresses(chunks)) == sorted(to + cc)
+
+def test_limit_below_one_is_treated_as_one():
+    assert len(split_recipients(["a@example.com", "b@example.com"], None, 0)) == 2
+
+def test_to_starved_chunks_promote_cc_to_to():
+    to = ["t@example.com"]
+    cc = [f"c{index}@example.com" for index in range(9)]
+
+    chunks = split_recipients(to, cc, 5)
+
+    assert len(chunks) == 2
+    assert all(to_group and len(to_group) + len(cc_group) <= 5 for to_group, cc_group in chunks)
+    assert sorted(addresses(chunks)) == sorted(to + cc)
+
+    # The real To recipient keeps its Cc recipients as Cc.
+    with_to = next(chunk for chunk in chunks if "t@example.com" in chunk[0])
+    assert with_to[0] == ["t@example.com"] and with_to[1]
+
+    # The other chunk has no To recipient left, so its Cc recipients are sent as To.
+    starved = next(chunk for chunk in chunks if chunk is not with_to)
+    assert starved[1] == [] and set(starved[0]) <= set(cc)
+
+def test_to_recipients_are_spread_over_the_chunks():
+    to = [f"t{index}@example.com" for index in range(3)]
+    cc = [f"c{index}@example.com" for index in range(9)]
+
+    chunks = split_recipients(to, cc, 4)
+
+    assert [len(to_group) for to_group, _ in chunks] == [1, 1, 1]
+    assert sorted(addresses(chunks)) == sorted(to + cc)
+
+def test_needs_fan_out():
+    assert not needs_fan_out(["a@example.com"], ["b@example.com"], 2)
+    assert needs_fan_out(["a@example.com"], ["b@example.com", "c@example.com"], 2)
+    assert needs_fan_out(["a@example.com"], None, 10, FanOutMode.PER_RECIPIENT)
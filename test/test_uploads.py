@@ -0,0 +1,79 @@
+import pytest
+
+from app.core.uploads import MultipartParser, MultipartError, MAX_PART_HEADER_BYTES
+
+BOUNDARY = b"xYzBoundary"
+
+def build_body(parts, closing=True):
+    body = b""
+    for headers, data in parts:
+        body += b"--" + BOUNDARY + b"\r\n" + headers + b"\r\n\r\n" + data + b"\r\n"
+    if closing:
+        body += b"--" + BOUNDARY + b"--\r\n"
+    return body
+
+def parse(body, chunk_size, close=True):
+    parts = []
+    parser = MultipartParser(
+        BOUNDARY,
+        on_part_begin=lambda headers: parts.append([headers["content-disposition"], b""]),
+        on_part_data=lambda data: parts[-1].__setitem__(1, parts[-1][1] + data),
+        on_part_end=lambda: parts[-1].append(True)
+    )
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    if close:
+        parser.close()
+    return parts
+
+PARTS = [
+    (b'Content-Disposition: form-data; name="message"', b'{"subject": "hi"}'),
+    # Looks like the start of a delimiter without being one.
+    (b'Content-Disposition: form-data; name="attachments"; filename="a.bin"', b"\r\n--xYzBound\r\n-" + bytes(range(256)) * 3),
+    (b'Content-Disposition: form-data; name="attachments"; filename="empty.txt"', b""),
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 13, len(BOUNDARY) + 4, 1000, 10 ** 6])
+def test_odd_chunk_sizes_give_the_same_parts(chunk_size):
+    parts = parse(build_body(PARTS), chunk_size)
+
+    assert [(disposition, data) for disposition, data, _ in parts] == [
+        (headers.split(b": ", 1)[1].decode(), data) for headers, data in PARTS
+    ]
+
+def test_preamble_is_skipped():
+    parts = parse(b"preamble text\r\n" + build_body(PARTS[:1]), 5)
+
+    assert parts == [['form-data; name="message"', b'{"subject": "hi"}', True]]
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 10 ** 6])
+def test_missing_closing_boundary(chunk_size):
+    body = build_body(PARTS, closing=False)
+
+    with pytest.raises(MultipartError):
+        parse(body, chunk_size)
+
+def test_truncated_body_is_rejected():
+    body = build_body(PARTS)[:-20]
+
+    with pytest.raises(MultipartError):
+        parse(body, 16)
+
+@pytest.mark.parametrize("chunk_size", [1, 4096, 10 ** 6])
+def test_oversized_part_headers(chunk_size):
+    headers = b"Content-Disposition: form-data; name=\"message\"\r\nX-Padding: " + b"a" * MAX_PART_HEADER_BYTES
+
+    with pytest.raises(MultipartError, match="headers are too large"):
+        parse(build_body([(headers, b"{}")]), chunk_size, close=False)
+
+def test_headers_at_the_limit_are_accepted():
+    headers = b"Content-Disposition: form-data; name=\"message\"\r\nX-Padding: "
+    headers += b"a" * (MAX_PART_HEADER_BYTES - len(headers))
+
+    assert parse(build_body([(headers, b"{}")]), 1) == [['form-data; name="message"', b"{}", True]]
+
+def test_malformed_boundary_suffix():
+    body = b"--" + BOUNDARY + b"XX\r\n"
+
+    with pytest.raises(MultipartError, match="Malformed"):
+        parse(body, 3, close=False)